@@ -0,0 +1,561 @@
+"""
+Builder benchmarks.
+
+Scenarios: cold and warm single project builds, batches of 1, 100 and 1000
+projects (in processes and threads), a config change applied to 100
+built projects (incremental build vs. update), rendering of 1000
+projects differing only in name (specialized templates vs. jinja2) and
+of the plain templates (chunks and slots vs. jinja2), a full option
+matrix (batch vs. matrix build), a synthetic template tree with 10k
+files and a template with a large rendered output.
+
+Standalone run stores the results as JSON (one file per run, named after
+the date and the commit) and can compare two result files::
+
+    python benchmarks/bench_builder.py --output benchmarks/results
+    python benchmarks/bench_builder.py --quick --only batch
+    python benchmarks/bench_builder.py --compare old.json new.json
+
+The same scenarios run under pytest-benchmark::
+
+    pytest benchmarks/bench_builder.py --benchmark-json=results.json
+
+Cold scenarios compare the template caches: precompiled bundle, jinja2
+bytecode cache and none, with the cache filled or emptied before every
+run. Templates are cached in a temporary directory, the user cache
+directory is not touched.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable
+from typing import ContextManager
+from typing import NamedTuple
+
+import blank_project
+from blank_project import Builder
+from blank_project import Config
+from blank_project.analysis import analyze_template
+from blank_project.bundle import get_bundle_root
+from blank_project.bytecode import get_bytecode_cache_dir
+from blank_project.index import get_template_index
+from blank_project.matrix import get_matrix_dir
+from blank_project.matrix import iterate_matrix
+from blank_project.partial import PartialTemplates
+from blank_project.partial import get_plain_template
+
+
+# Large output template (%-formatted with the number of lines)
+LARGE_TEMPLATE = (
+    '{%% for i in range(%d) %%}'
+    '{{ name }}_{{ i }} = "{{ author }}"  # line {{ i }}\n'
+    '{%% endfor %%}'
+)
+
+SMALL_TEMPLATE = (
+    '[{{ name }}]\n'
+    'author = {{ author }}\n'
+    'line_length = {{ line_length }}\n'
+    '{% if python2 %}python2 = true\n{% endif %}'
+)
+
+
+class Scenario(NamedTuple):
+    """
+    Benchmark scenario
+
+    :param name: Scenario name
+    :param params: Scenario parameters (stored with the results)
+    :param rounds: Number of measured runs
+    :param setup: Context manager factory taking a work directory and
+                  yielding the measured function
+    """
+    name: str
+    params: dict
+    rounds: int
+    setup: Callable[[str], ContextManager[Callable[[], object]]]
+
+    @property
+    def id(self
+           ) -> str:
+        """
+        :return: Scenario id
+        """
+        return '-'.join([self.name] + [f'{key}={value}' for key, value
+                                       in sorted(self.params.items())])
+
+
+def reset_caches():
+    """
+    Forget everything blank_project keeps per process
+    """
+    blank_project._environments.clear()
+    get_template_index.cache_clear()
+    analyze_template.cache_clear()
+    get_plain_template.cache_clear()
+
+
+@contextmanager
+def template_dir(directory):
+    """
+    Build projects from another template directory
+    """
+    previous = blank_project.TEMPLATE_PROJECT_DIR
+    blank_project.TEMPLATE_PROJECT_DIR = directory
+    reset_caches()
+    try:
+        yield
+    finally:
+        blank_project.TEMPLATE_PROJECT_DIR = previous
+        reset_caches()
+
+
+@contextmanager
+def environ(**values):
+    """
+    Temporarily set environment variables
+    """
+    previous = {key: os.environ.get(key) for key in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def make_config(i=0):
+    """
+    :param i: Project number
+    :return: Project config
+    """
+    return Config(name=f'project{i}', author='author',
+                  python2=bool(i % 2), docs=bool(i % 3))
+
+
+def make_template_tree(directory, files, template_ratio=0.1):
+    """
+    Synthetic template tree, files are spread over 100 directories
+
+    :param directory: Template directory
+    :param files: Number of files
+    :param template_ratio: Share of templates among the files
+    """
+    templates = max(int(files * template_ratio), 1)
+    step = files / templates
+
+    for i in range(files):
+        dirname = os.path.join(directory, f'pkg{i % 100}', f'sub{i % 7}')
+        os.makedirs(dirname, exist_ok=True)
+
+        if int(i % step) == 0:
+            file_path = os.path.join(dirname, f'file{i}.cfg_template')
+            content = SMALL_TEMPLATE
+        else:
+            file_path = os.path.join(dirname, f'file{i}.py')
+            content = f'# static file {i}\n' * 8
+
+        with open(file_path, mode='w') as f:
+            f.write(content)
+
+
+@contextmanager
+def cold_build(workdir, template_cache, warm_cache=True):
+    """
+    Single build in a fresh process state
+
+    :param template_cache: Template cache kind
+    :param warm_cache: Template cache is filled before the measured runs
+                       (otherwise it is emptied before every run)
+    """
+    base_dir = os.path.join(workdir, 'project')
+    config = make_config()
+    cache_dir = {
+        'bundle': get_bundle_root(blank_project.TEMPLATE_PROJECT_DIR),
+        'bytecode': get_bytecode_cache_dir(),
+    }.get(template_cache)
+
+    def run():
+        if not warm_cache and cache_dir:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        reset_caches()
+        Builder(base_dir, config, template_cache=template_cache).build()
+
+    if warm_cache:
+        run()
+
+    yield run
+
+
+@contextmanager
+def warm_build(workdir):
+    """
+    Single build with templates already compiled
+    """
+    base_dir = os.path.join(workdir, 'project')
+    config = make_config()
+    Builder._warm_up()
+
+    yield lambda: Builder(base_dir, config).build()
+
+
+@contextmanager
+def update_build(workdir, projects, full):
+    """
+    Config change (line length) applied to already built projects
+    """
+    batch = [(os.path.join(workdir, f'project{i}'), make_config(i))
+             for i in range(projects)]
+    Builder._warm_up()
+    for base_dir, config in batch:
+        Builder(base_dir, config).build()
+
+    def run():
+        for base_dir, config in batch:
+            new = Config(name=config.name, author=config.author,
+                         line_length=config.line_length + 1,
+                         python2=config.python2, docs=config.docs)
+            if full:
+                Builder(base_dir, new, incremental=True).build()
+            else:
+                Builder(base_dir, new).update(config)
+
+    yield run
+
+
+@contextmanager
+def render_batch(workdir, projects, partial):
+    """
+    Rendering of all the templates for projects differing only in name
+    and author (no writes), specialized templates vs. template.render
+    """
+    contexts = [Config(name=f'project{i}', author=f'author{i}').get_context()
+                for i in range(projects)]
+    Builder._warm_up()
+    environment = blank_project.get_environment()
+    templates = [(template_file.path,
+                  environment.get_template(template_file.path))
+                 for template_file in Builder._get_index()
+                 if template_file.is_template]
+
+    if not partial:
+        yield lambda: [template.render(context)
+                       for context in contexts
+                       for _, template in templates]
+        return
+
+    specialized = PartialTemplates.from_contexts(
+        blank_project.TEMPLATE_PROJECT_DIR, contexts
+    )
+
+    def run():
+        return [specialized.render(name, context, lambda: template)
+                for context in contexts
+                for name, template in templates]
+
+    # Templates are specialized once per batch, out of the measured runs
+    run()
+    yield run
+
+
+@contextmanager
+def plain_render(workdir, projects, fast):
+    """
+    Rendering of the plain templates (text and outputs only), chunks and
+    slots vs. jinja2
+    """
+    contexts = [make_config(i).get_context() for i in range(projects)]
+    environment = blank_project.get_environment()
+    directory = blank_project.TEMPLATE_PROJECT_DIR
+    names = [template_file.path for template_file in Builder._get_index()
+             if template_file.is_template
+             and get_plain_template(directory, template_file.path)]
+
+    if fast:
+        templates = [get_plain_template(directory, name) for name in names]
+    else:
+        templates = [environment.get_template(name) for name in names]
+
+    yield lambda: [template.render(context)
+                   for context in contexts
+                   for template in templates]
+
+
+# Matrix scenario axes (names are added by the scenario)
+MATRIX_AXES = {
+    'author': ['author'],
+    'python2': [False, True],
+    'docs': [False, True],
+    'mypy': [False, True],
+    'pylint': [False, True],
+    'flake8': [False, True],
+    'isort': [False, True],
+    'coverage': [-1, 100],
+}
+
+
+@contextmanager
+def matrix_build(workdir, names, matrix):
+    """
+    Full option matrix, built as a matrix or as a plain batch
+    """
+    axes = dict(name=[f'project{i}' for i in range(names)], **MATRIX_AXES)
+
+    if matrix:
+        yield lambda: Builder.build_matrix(workdir, axes)
+        return
+
+    batch = [(os.path.join(workdir, get_matrix_dir(params, axes)),
+              Config(**params))
+             for params in iterate_matrix(axes)]
+    yield lambda: Builder.build_many(batch)
+
+
+@contextmanager
+def batch_build(workdir, projects, jobs, threads=False):
+    """
+    Batch of projects
+    """
+    batch = [(os.path.join(workdir, f'project{i}'), make_config(i))
+             for i in range(projects)]
+
+    yield lambda: Builder.build_many(batch, jobs=jobs, threads=threads)
+
+
+@contextmanager
+def tree_build(workdir, files):
+    """
+    Single build from a synthetic template tree
+    """
+    templates = os.path.join(workdir, 'templates')
+    make_template_tree(templates, files)
+    base_dir = os.path.join(workdir, 'project')
+    config = make_config()
+
+    with template_dir(templates):
+        Builder._warm_up()
+        yield lambda: Builder(base_dir, config).build()
+
+
+@contextmanager
+def large_output_build(workdir, lines, stream):
+    """
+    Single build of a template with a large rendered output
+    """
+    templates = os.path.join(workdir, 'templates')
+    os.makedirs(templates)
+    with open(os.path.join(templates, 'large.txt_template'), mode='w') as f:
+        f.write(LARGE_TEMPLATE % lines)
+
+    base_dir = os.path.join(workdir, 'project')
+    config = make_config()
+
+    with template_dir(templates):
+        Builder._warm_up()
+        yield lambda: Builder(base_dir, config, stream=stream).build()
+
+
+def get_scenarios(quick=False):
+    """
+    :param quick: Smaller batches and trees (for a smoke run)
+    :return: Benchmark scenarios
+    """
+    scale = 10 if quick else 1
+
+    def scenario(name, setup, rounds, **params):
+        return Scenario(
+            name=name,
+            params=params,
+            rounds=rounds,
+            setup=lambda workdir: setup(workdir, **params),
+        )
+
+    return [
+        scenario('cold', cold_build, 10, template_cache='bundle',
+                 warm_cache=False),
+        scenario('cold', cold_build, 20, template_cache='bundle'),
+        scenario('cold', cold_build, 10, template_cache='bytecode',
+                 warm_cache=False),
+        scenario('cold', cold_build, 20, template_cache='bytecode'),
+        scenario('cold', cold_build, 10, template_cache='none'),
+        scenario('warm', warm_build, 50),
+        scenario('batch', batch_build, 20, projects=1, jobs=1),
+        scenario('batch', batch_build, 5, projects=100 // scale, jobs=1),
+        scenario('batch', batch_build, 3, projects=1000 // scale, jobs=1),
+        scenario('batch', batch_build, 3, projects=1000 // scale,
+                 jobs=max(os.cpu_count() or 1, 2)),
+        scenario('batch', batch_build, 3, projects=1000 // scale,
+                 jobs=8, threads=True),
+        scenario('update', update_build, 5, projects=100 // scale,
+                 full=True),
+        scenario('update', update_build, 5, projects=100 // scale,
+                 full=False),
+        scenario('render', render_batch, 5, projects=1000 // scale,
+                 partial=False),
+        scenario('render', render_batch, 5, projects=1000 // scale,
+                 partial=True),
+        scenario('plain', plain_render, 5, projects=1000 // scale,
+                 fast=False),
+        scenario('plain', plain_render, 5, projects=1000 // scale,
+                 fast=True),
+        scenario('matrix', matrix_build, 3, names=4, matrix=False),
+        scenario('matrix', matrix_build, 3, names=4, matrix=True),
+        scenario('tree', tree_build, 3, files=10000 // scale),
+        scenario('large', large_output_build, 3,
+                 lines=1000000 // scale, stream=False),
+        scenario('large', large_output_build, 3,
+                 lines=1000000 // scale, stream=True),
+    ]
+
+
+@contextmanager
+def workspace():
+    """
+    Temporary work directory with its own template bundle cache
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        with environ(BLANK_PROJECT_CACHE_DIR=os.path.join(workdir, 'cache')):
+            yield workdir
+
+
+def measure(scenario):
+    """
+    :param scenario: Benchmark scenario
+    :return: Scenario results
+    """
+    with workspace() as workdir, scenario.setup(workdir) as run:
+        timings = []
+        for _ in range(scenario.rounds):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+
+    return {
+        'name': scenario.name,
+        'id': scenario.id,
+        'params': scenario.params,
+        'stats': {
+            'rounds': len(timings),
+            'min': min(timings),
+            'max': max(timings),
+            'mean': statistics.mean(timings),
+            'median': statistics.median(timings),
+            'stddev': (statistics.stdev(timings)
+                       if len(timings) > 1 else 0.0),
+        },
+    }
+
+
+def get_commit():
+    """
+    :return: Current git commit or None
+    """
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            universal_newlines=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old_path, new_path):
+    """
+    Print median changes between two result files
+    """
+    with open(old_path) as f:
+        old = {result['id']: result for result in json.load(f)['benchmarks']}
+    with open(new_path) as f:
+        new = {result['id']: result for result in json.load(f)['benchmarks']}
+
+    for key, result in new.items():
+        median = result['stats']['median']
+        if key not in old:
+            print(f'{key:<48} {median * 1e3:10.2f} ms  (new)')
+            continue
+        ratio = median / old[key]['stats']['median']
+        print(f'{key:<48} {median * 1e3:10.2f} ms  x{ratio:.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--output', type=str, default=None,
+                        help='Results directory or .json file')
+    parser.add_argument('--quick', action='store_true',
+                        help='Smaller batches and trees')
+    parser.add_argument('--only', type=str, default=None,
+                        help='Run scenarios with this name only')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help='Compare two result files')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = []
+    for scenario in get_scenarios(quick=args.quick):
+        if args.only and scenario.name != args.only:
+            continue
+        result = measure(scenario)
+        results.append(result)
+        stats = result['stats']
+        print(f'{scenario.id:<48} {stats["median"] * 1e3:10.2f} ms  '
+              f'(min {stats["min"] * 1e3:.2f}, {stats["rounds"]} rounds)')
+        sys.stdout.flush()
+
+    commit = get_commit()
+    now = datetime.now()
+    report = {
+        'datetime': now.isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'quick': args.quick,
+        'benchmarks': results,
+    }
+
+    if args.output:
+        output = args.output
+        if not output.endswith('.json'):
+            os.makedirs(output, exist_ok=True)
+            output = os.path.join(
+                output, f'{now:%Y%m%d-%H%M%S}-{commit or "unknown"}.json'
+            )
+        with open(output, mode='w') as f:
+            json.dump(report, f, indent=1)
+        print(f'results: {output}')
+
+
+def pytest_generate_tests(metafunc):
+    # Scenarios as pytest-benchmark tests
+    if 'scenario' in metafunc.fixturenames:
+        scenarios = get_scenarios(
+            quick=bool(os.environ.get('BLANK_PROJECT_BENCH_QUICK'))
+        )
+        metafunc.parametrize('scenario', scenarios,
+                             ids=[scenario.id for scenario in scenarios])
+
+
+def test_builder(benchmark, scenario):
+    with workspace() as workdir, scenario.setup(workdir) as run:
+        benchmark.pedantic(run, rounds=scenario.rounds)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Static file materialization benchmark.
+
+Materializes a set of files with every strategy on each target directory
+(mount ext4, btrfs, tmpfs... directories to compare filesystems). Source
+files are created on the same filesystem as the target::
+
+    python benchmarks/bench_materialize.py --target /mnt/ext4 /mnt/btrfs \\
+        /dev/shm --files 1000 --size 64
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from collections import Counter
+
+from blank_project.materialize import STRATEGIES
+from blank_project.materialize import materialize_file
+
+
+def run(target, strategy, sources):
+    """
+    :return: Duration in seconds and used strategies counter
+    """
+    output = tempfile.mkdtemp(prefix=f'{strategy}-', dir=target)
+    used = Counter()
+
+    try:
+        start = time.perf_counter()
+        for index, src in enumerate(sources):
+            used[materialize_file(src, os.path.join(output, str(index)),
+                                  strategy)] += 1
+        duration = time.perf_counter() - start
+    finally:
+        shutil.rmtree(output)
+
+    return duration, used
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--target', nargs='+', default=[tempfile.gettempdir()])
+    parser.add_argument('--files', type=int, default=1000)
+    parser.add_argument('--size', type=int, default=64, help='File size, KiB')
+    args = parser.parse_args()
+
+    for target in args.target:
+        source_dir = tempfile.mkdtemp(prefix='sources-', dir=target)
+
+        try:
+            sources = []
+            for index in range(args.files):
+                src = os.path.join(source_dir, str(index))
+                with open(src, mode='wb') as f:
+                    f.write(os.urandom(args.size * 1024))
+                sources.append(src)
+
+            print(f'{target}: {args.files} files x {args.size} KiB')
+
+            for strategy in STRATEGIES:
+                duration, used = run(target, strategy, sources)
+                used_str = ', '.join(f'{k}={v}' for k, v in used.items())
+                print(f'  {strategy:<16} {duration * 1e3:9.1f} ms  '
+                      f'({used_str})')
+        finally:
+            shutil.rmtree(source_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Template rendering memory benchmark.
+
+Renders a synthetic template producing a large output with and without
+``Builder`` streaming mode and reports time and peak traced memory::
+
+    python benchmarks/bench_render_memory.py --lines 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from jinja2 import DictLoader
+from jinja2 import Environment
+
+from blank_project import Builder
+from blank_project import Config
+
+
+TEMPLATE = (
+    '{% for i in range(lines) %}'
+    '{{ name }}-{{ i }} = "{{ author }}"  # line {{ i }}\n'
+    '{% endfor %}'
+)
+
+
+def measure(template, config, stream, output):
+    """
+    :return: Duration in seconds and peak traced memory in bytes
+    """
+    builder = Builder(os.path.dirname(output), config, stream=stream)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    with open(output, mode='w',
+              buffering=builder.stream_buffer_size if stream else -1) as f:
+        builder._render(template, f)
+
+    duration = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return duration, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--lines', type=int, default=200000)
+    args = parser.parse_args()
+
+    env = Environment(loader=DictLoader({'big': TEMPLATE}))
+    env.globals['lines'] = args.lines
+    template = env.get_template('big')
+    config = Config(name='project', author='author')
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        output = os.path.join(tmpdir, 'big.txt')
+
+        for stream in (False, True):
+            duration, peak = measure(template, config, stream, output)
+            size = os.path.getsize(output)
+            print(f'{"stream" if stream else "render":<7} '
+                  f'output {size / 2 ** 20:7.1f} MiB  '
+                  f'peak {peak / 2 ** 20:7.1f} MiB  '
+                  f'{duration:6.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Skip rules microbenchmark.
+
+Compares the per-file cost of matching a synthetic template index with the
+former ``re.match`` loop over raw patterns and with ``SkipMatcher``::
+
+    python benchmarks/bench_skip_rules.py --files 10000
+"""
+import argparse
+import re
+import timeit
+
+from blank_project.index import TemplateFile
+from blank_project.index import TemplateIndex
+from blank_project.rules import SkipMatcher
+from blank_project.rules import directory
+from blank_project.rules import exact
+
+
+PATTERNS = ['docs/', '.coveragerc', '.flake8', '.isort.cfg', 'mypy.ini',
+            '.pylintrc']
+
+RULES = [directory('docs'), exact('.coveragerc'), exact('.flake8'),
+         exact('.isort.cfg'), exact('mypy.ini'), exact('.pylintrc')]
+
+
+def make_index(files):
+    """
+    :param files: Number of files
+    :return: Synthetic index, a quarter of files is under docs/
+    """
+    paths = []
+    for i in range(files):
+        if i % 4 == 0:
+            paths.append(f'docs/source/page{i}.rst')
+        else:
+            paths.append(f'pkg{i % 97}/module{i}.py')
+    paths.extend(PATTERNS[1:])
+
+    return TemplateIndex([
+        TemplateFile(path=p, target=p, is_template=False, size=0)
+        for p in paths
+    ])
+
+
+def regex_loop(index):
+    """
+    Former Builder._listdir matching
+    """
+    result = []
+    for template_file in index:
+        for pattern in PATTERNS:
+            if re.match(pattern, template_file.path):
+                break
+        else:
+            result.append(template_file)
+    return result
+
+
+def skip_matcher(index):
+    """
+    SkipMatcher matching (compiled per build as Builder does)
+    """
+    return list(SkipMatcher(RULES).filter(index))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--files', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    index = make_index(args.files)
+
+    for func in (regex_loop, skip_matcher):
+        best = min(timeit.repeat(lambda: func(index), number=1,
+                                 repeat=args.repeat))
+        print(f'{func.__name__:<14} {best * 1e3:8.3f} ms  '
+              f'{best / len(index) * 1e9:8.1f} ns/file')
+
+
+if __name__ == '__main__':
+    main()
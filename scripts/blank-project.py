@@ -1,17 +1,32 @@
 #!/usr/bin/python
 import argparse
+import json
+import sys
+from os import path
 
 from blank_project import DEFAULT_COVERAGE
 from blank_project import DEFAULT_LINE_LENGTH
+from blank_project import TEMPLATE_CACHES
+from blank_project import TEMPLATE_PROJECT_DIR
 from blank_project import Builder
 from blank_project import Config
+from blank_project import compile_templates
+from blank_project.manifest import load_manifest
+from blank_project.materialize import STRATEGIES
+from blank_project.partial import PartialTemplates
+from blank_project.render_cache import RenderCache
 
 
 def _get_parser():
     """
     :return: Argument parser
     """
-    parser = argparse.ArgumentParser(description='Create blank project')
+    parser = argparse.ArgumentParser(
+        description='Create blank project',
+        epilog='Commands: batch, compile, serve (see "<command> --help"). '
+               'A project directory named as a command is given as '
+               'a path, e.g. ./compile',
+    )
     parser.add_argument('dir', type=str, help='Project directory')
     parser.add_argument('name', type=str, help='Name of the project')
     parser.add_argument('author', type=str, help='Author')
@@ -33,16 +48,61 @@ def _get_parser():
                         default=DEFAULT_COVERAGE)
     parser.add_argument('--no-coverage', action='store_true',
                         help='Disable coverage')
+    parser.add_argument('--stream', action='store_true',
+                        help='Stream rendered templates to files')
+    parser.add_argument('--materialize', choices=STRATEGIES, default='copy',
+                        help='Static files materialization strategy')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Write only changed files')
+    parser.add_argument('--template-cache', choices=TEMPLATE_CACHES,
+                        required=False,
+                        help='Precompiled template bundle, jinja2 bytecode '
+                             'cache or none (default: bundle)')
+    parser.add_argument('--client', action='store_true',
+                        help='Build in the running daemon (see serve), '
+                             'in process if there is none')
+    parser.add_argument('--socket', type=str, required=False,
+                        help='Daemon socket path (implies --client)')
+    parser.add_argument('--plan', action='store_true',
+                        help='Print the build plan as JSON, build nothing')
+    parser.add_argument('--archive', type=str, required=False,
+                        help='Write the project into the archive '
+                             '(.zip, .tar, .tar.gz, .tgz, .tar.bz2, '
+                             '.tar.xz) instead of the directory, '
+                             '"-" writes .tar.gz to stdout')
+    parser.add_argument('--profile', action='store_true',
+                        help='Print build steps timings to stderr')
+    parser.add_argument('--profile-json', type=str, required=False,
+                        help='Write build steps timings as JSON to the file '
+                             '("-" for stdout)')
 
     return parser
 
 
-def main():
+def _get_compile_parser():
+    """
+    :return: Argument parser for the compile command
+    """
+    return argparse.ArgumentParser(
+        prog='blank-project.py compile',
+        description='Precompile project templates into the template bundle',
+    )
+
+
+def compile_command(argv):
+    """
+    Precompiling templates (e.g. right after installation)
+    """
+    _get_compile_parser().parse_args(argv)
+    print(compile_templates())
+
+
+def build_command(argv):
     """
     Building the project by provided params
     """
     parser = _get_parser()
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     params = {
         'name': args.name,
@@ -57,7 +117,286 @@ def main():
         'coverage': -1 if args.no_coverage else args.coverage,
     }
 
-    Builder(args.dir, Config(**params)).build()
+    try:
+        config = Config(**params)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.plan:
+        builder = Builder(args.dir, config)
+        print(json.dumps([action._asdict() for action in builder.plan()],
+                         indent=1))
+        return
+
+    if args.client or args.socket:
+        if args.archive or args.profile or args.profile_json:
+            parser.error('--client can\'t be used with --archive '
+                         'or --profile')
+        client_build(args, params)
+        return
+
+    profiler = None
+    if args.profile or args.profile_json:
+        from blank_project.profiler import Profiler
+
+        profiler = Profiler()
+
+    if args.archive:
+        archive_build(parser, args, config, profiler)
+    else:
+        builder = Builder(args.dir, config,
+                          stream=args.stream,
+                          materialize=args.materialize,
+                          incremental=args.incremental,
+                          template_cache=args.template_cache,
+                          profiler=profiler)
+        builder.build()
+
+        if builder.report is not None:
+            for status in builder.report._fields:
+                for file_path in getattr(builder.report, status):
+                    print(f'{status:<10} {file_path}')
+
+    if profiler is not None:
+        report_profile(args, profiler)
+
+
+def report_profile(args, profiler):
+    """
+    Printing the build profile
+    """
+    if args.profile:
+        print(profiler.format_table(), file=sys.stderr)
+
+    if args.profile_json == '-':
+        print(json.dumps(profiler.to_json(), indent=1))
+    elif args.profile_json:
+        with open(args.profile_json, mode='w') as f:
+            json.dump(profiler.to_json(), f, indent=1)
+
+
+def archive_build(parser, args, config, profiler=None):
+    """
+    Building the project into the archive, the project directory name is
+    the archive root
+    """
+    from contextlib import ExitStack
+
+    from blank_project.sinks import get_archive_format
+    from blank_project.sinks import open_archive_sink
+
+    if args.incremental:
+        parser.error('--archive can\'t be used with --incremental')
+
+    if args.archive == '-' and args.profile_json == '-':
+        parser.error('--archive and --profile-json can\'t both use stdout')
+
+    try:
+        archive_format = get_archive_format(
+            '.tar.gz' if args.archive == '-' else args.archive
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    with ExitStack() as stack:
+        if args.archive == '-':
+            f = sys.stdout.buffer
+        else:
+            f = stack.enter_context(open(args.archive, mode='wb'))
+
+        sink = stack.enter_context(open_archive_sink(
+            f, archive_format, prefix=path.basename(path.normpath(args.dir))
+        ))
+        Builder(args.dir, config,
+                stream=args.stream,
+                template_cache=args.template_cache,
+                sink=sink,
+                profiler=profiler).build()
+
+
+def client_build(args, params):
+    """
+    Building the project in the daemon
+    """
+    from blank_project.daemon import build
+
+    try:
+        response = build(args.dir, params,
+                         socket_path=args.socket,
+                         stream=args.stream,
+                         materialize=args.materialize,
+                         incremental=args.incremental,
+                         template_cache=args.template_cache)
+    except OSError as e:
+        # Connection to the daemon failed (e.g. socket permissions)
+        response = {'ok': False, 'error': repr(e)}
+
+    if not response['ok']:
+        print(f'FAILED  {args.dir}: {response["error"]}')
+        sys.exit(1)
+
+    for status, file_path in response['files']:
+        print(f'{status:<10} {file_path}')
+
+
+def _get_serve_parser():
+    """
+    :return: Argument parser for the serve command
+    """
+    parser = argparse.ArgumentParser(
+        prog='blank-project.py serve',
+        description='Run the build daemon on a Unix domain socket',
+    )
+    parser.add_argument('--socket', type=str, required=False,
+                        help='Socket path')
+
+    return parser
+
+
+def serve_command(argv):
+    """
+    Running the build daemon
+    """
+    from blank_project.daemon import get_socket_path
+    from blank_project.daemon import serve
+
+    args = _get_serve_parser().parse_args(argv)
+    socket_path = args.socket or get_socket_path()
+
+    print(f'serving on {socket_path}')
+    sys.stdout.flush()
+
+    try:
+        serve(socket_path)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+
+def _get_batch_parser():
+    """
+    :return: Argument parser for the batch command
+    """
+    parser = argparse.ArgumentParser(
+        prog='blank-project.py batch',
+        description='Create blank projects listed in the manifest',
+    )
+    parser.add_argument('manifest', type=str,
+                        help='Projects manifest (.json, .csv or .toml)')
+    parser.add_argument('-j', '--jobs', type=int, required=False, default=1,
+                        help='Number of workers')
+    parser.add_argument('--threads', action='store_true',
+                        help='Build in worker threads instead of processes')
+    parser.add_argument('--render-cache', action='store_true',
+                        help='Reuse rendered templates between projects')
+    parser.add_argument('--render-cache-dir', type=str, required=False,
+                        help='On-disk rendered templates store '
+                             '(implies --render-cache)')
+    parser.add_argument('--partial', action='store_true',
+                        help='Specialize templates for the settings shared '
+                             'by all projects')
+    parser.add_argument('--stream', action='store_true',
+                        help='Stream rendered templates to files')
+    parser.add_argument('--materialize', choices=STRATEGIES, default='copy',
+                        help='Static files materialization strategy')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Write only changed files')
+    parser.add_argument('--template-cache', choices=TEMPLATE_CACHES,
+                        required=False,
+                        help='Precompiled template bundle, jinja2 bytecode '
+                             'cache or none (default: bundle)')
+
+    return parser
+
+
+def batch_command(argv):
+    """
+    Building all projects from the manifest
+    """
+    parser = _get_batch_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        projects = [(params.pop('dir'), Config(**params))
+                    for params in load_manifest(args.manifest)]
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    render_cache = None
+    if args.render_cache or args.render_cache_dir:
+        render_cache = RenderCache(directory=args.render_cache_dir)
+
+    partial = None
+    if args.partial:
+        partial = PartialTemplates.from_contexts(
+            TEMPLATE_PROJECT_DIR,
+            [config.get_context() for _, config in projects],
+        )
+
+    results = Builder.build_many(
+        projects,
+        jobs=args.jobs,
+        threads=args.threads,
+        stream=args.stream,
+        materialize=args.materialize,
+        incremental=args.incremental,
+        template_cache=args.template_cache,
+        render_cache=render_cache,
+        partial=partial,
+    )
+
+    failed = 0
+    for result in results:
+        if result.ok:
+            print(f'ok      {result.duration:.3f}s  {result.base_dir}')
+        else:
+            failed += 1
+            print(f'FAILED  {result.duration:.3f}s  {result.base_dir}: '
+                  f'{result.error!r}')
+
+    total = sum(result.duration for result in results)
+    print(f'{len(results) - failed} built, {failed} failed in {total:.3f}s')
+
+    if render_cache is not None:
+        stats = render_cache.stats
+        if args.jobs > 1 and not args.threads:
+            # Cached entries stay in the worker processes
+            del stats['size']
+
+        print('render cache: ' + ', '.join(
+            f'{key}={value}' for key, value in stats.items()
+        ))
+
+    if partial is not None:
+        print('partial: ' + ', '.join(
+            f'{key}={value}' for key, value in partial.stats.items()
+        ))
+
+    if failed:
+        sys.exit(1)
+
+
+COMMANDS = {
+    'batch': batch_command,
+    'compile': compile_command,
+    'serve': serve_command,
+}
+
+
+def main():
+    """
+    Running the command by provided params
+
+    The first argument naming a command always runs the command, so a
+    project directory with the same name has to be given as a path
+    (e.g. ./compile).
+    """
+    argv = sys.argv[1:]
+
+    if argv and argv[0] in COMMANDS:
+        COMMANDS[argv[0]](argv[1:])
+    else:
+        build_command(argv)
 
 
 if __name__ == '__main__':
@@ -1,32 +1,237 @@
-import re
+import itertools
+import sys
+import threading
+from contextlib import contextmanager
 from datetime import date
-from os import listdir
-from os import makedirs
+from os import environ
 from os import path
-from shutil import copyfile
+from time import perf_counter
+from types import MappingProxyType
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Callable
+from typing import ContextManager
+from typing import Dict
+from typing import FrozenSet
 from typing import Iterable
 from typing import Iterator
+from typing import List
+from typing import Mapping
+from typing import NamedTuple
+from typing import Optional
+from typing import Sequence
+from typing import TextIO
+from typing import Tuple
 
-from jinja2 import Environment
-from jinja2 import FileSystemLoader
-
+from blank_project.bundle import compile_bundle
+from blank_project.bundle import get_bundle_loader
+from blank_project.bundle import get_bundle_root
+from blank_project.constants import BUNDLE_CACHE
+from blank_project.constants import BYTECODE_CACHE
 from blank_project.constants import DEFAULT_COVERAGE
 from blank_project.constants import DEFAULT_LINE_LENGTH
+from blank_project.constants import TEMPLATE_CACHES
+from blank_project.constants import TEMPLATE_POSTFIX
+from blank_project.constants import TEMPLATE_PROJECT_DIR
+from blank_project.dependencies import DependencyGraph
+from blank_project.dependencies import get_changed_fields
+from blank_project.dependencies import get_dependency_graph
+from blank_project.dependencies import get_template_fields
+from blank_project.incremental import UNCHANGED
+from blank_project.incremental import BuildReport
+from blank_project.incremental import Lock
+from blank_project.incremental import hash_bytes
+from blank_project.incremental import hash_file
+from blank_project.index import TemplateFile
+from blank_project.index import TemplateIndex
+from blank_project.index import get_template_index
+from blank_project.materialize import COPY
+from blank_project.materialize import check_strategy
+from blank_project.matrix import MatrixStats
+from blank_project.matrix import get_matrix_dir
+from blank_project.matrix import get_render_key
+from blank_project.matrix import iterate_matrix
+from blank_project.partial import PartialTemplates
+from blank_project.partial import get_plain_template
+from blank_project.plan import COPY as COPY_ACTION
+from blank_project.plan import FILE_ACTIONS
+from blank_project.plan import MKDIR
+from blank_project.plan import PACKAGE
+from blank_project.plan import RENDER
+from blank_project.plan import Action
+from blank_project.plan import DirectoryPlan
+from blank_project.plan import get_directory_plan
+from blank_project.plan import plan_build
+from blank_project.plan import plan_update
+from blank_project.render_cache import RenderCache
+from blank_project.rules import SkipRule
+from blank_project.rules import directory
+from blank_project.rules import exact
+from blank_project.sinks import FileSystemSink
+from blank_project.sinks import Sink
+
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+    from jinja2 import BaseLoader
+    from jinja2 import BytecodeCache
+    from jinja2 import Environment
+    from jinja2 import Template
+
+    from blank_project.profiler import ProfileEvent
+    from blank_project.profiler import Profiler
+
+
+def _is_template_name(name: str
+                      ) -> bool:
+    """
+    :param name: Template name
+    :return: Is name a template name or not
+    """
+    return name.endswith(TEMPLATE_POSTFIX)
+
+
+def get_template_cache(template_cache: Optional[str] = None
+                       ) -> str:
+    """
+    Template cache kind
+
+    Default is BLANK_PROJECT_TEMPLATE_CACHE, or the bytecode cache if the
+    bundle is disabled with BLANK_PROJECT_NO_BUNDLE, or the bundle.
+
+    :param template_cache: Template cache kind (bundle, bytecode or none)
+    :return: Checked template cache kind
+    """
+    if template_cache is None:
+        template_cache = environ.get('BLANK_PROJECT_TEMPLATE_CACHE') or (
+            BYTECODE_CACHE if environ.get('BLANK_PROJECT_NO_BUNDLE')
+            else BUNDLE_CACHE
+        )
+
+    if template_cache not in TEMPLATE_CACHES:
+        raise ValueError(f'Unknown template cache: {template_cache!r}')
+
+    return template_cache
+
+
+def _create_loader(template_cache: str
+                   ) -> 'BaseLoader':
+    """
+    Loader over the precompiled template bundle or the template sources
+
+    Falls back to the source loader if the bundle can't be used
+    (read-only cache directory).
+
+    :param template_cache: Template cache kind
+    :return: Template loader
+    """
+    from jinja2 import FileSystemLoader
+
+    if template_cache == BUNDLE_CACHE:
+        try:
+            return get_bundle_loader(TEMPLATE_PROJECT_DIR,
+                                     get_bundle_root(TEMPLATE_PROJECT_DIR),
+                                     _is_template_name)
+        except OSError:
+            pass
+
+    return FileSystemLoader(TEMPLATE_PROJECT_DIR)
+
+
+def _create_bytecode_cache(template_cache: str
+                           ) -> Optional['BytecodeCache']:
+    """
+    Bytecode cache for the templates loaded from sources
+
+    :param template_cache: Template cache kind
+    :return: Bytecode cache (None if it is disabled or can't be used)
+    """
+    if template_cache != BYTECODE_CACHE:
+        return None
+
+    from blank_project.bytecode import AtomicBytecodeCache
+    from blank_project.bytecode import get_bytecode_cache_dir
+
+    try:
+        return AtomicBytecodeCache(get_bytecode_cache_dir())
+    except OSError:
+        return None
+
+
+_environments: Dict[str, 'Environment'] = {}
+_environments_lock = threading.Lock()
+
 
+def get_environment(template_cache: Optional[str] = None
+                    ) -> 'Environment':
+    """
+    Templates environment
+
+    jinja2 is imported and the environment is created on the first call,
+    so importing the package (e.g. for ``--help``) stays cheap.
+
+    :param template_cache: Template cache kind (see
+                           :func:`get_template_cache`)
+    :return: Templates environment
+    """
+    template_cache = get_template_cache(template_cache)
+    environment = _environments.get(template_cache)
+
+    if environment is None:
+        with _environments_lock:
+            environment = _environments.get(template_cache)
+            if environment is None:
+                from jinja2 import Environment
+
+                environment = Environment(
+                    loader=_create_loader(template_cache),
+                    bytecode_cache=_create_bytecode_cache(template_cache),
+                )
+                _environments[template_cache] = environment
+
+    return environment
+
+
+class _EnvironmentProxy:
+    """
+    Default templates environment created on the first attribute access
+    (see :func:`get_environment`)
+    """
+    __slots__ = ()
+
+    def __getattr__(self,
+                    name: str
+                    ) -> Any:
+        return getattr(get_environment(), name)
 
-TEMPLATE_PROJECT_DIR = path.join(path.dirname(path.abspath(__file__)),
-                                 'template')
+    def __repr__(self
+                 ) -> str:
+        return f'<lazy {get_environment()!r}>'
 
 
-env = Environment(
-    loader=FileSystemLoader(TEMPLATE_PROJECT_DIR),
-)
+env = _EnvironmentProxy()
+
+
+def compile_templates(
+        ) -> str:
+    """
+    Compile project templates into the precompiled bundle
+
+    :return: Compiled modules directory
+    """
+    return compile_bundle(TEMPLATE_PROJECT_DIR,
+                          get_bundle_root(TEMPLATE_PROJECT_DIR),
+                          _is_template_name)
 
 
 class Config:
     """
     Project config.
 
+    Config is immutable and hashable, so it can be used as a cache key.
+    Its template context is built once and shared by all the templates.
+
     :param name: Project name
     :param author: Author
     :param line_length: Line length
@@ -39,6 +244,29 @@ class Config:
     :param coverage: Coverage percentage check value
                      (if less than 0 - coverage is disabled)
     """
+    # Template context fields
+    fields: Tuple[str, ...] = (
+        'name', 'author', 'line_length', 'python2', 'docs', 'mypy',
+        'pylint', 'flake8', 'isort', 'coverage', 'coverage_fail', 'year',
+    )
+
+    __slots__ = fields + ('_context', '_hash')
+
+    name: str
+    author: str
+    line_length: int
+    python2: bool
+    docs: bool
+    mypy: bool
+    pylint: bool
+    flake8: bool
+    isort: bool
+    coverage: bool
+    coverage_fail: int
+    year: int
+    _context: Optional[Mapping[str, Any]]
+    _hash: Optional[int]
+
     def __init__(self,
                  name: str,
                  author: str,
@@ -51,116 +279,245 @@ class Config:
                  isort: bool = True,
                  coverage: int = DEFAULT_COVERAGE,
                  ) -> None:
-        self.name = name
-        self.author = author
-        self.line_length = line_length
-        self.python2 = python2
-        self.docs = docs
-        self.mypy = mypy
-        self.pylint = pylint
-        self.flake8 = flake8
-        self.isort = isort
-        self.coverage = coverage >= 0
-        self.coverage_fail = coverage
-
-        self.year = date.today().year
+        for field, text in (('name', name), ('author', author)):
+            if not isinstance(text, str) or not text:
+                raise ValueError(f'Invalid {field}: {text!r}')
+
+        for field, number in (('line_length', line_length),
+                              ('coverage', coverage)):
+            if not isinstance(number, int) or isinstance(number, bool):
+                raise ValueError(f'Invalid {field}: {number!r}')
+
+        if line_length <= 0:
+            raise ValueError(f'Invalid line_length: {line_length!r}')
+
+        if coverage > 100:
+            raise ValueError(f'Invalid coverage: {coverage!r}')
+
+        for field, flag in (('python2', python2), ('docs', docs),
+                            ('mypy', mypy), ('pylint', pylint),
+                            ('flake8', flake8), ('isort', isort)):
+            if not isinstance(flag, bool):
+                raise ValueError(f'Invalid {field}: {flag!r}')
+
+        self._set(name, author, line_length, python2, docs, mypy, pylint,
+                  flake8, isort, coverage >= 0, coverage, date.today().year)
+
+    def _set(self,
+             *values: Any
+             ) -> None:
+        """
+        Set the fields (bypasses immutability)
+
+        :param values: Field values in ``fields`` order
+        """
+        for field, value in zip(self.fields, values):
+            object.__setattr__(self, field, value)
+        object.__setattr__(self, '_context', None)
+        object.__setattr__(self, '_hash', None)
+
+    @classmethod
+    def _restore(cls,
+                 values: Tuple
+                 ) -> 'Config':
+        """
+        :param values: Field values in ``fields`` order
+        :return: Config with the given values (no validation)
+        """
+        config = cls.__new__(cls)
+        config._set(*values)
+        return config
+
+    def _values(self
+                ) -> Tuple:
+        """
+        :return: Field values in ``fields`` order
+        """
+        return tuple(getattr(self, field) for field in self.fields)
+
+    def __setattr__(self,
+                    name: str,
+                    value: Any
+                    ) -> None:
+        raise AttributeError(f'Config is immutable, can\'t set {name!r}')
+
+    def __delattr__(self,
+                    name: str
+                    ) -> None:
+        raise AttributeError(f'Config is immutable, can\'t delete {name!r}')
+
+    def __reduce__(self
+                   ) -> Tuple[Callable[[Tuple], 'Config'], Tuple[Tuple]]:
+        # Year is kept as is, the config is not validated again
+        return self._restore, (self._values(),)
+
+    def __eq__(self,
+               other: object
+               ) -> bool:
+        if not isinstance(other, Config):
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __hash__(self
+                 ) -> int:
+        value = self._hash
+        if value is None:
+            value = hash(self._values())
+            object.__setattr__(self, '_hash', value)
+        return value
+
+    def __repr__(self
+                 ) -> str:
+        params = ', '.join(f'{field}={getattr(self, field)!r}'
+                           for field in self.fields[:9])
+        return f'Config({params}, coverage={self.coverage_fail!r})'
 
     def get_context(self
-                    ) -> dict:
-        """
-        :return: Project config as a dict
-        """
-        return {
-            'name': self.name,
-            'author': self.author,
-            'line_length': self.line_length,
-            'python2': self.python2,
-            'docs': self.docs,
-            'mypy': self.mypy,
-            'pylint': self.pylint,
-            'flake8': self.flake8,
-            'isort': self.isort,
-            'coverage': self.coverage,
-            'coverage_fail': self.coverage_fail,
-            'year': self.year,
-        }
+                    ) -> Mapping[str, Any]:
+        """
+        :return: Project config as a read-only mapping (built once)
+        """
+        context = self._context
+        if context is None:
+            context = MappingProxyType(dict(zip(self.fields, self._values())))
+            object.__setattr__(self, '_context', context)
+        return context
+
+
+class BuildResult(NamedTuple):
+    """
+    Project build result
+
+    :param base_dir: Project directory
+    :param name: Project name
+    :param duration: Build duration in seconds
+    :param error: Build error (None if project was built)
+    """
+    base_dir: str
+    name: str
+    duration: float
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self
+           ) -> bool:
+        """
+        :return: Was project built or not
+        """
+        return self.error is None
+
+
+@contextmanager
+def _no_measure(
+        ) -> Iterator[None]:
+    """
+    Measurement of the build step when profiling is off
+    """
+    yield
+
+
+# Template project index and builder options of a build_many batch
+_Batch = Tuple[TemplateIndex, Dict[str, Any]]
+
+# Batches built in process pools, forked workers look them up by id
+_batches: Dict[int, _Batch] = {}
+_batch_ids = itertools.count()
+
+# Builder options whose counters are collected from the pool workers
+_COUNTED_OPTIONS = ('render_cache', 'partial')
+
+# Build result, counters gained and profiler events of a pool worker
+_WorkerResult = Tuple[BuildResult, Dict[str, Dict[str, int]],
+                      List['ProfileEvent']]
 
 
 class Builder:
     """
     Project builder
 
+    Builder builds one project at a time, different builders can build
+    concurrently in threads: compiled templates and template analysis
+    are shared read-only, objects shared between builders (render cache,
+    specialized templates, profiler) are guarded by their own locks.
+
     :param base_dir: Project directory
     :param config: Project config
+    :param stream: Stream rendered templates to files chunk by chunk
+                   instead of rendering them into strings
+    :param materialize: Static files materialization strategy
+                        (see :mod:`blank_project.materialize`)
+    :param incremental: Write only changed files
+                        (see :mod:`blank_project.incremental`)
+    :param render_cache: Rendered templates cache, can be shared between
+                         builders (streaming is off when it is used)
+    :param sink: Output sink (see :mod:`blank_project.sinks`), project
+                 directory on disk by default
+    :param profiler: Build steps profiler
+                     (see :mod:`blank_project.profiler`)
+    :param template_cache: Template cache kind: bundle, bytecode or none
+                           (see :func:`get_template_cache`)
+    :param partial: Templates specialized for the batch, can be shared
+                    between builders (see :mod:`blank_project.partial`,
+                    streaming is off when it is used)
     """
 
     # Template files postfix
-    template_postfix: str = '_template'
+    template_postfix: str = TEMPLATE_POSTFIX
+
+    # Write buffer size for streamed templates
+    stream_buffer_size: int = 64 * 1024
 
     def __init__(self,
                  base_dir: str,
-                 config: Config
+                 config: Config,
+                 stream: bool = False,
+                 materialize: str = COPY,
+                 incremental: bool = False,
+                 render_cache: Optional[RenderCache] = None,
+                 sink: Optional[Sink] = None,
+                 profiler: Optional['Profiler'] = None,
+                 template_cache: Optional[str] = None,
+                 partial: Optional[PartialTemplates] = None
                  ) -> None:
+        if sink is None:
+            sink = FileSystemSink(base_dir)
+        elif incremental and not isinstance(sink, FileSystemSink):
+            raise ValueError('Incremental builds need a filesystem sink')
+
         self.base_dir = base_dir
         self.config = config
+        self.stream = stream
+        self.materialize = check_strategy(materialize)
+        self.incremental = incremental
+        self.render_cache = render_cache
+        self.profiler = profiler
+        self.sink = sink if profiler is None else profiler.wrap(sink)
+        self.template_cache = get_template_cache(template_cache)
+        self.partial = partial
 
-    @classmethod
-    def _listdir(cls,
-                 directory: str,
-                 prefix: str,
-                 skip: Iterable = ()
-                 ) -> Iterator[str]:
-        """
-        List directory files
-
-        :param directory: Working directory
-        :param prefix: Files prefix
-        :return: Iterator over file names
-        """
-        for file_path in listdir(directory):
-            file_path = path.join(directory, file_path)
-            if path.isdir(file_path):
-                yield from cls._listdir(file_path, prefix, skip)
-                continue
-
-            file_path = file_path.replace(prefix, '')
-
-            if skip:
-                need_skip = False
-                for skip_pattern in skip:
-                    if re.match(skip_pattern, file_path):
-                        need_skip = True
-                        break
-
-                if need_skip:
-                    continue
+        # Directories created by the last build
+        self.directory_plan: Optional[DirectoryPlan] = None
+        # Files statuses of the last incremental build
+        self.report: Optional[BuildReport] = None
 
-            yield file_path
+        self._lock: Optional[Lock] = None
 
     @classmethod
-    def _iterate_project_files(cls,
-                               skip: Iterable = (),
-                               ) -> Iterator[str]:
+    def _get_index(cls
+                   ) -> TemplateIndex:
         """
-        Iterate project files
-
-        :return: Iterator over template project file names
+        :return: Template project index
         """
-        return cls._listdir(TEMPLATE_PROJECT_DIR,
-                            path.join(TEMPLATE_PROJECT_DIR, ''),
-                            skip)
+        return get_template_index(TEMPLATE_PROJECT_DIR, cls.template_postfix)
 
     @classmethod
-    def _check_template(cls,
-                        file_path: str
-                        ) -> bool:
+    def _get_dependency_graph(cls
+                              ) -> DependencyGraph:
         """
-        Checking that the file is a template
-
-        :param file_path: File path
-        :return: Is file a template or not
+        :return: Config field dependencies of the templates
         """
-        return file_path.endswith(cls.template_postfix)
+        return get_dependency_graph(TEMPLATE_PROJECT_DIR,
+                                    cls.template_postfix)
 
     def _handle_template(self,
                          template_path: str
@@ -170,12 +527,85 @@ class Builder:
 
         :param template_path: Template path
         """
-        template = env.get_template(template_path)
+        target_path = template_path[:-len(self.template_postfix)]
+
+        if (self.render_cache is not None
+                or self.partial is not None
+                # Streamed templates are never held in memory whole
+                or (not self.stream
+                    and get_plain_template(TEMPLATE_PROJECT_DIR,
+                                           template_path) is not None)):
+            content = self._render_text(template_path)
+            with self.sink.open(target_path) as f:
+                f.write(content)
+            return
+
+        template = get_environment(
+            self.template_cache
+        ).get_template(template_path)
+
+        with self.sink.open(
+                target_path,
+                buffering=self.stream_buffer_size if self.stream else -1
+        ) as f:
+            self._render(template, f)
+
+    def _render_text(self,
+                     template_path: str
+                     ) -> str:
+        """
+        Render the template into a string (plain templates are filled
+        in directly, others go through the render cache and the
+        specialized templates)
+
+        :param template_path: Template path
+        :return: Rendered template
+        """
+        context = self.config.get_context()
+
+        plain = get_plain_template(TEMPLATE_PROJECT_DIR, template_path)
+        if plain is not None:
+            return plain.render(context)
+
+        environment = get_environment(self.template_cache)
+
+        def render() -> str:
+            if self.partial is None:
+                return environment.get_template(template_path).render(
+                    context
+                )
+            return self.partial.render(
+                template_path,
+                context,
+                lambda: environment.get_template(template_path),
+            )
+
+        if self.render_cache is None:
+            return render()
 
-        template_path = template_path[:-len(self.template_postfix)]
+        return self.render_cache.render(
+            TEMPLATE_PROJECT_DIR,
+            template_path,
+            context,
+            render,
+        )
+
+    def _render(self,
+                template: 'Template',
+                f: TextIO
+                ) -> None:
+        """
+        Render the template into the file
+
+        :param template: Template
+        :param f: Output file
+        """
+        context = self.config.get_context()
 
-        with open(path.join(self.base_dir, template_path), mode='w') as f:
-            f.write(template.render(self.config.get_context()))
+        if self.stream:
+            f.writelines(template.generate(context))
+        else:
+            f.write(template.render(context))
 
     def _handle_file(self,
                      file_path: str
@@ -185,52 +615,625 @@ class Builder:
 
         :param file_path: File path
         """
-        copyfile(path.join(TEMPLATE_PROJECT_DIR, file_path),
-                 path.join(self.base_dir, file_path))
+        self.sink.copy(path.join(TEMPLATE_PROJECT_DIR, file_path),
+                       file_path,
+                       self.materialize)
 
-    def build(self
-              ) -> None:
+    def _get_skip_reasons(self
+                          ) -> Dict[SkipRule, str]:
         """
-        Build the project
+        :return: Skip rules for the project config with their reasons
         """
-        if not path.exists(self.base_dir):
-            makedirs(self.base_dir)
-
-        src_dir = path.join(self.base_dir, 'src', self.config.name)
-        if not path.exists(src_dir):
-            makedirs(src_dir)
-            with open(path.join(src_dir, '__init__.py'), mode='w'):
-                pass
-
-        skip = []
+        skip = {}
 
         if not self.config.docs:
-            skip.append('docs/')
+            skip[directory('docs')] = 'docs disabled'
 
         if not self.config.coverage:
-            skip.append('.coveragerc')
+            skip[exact('.coveragerc')] = 'coverage disabled'
 
         if not self.config.flake8:
-            skip.append('.flake8')
+            skip[exact('.flake8')] = 'flake8 disabled'
 
         if not self.config.isort:
-            skip.append('.isort.cfg')
+            skip[exact('.isort.cfg')] = 'isort disabled'
 
         if not self.config.mypy:
-            skip.append('mypy.ini')
+            skip[exact('mypy.ini')] = 'mypy disabled'
 
         if not self.config.pylint:
-            skip.append('.pylintrc')
+            skip[exact('.pylintrc')] = 'pylint disabled'
 
-        for file_path in self._iterate_project_files(skip=skip):
-            is_template = self._check_template(file_path)
+        return skip
 
-            dirname = path.join(self.base_dir, path.dirname(file_path))
+    def _make_package(self,
+                      package: str
+                      ) -> None:
+        """
+        Create the project package
+
+        :param package: Package directory
+        """
+        try:
+            self.sink.makedirs(package, exist_ok=False)
+        except FileExistsError:
+            return
 
-            if not path.exists(dirname):
-                makedirs(dirname)
+        with self.sink.open(f'{package}/__init__.py'):
+            pass
 
-            if is_template:
-                self._handle_template(file_path)
+    def _measure(self,
+                 kind: str,
+                 target: str = ''
+                 ) -> ContextManager[None]:
+        """
+        :param kind: Build step kind
+        :param target: Project path the step works on
+        :return: Profiler measurement of the step (if profiling is on)
+        """
+        if self.profiler is None:
+            return _no_measure()
+        return self.profiler.measure(kind, target)
+
+    def _make_dirs(self,
+                   actions: List[Action]
+                   ) -> DirectoryPlan:
+        """
+        Create all the project directories, each one exactly once
+
+        :param actions: Build plan
+        :return: Directory plan
+        """
+        for action in actions:
+            if action.kind == MKDIR:
+                with self._measure(action.kind, action.target):
+                    self.sink.makedirs(action.target)
+            elif action.kind == PACKAGE:
+                with self._measure(action.kind, action.target):
+                    self._make_package(action.target)
+
+        return get_directory_plan(actions)
+
+    def _handle(self,
+                template_file: TemplateFile
+                ) -> None:
+        """
+        Handle template project file
+
+        :param template_file: Template project file
+        """
+        kind = RENDER if template_file.is_template else COPY_ACTION
+
+        with self._measure(kind, template_file.target):
+            if self._lock is not None:
+                self._handle_incremental(template_file)
+            elif template_file.is_template:
+                self._handle_template(template_file.path)
+            else:
+                self._handle_file(template_file.path)
+
+    def _handle_rendered(self,
+                         template_file: TemplateFile,
+                         content: str
+                         ) -> None:
+        """
+        Write the template rendered elsewhere (e.g. by a matrix build)
+
+        :param template_file: Template project file
+        :param content: Rendered template
+        """
+        with self._measure(RENDER, template_file.target):
+            if self._lock is not None:
+                self._handle_incremental(template_file, content)
+            else:
+                with self.sink.open(template_file.target) as f:
+                    f.write(content)
+
+    def _handle_incremental(self,
+                            template_file: TemplateFile,
+                            content: Optional[str] = None
+                            ) -> None:
+        """
+        Handle template project file writing it only if it was changed
+
+        :param template_file: Template project file
+        :param content: Rendered template (rendered here if None)
+        """
+        assert self._lock is not None and self.report is not None
+
+        full_path = path.join(self.base_dir, template_file.target)
+
+        if template_file.is_template:
+            if content is None:
+                content = self._render_text(template_file.path)
+            digest = hash_bytes(content.encode('utf-8'))
+        else:
+            digest = hash_file(path.join(TEMPLATE_PROJECT_DIR,
+                                         template_file.path))
+
+        status = self._lock.compare(template_file.target, full_path, digest,
+                                    text=template_file.is_template)
+
+        if status != UNCHANGED:
+            if template_file.is_template:
+                assert content is not None
+                with self.sink.open(template_file.target) as f:
+                    f.write(content)
             else:
-                self._handle_file(file_path)
+                self._handle_file(template_file.path)
+
+        self._lock.record(template_file.target, full_path, digest)
+        self.report.add(status, template_file.target)
+
+    def _prepare(self,
+                 actions: List[Action]
+                 ) -> None:
+        """
+        Prepare the build: create directories, load the lock file
+
+        :param actions: Build plan
+        """
+        self.directory_plan = self._make_dirs(actions)
+
+        if self.incremental:
+            self._lock = Lock(self.base_dir).load()
+            self.report = BuildReport.empty()
+
+    def _finish(self
+                ) -> None:
+        """
+        Finish the build: save the lock file
+        """
+        if self._lock is not None:
+            self._lock.save()
+            self._lock = None
+
+    def plan(self,
+             files: Optional[TemplateIndex] = None
+             ) -> List[Action]:
+        """
+        Plan the build without touching the project directory
+
+        :param files: Template project index (the package one by default)
+        :return: Build plan (see :mod:`blank_project.plan`)
+        """
+        with self._measure('plan'):
+            return plan_build(
+                self._get_index() if files is None else files,
+                self._get_skip_reasons(),
+                f'src/{self.config.name}',
+            )
+
+    def plan_update(self,
+                    previous: Config,
+                    files: Optional[TemplateIndex] = None
+                    ) -> List[Action]:
+        """
+        Plan the update of a project built with the previous config:
+        only files affected by the changed config fields are written
+
+        :param previous: Config of the previous build
+        :param files: Template project index (the package one by default)
+        :return: Build plan (see :func:`blank_project.plan.plan_update`)
+        """
+        if files is None:
+            files = self._get_index()
+
+        with self._measure('plan'):
+            affected = self._get_dependency_graph().affected(
+                get_changed_fields(previous.get_context(),
+                                   self.config.get_context())
+            )
+
+        return plan_update(
+            self.plan(files),
+            type(self)(self.base_dir, previous).plan(files),
+            affected,
+        )
+
+    @staticmethod
+    def _get_files(actions: Iterable[Action]
+                   ) -> List[TemplateFile]:
+        """
+        :param actions: Build plan
+        :return: Template project files to write
+        """
+        return [action.template_file
+                for action in actions
+                if action.kind in FILE_ACTIONS]
+
+    def execute(self,
+                actions: List[Action]
+                ) -> None:
+        """
+        Execute the build plan
+
+        :param actions: Build plan
+        """
+        self._prepare(actions)
+
+        for template_file in self._get_files(actions):
+            self._handle(template_file)
+
+        self._finish()
+
+    def build(self
+              ) -> None:
+        """
+        Build the project
+        """
+        with self._measure('build'):
+            self.execute(self.plan())
+
+    def update(self,
+               previous: Config
+               ) -> None:
+        """
+        Update the project built with the previous config, files not
+        affected by the config change are neither rendered nor written
+
+        Files the new config doesn't need anymore are left in place.
+
+        :param previous: Config of the previous build
+        """
+        with self._measure('build'):
+            self.execute(self.plan_update(previous))
+
+    async def abuild(self,
+                     concurrency: int = 8,
+                     executor: Optional['Executor'] = None
+                     ) -> None:
+        """
+        Build the project asynchronously
+
+        All directories are created first, then files are written
+        concurrently in the executor.
+
+        :param concurrency: Max number of files written at the same time
+        :param executor: Executor for the blocking file operations
+                         (thread pool with ``concurrency`` workers
+                         by default)
+        """
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+
+        loop = asyncio.get_event_loop()
+
+        with self._measure('build'):
+            actions = self.plan()
+            files = self._get_files(actions)
+
+            own_executor = executor is None
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=concurrency)
+
+            async def run(function: Callable[..., None],
+                          *args: Any) -> None:
+                written = await loop.run_in_executor(
+                    executor, self._call_counted, function, *args
+                )
+                if self.profiler is not None:
+                    # Build event counts the bytes of the executor threads
+                    self.profiler.add_written(written)
+
+            try:
+                await run(self._prepare, actions)
+
+                semaphore = asyncio.Semaphore(concurrency)
+
+                async def handle(template_file: TemplateFile) -> None:
+                    async with semaphore:
+                        await run(self._handle, template_file)
+
+                results = await asyncio.gather(
+                    *(handle(template_file) for template_file in files),
+                    return_exceptions=True
+                )
+            finally:
+                if own_executor:
+                    executor.shutdown(wait=False)
+
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+
+            self._finish()
+
+    def _call_counted(self,
+                      function: Callable[..., None],
+                      *args: Any
+                      ) -> int:
+        """
+        Call the build step (e.g. in an executor thread)
+
+        :param function: Build step
+        :param args: Build step arguments
+        :return: Bytes written by the step in the calling thread
+                 (0 if profiling is off)
+        """
+        if self.profiler is None:
+            function(*args)
+            return 0
+
+        written = self.profiler.get_written()
+        function(*args)
+        return self.profiler.get_written() - written
+
+    @classmethod
+    def _warm_up(cls,
+                 template_cache: Optional[str] = None
+                 ) -> TemplateIndex:
+        """
+        Index the template project and compile all templates
+
+        :param template_cache: Template cache kind
+        :return: Template project index
+        """
+        files = cls._get_index()
+        environment = get_environment(template_cache)
+
+        for template_file in files:
+            if template_file.is_template:
+                environment.get_template(template_file.path)
+
+        return files
+
+    @classmethod
+    def _build_project(cls,
+                       base_dir: str,
+                       config: Config,
+                       files: TemplateIndex,
+                       options: Dict[str, Any]
+                       ) -> BuildResult:
+        """
+        Build one project of the batch
+
+        :param base_dir: Project directory
+        :param config: Project config
+        :param files: Template project index
+        :param options: Builder options
+        :return: Build result
+        """
+        builder = cls(base_dir, config, **options)
+        error = None
+        start = perf_counter()
+
+        try:
+            with builder._measure('build'):
+                builder.execute(builder.plan(files))
+        except Exception as e:
+            error = e
+
+        return BuildResult(base_dir=base_dir,
+                           name=config.name,
+                           duration=perf_counter() - start,
+                           error=error)
+
+    @classmethod
+    def _build_in_worker(cls,
+                         base_dir: str,
+                         config: Config,
+                         batch_id: int,
+                         batch: Optional[_Batch] = None
+                         ) -> _WorkerResult:
+        """
+        Build one project of the batch in a pool worker
+
+        :param base_dir: Project directory
+        :param config: Project config
+        :param batch_id: Batch inherited from the parent process
+        :param batch: Template project index and builder options
+                      (None if inherited)
+        :return: Build result, the counters of the shared options
+                 (e.g. partial) gained by the build and the profiler
+                 events of the build
+        """
+        files, options = _batches[batch_id] if batch is None else batch
+
+        counted = {name: options[name] for name in _COUNTED_OPTIONS
+                   if options.get(name) is not None}
+        before = {name: {counter: getattr(owner, counter)
+                         for counter in owner.counters}
+                  for name, owner in counted.items()}
+
+        profiler = options.get('profiler')
+        start = 0 if profiler is None else len(profiler.events)
+
+        result = cls._build_project(base_dir, config, files, options)
+
+        events = []
+        if profiler is not None:
+            # Worker copy of the profiler keeps nothing
+            events = profiler.events[start:]
+            del profiler.events[start:]
+
+        return result, {
+            name: {counter: getattr(owner, counter) - before[name][counter]
+                   for counter in owner.counters}
+            for name, owner in counted.items()
+        }, events
+
+    @classmethod
+    def build_matrix(cls,
+                     base_dir: str,
+                     axes: Mapping[str, Sequence[Any]],
+                     dir_format: Optional[str] = None,
+                     **options: Any
+                     ) -> MatrixStats:
+        """
+        Build a project for every combination of the config values
+
+        Every template is rendered once per distinct combination of the
+        config fields it reads (see :mod:`blank_project.matrix`), the
+        output is written to all the projects sharing the combination.
+        Static files are copied per project.
+
+        :param base_dir: Directory of the matrix projects
+        :param axes: Config param values by param name
+        :param dir_format: Project directory format string taking the
+                           config params (e.g. ``'{name}/py2-{python2}'``),
+                           by default made of the varying values
+        :param options: Builder options (streaming is off)
+        :return: Render stats
+        """
+        files = cls._warm_up(options.get('template_cache'))
+
+        builders = []
+        groups: Dict[Tuple, List[Tuple[Builder, TemplateFile]]] = {}
+        fields: Dict[str, Optional[FrozenSet[str]]] = {}
+
+        for params in iterate_matrix(axes):
+            dirname = (get_matrix_dir(params, axes) if dir_format is None
+                       else dir_format.format(**params))
+            builder = cls(path.join(base_dir, dirname), Config(**params),
+                          **options)
+            builders.append(builder)
+
+            actions = builder.plan(files)
+            builder._prepare(actions)
+            context = builder.config.get_context()
+
+            for template_file in cls._get_files(actions):
+                if not template_file.is_template:
+                    builder._handle(template_file)
+                    continue
+
+                if template_file.path not in fields:
+                    fields[template_file.path] = get_template_fields(
+                        TEMPLATE_PROJECT_DIR, template_file.path
+                    )
+                key = get_render_key(template_file.path,
+                                     fields[template_file.path],
+                                     context)
+                groups.setdefault(key, []).append((builder, template_file))
+
+        for (template_path, _), targets in groups.items():
+            content = targets[0][0]._render_text(template_path)
+            for builder, template_file in targets:
+                builder._handle_rendered(template_file, content)
+
+        for builder in builders:
+            builder._finish()
+
+        return MatrixStats(
+            projects=len(builders),
+            renders=sum(len(targets) for targets in groups.values()),
+            unique=len(groups),
+        )
+
+    @classmethod
+    def build_many(cls,
+                   projects: Iterable[Tuple[str, Config]],
+                   jobs: int = 1,
+                   threads: bool = False,
+                   **options: Any
+                   ) -> List[BuildResult]:
+        """
+        Build many projects in one go
+
+        Template project is listed and compiled once for all projects.
+        With several jobs projects are built in a process pool, workers
+        are forked after the warm up (where fork is available) or load
+        the precompiled template bundle. Forked workers inherit the
+        builder options once: the templates specialized for the batch
+        are prepared before forking, every worker keeps its render cache
+        between the projects, the counters and the profiler events of
+        the workers are added to the options of the caller. A thread
+        pool shares the compiled templates and the caches (e.g. render
+        cache) between the jobs, it suits the builds dominated by file
+        writes.
+        Failed project doesn't abort the rest of the batch.
+
+        :param projects: Pairs of project directory and project config
+        :param jobs: Number of workers
+        :param threads: Build in a thread pool instead of a process pool
+        :param options: Builder options (e.g. stream, incremental)
+        :return: Build results in the projects order
+        """
+        files = cls._warm_up(options.get('template_cache'))
+
+        if jobs <= 1:
+            return [cls._build_project(base_dir, config, files, options)
+                    for base_dir, config in projects]
+
+        if threads:
+            import functools
+            from concurrent.futures import ThreadPoolExecutor
+
+            projects = list(projects)
+            build = functools.partial(cls._build_project,
+                                      files=files, options=options)
+
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                return list(executor.map(
+                    build,
+                    [base_dir for base_dir, _ in projects],
+                    [config for _, config in projects],
+                ))
+
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        projects = list(projects)
+
+        partial = options.get('partial')
+        if partial is not None:
+            partial.prepare(
+                (template_file.path for template_file in files
+                 if template_file.is_template),
+                get_environment(options.get('template_cache')).get_template,
+            )
+
+        context: multiprocessing.context.BaseContext
+        if 'fork' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('fork')
+        else:  # pragma: no cover
+            context = multiprocessing.get_context()
+
+        workers = min(jobs, len(projects) or 1)
+        pool: ProcessPoolExecutor
+        if sys.version_info >= (3, 7):
+            pool = ProcessPoolExecutor(max_workers=workers,
+                                       mp_context=context)
+        else:  # pragma: no cover
+            # python 3.6 executor uses the default start method
+            # (fork on unix)
+            pool = ProcessPoolExecutor(max_workers=workers)
+
+        # Forked workers inherit the batch (with the templates specialized
+        # above) instead of unpickling the options for every project
+        batch_id = next(_batch_ids)
+        batch = (files, options)
+        inherit = context.get_start_method() == 'fork'
+
+        _batches[batch_id] = batch
+        try:
+            with pool as executor:
+                futures = [
+                    executor.submit(cls._build_in_worker, base_dir, config,
+                                    batch_id, None if inherit else batch)
+                    for base_dir, config in projects
+                ]
+
+                results = []
+
+                for (base_dir, config), future in zip(projects, futures):
+                    try:
+                        result, counts, events = future.result()
+                    except Exception as e:
+                        # Worker died or the result couldn't be pickled
+                        results.append(BuildResult(base_dir=base_dir,
+                                                   name=config.name,
+                                                   duration=0.0,
+                                                   error=e))
+                        continue
+
+                    for name, values in counts.items():
+                        options[name].add_counts(values)
+                    if events:
+                        options['profiler'].add_events(events)
+                    results.append(result)
+        finally:
+            del _batches[batch_id]
+
+        return results
@@ -0,0 +1,74 @@
+"""
+Static analysis of template sources.
+"""
+import hashlib
+from functools import lru_cache
+from os import path
+from typing import TYPE_CHECKING
+from typing import FrozenSet
+from typing import NamedTuple
+from typing import Optional
+
+
+if TYPE_CHECKING:
+    from jinja2 import Environment
+
+
+class TemplateInfo(NamedTuple):
+    """
+    Template source info
+
+    :param name: Template name
+    :param sha1: Template source digest
+    :param variables: Context variables referenced by the template
+    :param templates: Templates included, imported or extended by the
+                      template (None if some of them are only known
+                      at render time)
+    """
+    name: str
+    sha1: str
+    variables: FrozenSet[str]
+    templates: Optional[FrozenSet[str]] = frozenset()
+
+
+@lru_cache(maxsize=None)
+def get_parse_environment(
+        ) -> 'Environment':
+    """
+    :return: Environment used for parsing only, it never loads templates
+    """
+    from jinja2 import Environment
+
+    return Environment()
+
+
+@lru_cache(maxsize=None)
+def analyze_template(directory: str,
+                     name: str
+                     ) -> TemplateInfo:
+    """
+    Analyze the template source (once per process)
+
+    :param directory: Template directory
+    :param name: Template name
+    :return: Template info
+    """
+    from jinja2 import meta
+
+    with open(path.join(directory, name), mode='r', encoding='utf-8') as f:
+        source = f.read()
+
+    ast = get_parse_environment().parse(source)
+    refs = list(meta.find_referenced_templates(ast))
+
+    templates: Optional[FrozenSet[str]] = None
+    # Dynamic (not literal) references are None
+    if None not in refs:
+        templates = frozenset(ref for ref in refs if ref is not None)
+
+    return TemplateInfo(
+        name=name,
+        sha1=hashlib.sha1(source.encode('utf-8')).hexdigest(),
+        variables=frozenset(meta.find_undeclared_variables(ast)),
+        templates=templates,
+    )
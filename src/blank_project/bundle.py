@@ -0,0 +1,249 @@
+"""
+Precompiled template bundle.
+
+Templates are compiled to python modules once and loaded afterwards with
+:class:`jinja2.ModuleLoader`, so a fresh process doesn't lex, parse and
+compile template sources again.
+
+Bundle layout::
+
+    <bundle_root>/
+        current.json        # manifest of the active bundle
+        <digest>/           # compiled modules, never modified after creation
+            tmpl_<sha1>.py
+"""
+import hashlib
+import json
+import os
+from os import path
+from typing import TYPE_CHECKING
+from typing import Callable
+from typing import Dict
+from typing import Optional
+
+
+if TYPE_CHECKING:
+    from jinja2 import ModuleLoader
+
+
+MANIFEST_NAME = 'current.json'
+
+
+def get_cache_dir(
+        ) -> str:
+    """
+    :return: User cache directory for blank_project
+    """
+    cache_dir = os.environ.get('BLANK_PROJECT_CACHE_DIR')
+    if cache_dir:
+        return cache_dir
+
+    cache_home = (os.environ.get('XDG_CACHE_HOME')
+                  or path.join(path.expanduser('~'), '.cache'))
+    return path.join(cache_home, 'blank-project')
+
+
+def get_bundle_root(template_dir: str
+                    ) -> str:
+    """
+    Bundle directory for the template directory
+
+    Every installation (and jinja2 version) gets its own bundle root,
+    because compiled modules depend on both.
+
+    :param template_dir: Template directory
+    :return: Bundle root directory
+    """
+    from jinja2 import __version__ as jinja2_version
+
+    key = hashlib.sha1(
+        f'{path.abspath(template_dir)}:{jinja2_version}'.encode('utf-8')
+    ).hexdigest()[:16]
+    return path.join(get_cache_dir(), 'bundle', key)
+
+
+def _hash_file(file_path: str
+               ) -> str:
+    """
+    :param file_path: File path
+    :return: File content sha1 digest
+    """
+    with open(file_path, mode='rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _list_templates(template_dir: str,
+                    filter_func: Callable[[str], bool]
+                    ) -> Dict[str, os.stat_result]:
+    """
+    :param template_dir: Template directory
+    :param filter_func: Template name filter
+    :return: Template names (jinja2 loader style) with their stat results
+    """
+    from jinja2 import FileSystemLoader
+
+    templates = {}
+    for name in FileSystemLoader(template_dir).list_templates():
+        if filter_func(name):
+            templates[name] = os.stat(path.join(template_dir, name))
+    return templates
+
+
+def _read_manifest(bundle_root: str
+                   ) -> Optional[dict]:
+    """
+    :param bundle_root: Bundle root directory
+    :return: Active bundle manifest or None if there is no valid one
+    """
+    try:
+        with open(path.join(bundle_root, MANIFEST_NAME), mode='r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(manifest, dict) or 'templates' not in manifest:
+        return None
+
+    return manifest
+
+
+def is_bundle_fresh(template_dir: str,
+                    bundle_root: str,
+                    filter_func: Callable[[str], bool],
+                    manifest: Optional[dict] = None,
+                    ) -> bool:
+    """
+    Checking that the bundle matches the template sources
+
+    Template is considered unchanged when its mtime and size match the
+    manifest, otherwise its content hash is compared.
+
+    :param template_dir: Template directory
+    :param bundle_root: Bundle root directory
+    :param filter_func: Template name filter
+    :param manifest: Already loaded manifest
+    :return: Is bundle fresh or not
+    """
+    if manifest is None:
+        manifest = _read_manifest(bundle_root)
+
+    if manifest is None:
+        return False
+
+    if not path.isdir(path.join(bundle_root, manifest.get('digest', ''))):
+        return False
+
+    recorded = manifest['templates']
+    templates = _list_templates(template_dir, filter_func)
+
+    if set(templates) != set(recorded):
+        return False
+
+    for name, stat in templates.items():
+        entry = recorded[name]
+        if (entry['mtime_ns'] == stat.st_mtime_ns
+                and entry['size'] == stat.st_size):
+            continue
+
+        if entry['sha1'] != _hash_file(path.join(template_dir, name)):
+            return False
+
+    return True
+
+
+def compile_bundle(template_dir: str,
+                   bundle_root: str,
+                   filter_func: Callable[[str], bool],
+                   ) -> str:
+    """
+    Compile templates into the bundle and make it active
+
+    Compiled modules are written to a directory named after the digest of
+    all template sources, so concurrent processes never see a partially
+    written bundle.
+
+    :param template_dir: Template directory
+    :param bundle_root: Bundle root directory
+    :param filter_func: Template name filter
+    :return: Compiled modules directory
+    """
+    import shutil
+    import tempfile
+
+    from jinja2 import Environment
+    from jinja2 import FileSystemLoader
+
+    templates = {}
+    for name, stat in sorted(_list_templates(template_dir,
+                                             filter_func).items()):
+        templates[name] = {
+            'sha1': _hash_file(path.join(template_dir, name)),
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+        }
+
+    digest = hashlib.sha1(json.dumps(
+        {name: entry['sha1'] for name, entry in templates.items()},
+        sort_keys=True,
+    ).encode('utf-8')).hexdigest()
+
+    os.makedirs(bundle_root, exist_ok=True)
+    modules_dir = path.join(bundle_root, digest)
+
+    if not path.isdir(modules_dir):
+        tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=bundle_root)
+        try:
+            Environment(
+                loader=FileSystemLoader(template_dir),
+            ).compile_templates(
+                tmp_dir,
+                filter_func=filter_func,
+                zip=None,
+                ignore_errors=False,
+            )
+            os.rename(tmp_dir, modules_dir)
+        except OSError:
+            # Other process has already compiled the same bundle
+            if not path.isdir(modules_dir):
+                raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    fd, tmp_manifest = tempfile.mkstemp(prefix='.tmp-', dir=bundle_root)
+    try:
+        with os.fdopen(fd, mode='w') as f:
+            json.dump({'digest': digest, 'templates': templates}, f)
+        os.replace(tmp_manifest, path.join(bundle_root, MANIFEST_NAME))
+    except BaseException:
+        if path.exists(tmp_manifest):
+            os.remove(tmp_manifest)
+        raise
+
+    return modules_dir
+
+
+def get_bundle_loader(template_dir: str,
+                      bundle_root: str,
+                      filter_func: Callable[[str], bool],
+                      ) -> 'ModuleLoader':
+    """
+    Loader over the precompiled bundle
+
+    Bundle is recompiled if it is missing or any template was changed.
+
+    :param template_dir: Template directory
+    :param bundle_root: Bundle root directory
+    :param filter_func: Template name filter
+    :return: Module loader
+    """
+    from jinja2 import ModuleLoader
+
+    manifest = _read_manifest(bundle_root)
+
+    if manifest is not None and is_bundle_fresh(template_dir, bundle_root,
+                                                filter_func, manifest):
+        modules_dir = path.join(bundle_root, manifest['digest'])
+    else:
+        modules_dir = compile_bundle(template_dir, bundle_root, filter_func)
+
+    return ModuleLoader(modules_dir)
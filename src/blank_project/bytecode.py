@@ -0,0 +1,73 @@
+"""
+Template bytecode cache.
+
+When templates are loaded from sources (the bundle is disabled or can't
+be used) their compiled bytecode is cached in the user cache directory,
+so a new process doesn't compile the templates again.
+
+Entries are written to a temporary file and renamed, so processes sharing
+the cache never read a partially written entry. Stale entries (template
+changed, other python version) are rejected by jinja2 itself.
+"""
+import os
+from os import path
+
+from jinja2 import FileSystemBytecodeCache
+from jinja2.bccache import Bucket
+
+from blank_project.bundle import get_cache_dir
+
+
+def get_bytecode_cache_dir(
+        ) -> str:
+    """
+    :return: Bytecode cache directory
+    """
+    return path.join(get_cache_dir(), 'bytecode')
+
+
+class AtomicBytecodeCache(FileSystemBytecodeCache):
+    """
+    Filesystem bytecode cache safe for concurrent processes
+
+    Cache errors (e.g. read-only cache directory) are ignored, the
+    templates are compiled as if there was no cache.
+
+    :param directory: Cache directory
+    """
+    def __init__(self,
+                 directory: str
+                 ) -> None:
+        os.makedirs(directory, exist_ok=True)
+        super().__init__(directory, '%s.cache')
+
+    def load_bytecode(self,
+                      bucket: Bucket
+                      ) -> None:
+        try:
+            with open(self._get_cache_filename(bucket), mode='rb') as f:
+                bucket.load_bytecode(f)
+        except OSError:
+            pass
+
+    def dump_bytecode(self,
+                      bucket: Bucket
+                      ) -> None:
+        import tempfile
+
+        target = self._get_cache_filename(bucket)
+
+        try:
+            fd, tmp = tempfile.mkstemp(prefix='.tmp-', dir=self.directory)
+        except OSError:
+            return
+
+        try:
+            with os.fdopen(fd, mode='wb') as f:
+                bucket.write_bytecode(f)
+            os.replace(tmp, target)
+        except OSError:
+            pass
+        finally:
+            if path.exists(tmp):
+                os.remove(tmp)
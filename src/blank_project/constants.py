@@ -1,2 +1,14 @@
+from os import path
+
+
 DEFAULT_LINE_LENGTH = 79
 DEFAULT_COVERAGE = 0
+TEMPLATE_POSTFIX = '_template'
+TEMPLATE_PROJECT_DIR = path.join(path.dirname(path.abspath(__file__)),
+                                 'template')
+
+# Template caches: precompiled bundle, jinja2 bytecode cache or none
+BUNDLE_CACHE = 'bundle'
+BYTECODE_CACHE = 'bytecode'
+NO_CACHE = 'none'
+TEMPLATE_CACHES = (BUNDLE_CACHE, BYTECODE_CACHE, NO_CACHE)
@@ -0,0 +1,279 @@
+"""
+Build daemon.
+
+The daemon is a long-living process holding the template environment and
+the template project index, it builds projects requested over a Unix
+domain socket, so clients don't pay for the interpreter startup and the
+templates compilation.
+
+Protocol is one JSON object per line in both directions::
+
+    -> {"command": "build", "dir": "...", "config": {...}, "options": {...}}
+    <- {"ok": true, "duration": 0.01, "files": [["written", "setup.py"]]}
+
+``config`` holds :class:`blank_project.Config` arguments, ``options``
+holds :class:`blank_project.Builder` options (``stream``, ``materialize``,
+``incremental``, ``template_cache``). ``ping`` and ``shutdown`` commands
+are supported too.
+"""
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+from os import path
+from time import perf_counter
+from typing import Any
+from typing import Dict
+from typing import Optional
+
+from blank_project import Builder
+from blank_project import Config
+from blank_project.bundle import get_cache_dir
+from blank_project.plan import FILE_ACTIONS
+
+
+SOCKET_NAME = 'daemon.sock'
+
+# Status of files written by a non incremental build
+WRITTEN = 'written'
+
+BUILD = 'build'
+PING = 'ping'
+SHUTDOWN = 'shutdown'
+
+# Builder options accepted from clients
+OPTIONS = frozenset(('stream', 'materialize', 'incremental',
+                     'template_cache'))
+
+
+def get_socket_path(
+        ) -> str:
+    """
+    :return: Daemon socket path (BLANK_PROJECT_SOCKET or the user cache)
+    """
+    return (os.environ.get('BLANK_PROJECT_SOCKET')
+            or path.join(get_cache_dir(), SOCKET_NAME))
+
+
+def build_project(base_dir: str,
+                  params: Dict[str, Any],
+                  options: Optional[Dict[str, Any]] = None
+                  ) -> Dict[str, Any]:
+    """
+    Build the project in the current process
+
+    :param base_dir: Project directory
+    :param params: Project config arguments
+    :param options: Builder options
+    :return: Build response (see the module docs)
+    """
+    options = dict(options or {})
+    unknown = set(options) - OPTIONS
+    if unknown:
+        raise ValueError(f'Unknown builder options: {sorted(unknown)}')
+
+    start = perf_counter()
+
+    try:
+        builder = Builder(base_dir, Config(**params), **options)
+        actions = builder.plan()
+        builder.execute(actions)
+    except Exception as e:
+        return {
+            'ok': False,
+            'duration': perf_counter() - start,
+            'error': repr(e),
+        }
+
+    if builder.report is not None:
+        results = [
+            [status, file_path]
+            for status in builder.report._fields
+            for file_path in getattr(builder.report, status)
+        ]
+    else:
+        results = [[WRITTEN, action.target]
+                   for action in actions
+                   if action.kind in FILE_ACTIONS]
+
+    return {
+        'ok': True,
+        'duration': perf_counter() - start,
+        'files': results,
+    }
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """
+    Daemon connection handler, one request per connection
+    """
+    def handle(self
+               ) -> None:
+        try:
+            message = json.loads(self.rfile.readline())
+            response = self.server.dispatch(message)  # type: ignore
+        except (ValueError, TypeError, KeyError) as e:
+            response = {'ok': False, 'error': repr(e)}
+
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Build daemon server
+
+    Templates are indexed and compiled before the server starts accepting
+    connections. Each connection is handled in its own thread.
+
+    :param socket_path: Socket path
+    """
+    daemon_threads = True
+
+    def __init__(self,
+                 socket_path: str
+                 ) -> None:
+        Builder._warm_up()
+
+        self.socket_path = socket_path
+        _remove_stale_socket(socket_path)
+        super().__init__(socket_path, _Handler)
+
+    def dispatch(self,
+                 message: Any
+                 ) -> Dict[str, Any]:
+        """
+        :param message: Client request (decoded JSON)
+        :return: Response
+        """
+        if not isinstance(message, dict):
+            raise ValueError('Request must be a JSON object')
+
+        command = message.get('command', BUILD)
+
+        if command == PING:
+            return {'ok': True, 'pid': os.getpid()}
+
+        if command == SHUTDOWN:
+            # shutdown() waits for serve_forever(), which runs this handler
+            threading.Thread(target=self.shutdown).start()
+            return {'ok': True}
+
+        if command == BUILD:
+            return build_project(message['dir'], message['config'],
+                                 message.get('options'))
+
+        raise ValueError(f'Unknown command: {command!r}')
+
+    def server_close(self
+                     ) -> None:
+        super().server_close()
+        try:
+            os.remove(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+
+def _remove_stale_socket(socket_path: str
+                         ) -> None:
+    """
+    Remove the socket file left by a dead daemon
+
+    :param socket_path: Socket path
+    """
+    if not path.exists(socket_path):
+        os.makedirs(path.dirname(socket_path) or '.', exist_ok=True)
+        return
+
+    try:
+        request({'command': PING}, socket_path)
+    except OSError:
+        os.remove(socket_path)
+    else:
+        raise ValueError(f'Daemon is already running on {socket_path}')
+
+
+def serve(socket_path: Optional[str] = None
+          ) -> None:
+    """
+    Run the daemon until it is interrupted or asked to shut down
+
+    :param socket_path: Socket path (see :func:`get_socket_path`)
+    """
+    def terminate(signum: int, frame: Any) -> None:
+        raise KeyboardInterrupt
+
+    # Socket file is removed on SIGTERM as well
+    signal.signal(signal.SIGTERM, terminate)
+
+    with Server(socket_path or get_socket_path()) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def request(message: Dict[str, Any],
+            socket_path: Optional[str] = None,
+            timeout: Optional[float] = None
+            ) -> Dict[str, Any]:
+    """
+    Send the request to the daemon
+
+    :param message: Request
+    :param socket_path: Socket path (see :func:`get_socket_path`)
+    :param timeout: Socket timeout in seconds
+    :return: Response
+    :raises OSError: If there is no running daemon (FileNotFoundError or
+                     ConnectionRefusedError) or the connection failed
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path or get_socket_path())
+        sock.sendall(json.dumps(message).encode('utf-8') + b'\n')
+
+        with sock.makefile('rb') as f:
+            line = f.readline()
+
+    if not line:
+        raise ConnectionError('Daemon closed the connection')
+
+    return json.loads(line)
+
+
+def build(base_dir: str,
+          params: Dict[str, Any],
+          socket_path: Optional[str] = None,
+          **options: Any
+          ) -> Dict[str, Any]:
+    """
+    Build the project in the daemon, or in the current process if there
+    is no running daemon
+
+    :param base_dir: Project directory
+    :param params: Project config arguments
+    :param socket_path: Socket path (see :func:`get_socket_path`)
+    :param options: Builder options
+    :return: Build response, ``daemon`` tells where the project was built
+             (failed response if the daemon dropped the connection)
+    """
+    message = {
+        'command': BUILD,
+        'dir': path.abspath(base_dir),
+        'config': params,
+        'options': options,
+    }
+
+    try:
+        response = request(message, socket_path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        response = build_project(base_dir, params, options)
+        response['daemon'] = False
+    except ConnectionError as e:
+        # Daemon died or dropped the request, the project may be half built
+        response = {'ok': False, 'error': repr(e), 'daemon': True}
+    else:
+        response['daemon'] = True
+
+    return response
@@ -0,0 +1,161 @@
+"""
+Config field dependencies of the template project.
+
+Every template is analyzed once (see :mod:`blank_project.analysis`) and
+the context fields it reads are mapped to the template::
+
+    graph = get_dependency_graph(TEMPLATE_PROJECT_DIR, '_template')
+    graph.affected({'line_length'})
+    # frozenset({'.flake8_template', 'setup.py_template', ...})
+
+So when a project config changes only the templates reading the changed
+fields have to be rendered again.
+"""
+from functools import lru_cache
+from typing import Dict
+from typing import FrozenSet
+from typing import Iterable
+from typing import List
+from typing import Mapping
+from typing import NamedTuple
+from typing import Optional
+from typing import Set
+
+from blank_project.analysis import TemplateInfo
+from blank_project.analysis import analyze_template
+from blank_project.index import get_template_index
+
+
+class DependencyGraph(NamedTuple):
+    """
+    Config field dependencies
+
+    :param fields: Templates by the context field they read
+    :param dynamic: Templates whose dependencies are only known at render
+                    time (they are affected by any change)
+    """
+    fields: Mapping[str, FrozenSet[str]]
+    dynamic: FrozenSet[str]
+
+    def affected(self,
+                 changed: Iterable[str]
+                 ) -> FrozenSet[str]:
+        """
+        :param changed: Changed context fields
+        :return: Templates whose output may change
+        """
+        changed = set(changed)
+        if not changed:
+            return frozenset()
+
+        affected = set(self.dynamic)
+        for field in changed:
+            affected.update(self.fields.get(field, ()))
+        return frozenset(affected)
+
+
+def _get_references(directory: str,
+                    name: str
+                    ) -> Optional[List[TemplateInfo]]:
+    """
+    :param directory: Template directory
+    :param name: Template name
+    :return: Infos of the template and the templates it references (None
+             if some of them are only known at render time)
+    """
+    infos = []
+    seen = {name}
+    stack = [name]
+
+    while stack:
+        info = analyze_template(directory, stack.pop())
+        if info.templates is None:
+            return None
+
+        infos.append(info)
+        for template in info.templates - seen:
+            seen.add(template)
+            stack.append(template)
+
+    return infos
+
+
+def get_template_fields(directory: str,
+                        name: str
+                        ) -> Optional[FrozenSet[str]]:
+    """
+    Context fields read by the template and the templates it references
+
+    :param directory: Template directory
+    :param name: Template name
+    :return: Context fields (None if they can't be known statically)
+    """
+    infos = _get_references(directory, name)
+    if infos is None:
+        return None
+
+    return frozenset(field for info in infos for field in info.variables)
+
+
+def get_template_digests(directory: str,
+                         name: str
+                         ) -> Optional[Dict[str, str]]:
+    """
+    Source digests of the template and the templates it references
+
+    :param directory: Template directory
+    :param name: Template name
+    :return: Source digests by the template name (None if the referenced
+             templates can't be known statically)
+    """
+    infos = _get_references(directory, name)
+    if infos is None:
+        return None
+
+    return {info.name: info.sha1 for info in infos}
+
+
+@lru_cache(maxsize=None)
+def get_dependency_graph(directory: str,
+                         postfix: str
+                         ) -> DependencyGraph:
+    """
+    Dependency graph of the template project (once per process)
+
+    :param directory: Template directory
+    :param postfix: Template files postfix
+    :return: Dependency graph
+    """
+    fields: Dict[str, Set[str]] = {}
+    dynamic = set()
+
+    for template_file in get_template_index(directory, postfix):
+        if not template_file.is_template:
+            continue
+
+        template_fields = get_template_fields(directory, template_file.path)
+        if template_fields is None:
+            dynamic.add(template_file.path)
+            continue
+
+        for field in template_fields:
+            fields.setdefault(field, set()).add(template_file.path)
+
+    return DependencyGraph(
+        fields={field: frozenset(paths) for field, paths in fields.items()},
+        dynamic=frozenset(dynamic),
+    )
+
+
+def get_changed_fields(old: Mapping,
+                       new: Mapping
+                       ) -> FrozenSet[str]:
+    """
+    :param old: Previous template context
+    :param new: New template context
+    :return: Context fields with different values
+    """
+    return frozenset(
+        field for field in set(old) | set(new)
+        if field not in old or field not in new or old[field] != new[field]
+    )
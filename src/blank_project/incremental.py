@@ -0,0 +1,208 @@
+"""
+Incremental builds.
+
+Incremental build writes only files whose content differs from the
+project files. Content hashes of the written files are kept in the
+project lock file (:data:`LOCK_NAME`): a file whose hash, mtime and size
+match its lock entry is not read again.
+"""
+import hashlib
+import json
+import os
+from os import path
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+
+
+LOCK_NAME = '.blank-project.lock'
+LOCK_VERSION = 1
+
+NEW = 'new'
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+
+
+class BuildReport(NamedTuple):
+    """
+    Incremental build report (project file paths by status)
+
+    :param new: Created files
+    :param updated: Rewritten files
+    :param unchanged: Files left untouched
+    """
+    new: List[str]
+    updated: List[str]
+    unchanged: List[str]
+
+    @classmethod
+    def empty(cls
+              ) -> 'BuildReport':
+        """
+        :return: Empty report
+        """
+        return cls(new=[], updated=[], unchanged=[])
+
+    def add(self,
+            status: str,
+            file_path: str
+            ) -> None:
+        """
+        :param status: File status (new, updated or unchanged)
+        :param file_path: Project file path
+        """
+        getattr(self, status).append(file_path)
+
+
+class LockEntry(NamedTuple):
+    """
+    Lock file entry
+
+    :param sha256: Content hash
+    :param mtime_ns: File mtime
+    :param size: File size
+    """
+    sha256: str
+    mtime_ns: int
+    size: int
+
+
+def hash_bytes(content: bytes
+               ) -> str:
+    """
+    :param content: Content
+    :return: Content hash
+    """
+    return hashlib.sha256(content).hexdigest()
+
+
+def hash_file(file_path: str,
+              text: bool = False
+              ) -> str:
+    """
+    :param file_path: File path
+    :param text: Hash decoded text (utf-8 encoded) instead of raw bytes
+    :return: File content hash
+    """
+    if text:
+        with open(file_path, mode='r') as f:
+            return hash_bytes(f.read().encode('utf-8'))
+
+    digest = hashlib.sha256()
+    with open(file_path, mode='rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Lock:
+    """
+    Project lock file
+
+    :param base_dir: Project directory
+    """
+    def __init__(self,
+                 base_dir: str
+                 ) -> None:
+        self.path = path.join(base_dir, LOCK_NAME)
+        self.entries: Dict[str, LockEntry] = {}
+
+    def load(self
+             ) -> 'Lock':
+        """
+        Load the lock file, missing or broken lock file is ignored
+
+        :return: Lock
+        """
+        try:
+            with open(self.path, mode='r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            if data.get('version') == LOCK_VERSION:
+                self.entries = {
+                    file_path: LockEntry(**entry)
+                    for file_path, entry in data['files'].items()
+                }
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            self.entries = {}
+
+        return self
+
+    def save(self
+             ) -> None:
+        """
+        Atomically write the lock file
+        """
+        data = {
+            'version': LOCK_VERSION,
+            'files': {
+                file_path: entry._asdict()
+                for file_path, entry in sorted(self.entries.items())
+            },
+        }
+
+        import tempfile
+
+        fd, tmp = tempfile.mkstemp(prefix='.tmp-',
+                                   dir=path.dirname(self.path))
+        try:
+            with os.fdopen(fd, mode='w', encoding='utf-8') as f:
+                json.dump(data, f, indent=1)
+                f.write('\n')
+            os.replace(tmp, self.path)
+        except BaseException:
+            if path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def record(self,
+               file_path: str,
+               full_path: str,
+               digest: str
+               ) -> None:
+        """
+        Record the file state
+
+        :param file_path: Project file path
+        :param full_path: File path on disk
+        :param digest: File content hash
+        """
+        stat = os.stat(full_path)
+        self.entries[file_path] = LockEntry(sha256=digest,
+                                            mtime_ns=stat.st_mtime_ns,
+                                            size=stat.st_size)
+
+    def compare(self,
+                file_path: str,
+                full_path: str,
+                digest: str,
+                text: bool = False
+                ) -> str:
+        """
+        Compare the file on disk with the new content
+
+        :param file_path: Project file path
+        :param full_path: File path on disk
+        :param digest: New content hash
+        :param text: Compare decoded text (see :func:`hash_file`)
+        :return: File status (new, updated or unchanged)
+        """
+        try:
+            stat = os.stat(full_path)
+        except FileNotFoundError:
+            return NEW
+
+        entry: Optional[LockEntry] = self.entries.get(file_path)
+
+        if (entry is not None
+                and entry.mtime_ns == stat.st_mtime_ns
+                and entry.size == stat.st_size):
+            return UNCHANGED if entry.sha256 == digest else UPDATED
+
+        try:
+            current = hash_file(full_path, text=text)
+        except (OSError, UnicodeDecodeError):
+            return UPDATED
+
+        return UNCHANGED if current == digest else UPDATED
@@ -0,0 +1,119 @@
+"""
+Template project file index.
+
+Template project is scanned once per process, builds filter the
+in-memory index instead of walking the template directory again.
+"""
+import os
+from functools import lru_cache
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import Sequence
+from typing import Tuple
+
+
+class TemplateFile(NamedTuple):
+    """
+    Template project file
+
+    :param path: Path relative to the template directory ('/' separated)
+    :param target: Project file path (without the template postfix)
+    :param is_template: Is file a template or not
+    :param size: File size in bytes
+    """
+    path: str
+    target: str
+    is_template: bool
+    size: int
+
+
+class TemplateIndex(Sequence[TemplateFile]):
+    """
+    Immutable template project index
+
+    :param files: Template project files
+    """
+    __slots__ = ('files', 'paths')
+
+    def __init__(self,
+                 files: Sequence[TemplateFile]
+                 ) -> None:
+        self.files: Tuple[TemplateFile, ...] = tuple(sorted(files))
+        self.paths: Tuple[str, ...] = tuple(f.path for f in self.files)
+
+    def __getitem__(self, index):  # type: ignore
+        return self.files[index]
+
+    def __len__(self
+                ) -> int:
+        return len(self.files)
+
+    def __iter__(self
+                 ) -> Iterator[TemplateFile]:
+        return iter(self.files)
+
+    def __eq__(self,
+               other: object
+               ) -> bool:
+        if isinstance(other, TemplateIndex):
+            return self.files == other.files
+        return NotImplemented
+
+    def __hash__(self
+                 ) -> int:
+        return hash(self.files)
+
+    def __repr__(self
+                 ) -> str:
+        return f'{type(self).__name__}({list(self.files)!r})'
+
+
+def scan_template_dir(directory: str,
+                      postfix: str
+                      ) -> TemplateIndex:
+    """
+    Scan the template directory
+
+    :param directory: Template directory
+    :param postfix: Template files postfix
+    :return: Template project index
+    """
+    files: List[TemplateFile] = []
+    stack = [(directory, '')]
+
+    while stack:
+        current, prefix = stack.pop()
+
+        with os.scandir(current) as entries:
+            for entry in entries:
+                relative = prefix + entry.name
+
+                if entry.is_dir():
+                    stack.append((entry.path, relative + '/'))
+                    continue
+
+                is_template = relative.endswith(postfix)
+                files.append(TemplateFile(
+                    path=relative,
+                    target=(relative[:-len(postfix)] if is_template
+                            else relative),
+                    is_template=is_template,
+                    size=entry.stat().st_size,
+                ))
+
+    return TemplateIndex(files)
+
+
+@lru_cache(maxsize=None)
+def get_template_index(directory: str,
+                       postfix: str
+                       ) -> TemplateIndex:
+    """
+    Cached template project index
+
+    :param directory: Template directory
+    :param postfix: Template files postfix
+    :return: Template project index
+    """
+    return scan_template_dir(directory, postfix)
@@ -0,0 +1,206 @@
+"""
+Batch manifest loading.
+
+Manifest is a list of projects, every project has ``Config`` params and
+an optional ``dir`` (project directory, defaults to the project name).
+
+JSON::
+
+    [{"dir": "services/foo", "name": "foo", "author": "author"}]
+
+CSV (header row with param names)::
+
+    dir,name,author,line_length
+    services/foo,foo,author,120
+
+TOML::
+
+    [[projects]]
+    dir = "services/foo"
+    name = "foo"
+    author = "author"
+"""
+import csv
+import json
+from os import path
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+
+
+def _to_bool(value: Any
+             ) -> bool:
+    """
+    :param value: Manifest value
+    :return: Boolean value
+    """
+    if isinstance(value, bool):
+        return value
+
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in ('1', 'true', 'yes', 'y', 'on'):
+            return True
+        if lowered in ('', '0', 'false', 'no', 'n', 'off'):
+            return False
+
+    if isinstance(value, int):
+        return bool(value)
+
+    raise ValueError(f'Invalid boolean value: {value!r}')
+
+
+def _to_int(value: Any
+            ) -> int:
+    """
+    :param value: Manifest value
+    :return: Integer value
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f'Invalid integer value: {value!r}')
+
+    return int(value)
+
+
+# Config params with their converters
+FIELDS: Dict[str, Callable[[Any], Any]] = {
+    'name': str,
+    'author': str,
+    'line_length': _to_int,
+    'python2': _to_bool,
+    'docs': _to_bool,
+    'mypy': _to_bool,
+    'pylint': _to_bool,
+    'flake8': _to_bool,
+    'isort': _to_bool,
+    'coverage': _to_int,
+}
+
+REQUIRED_FIELDS = ('name', 'author')
+
+
+def _read_json(manifest_path: str
+               ) -> List[dict]:
+    """
+    :param manifest_path: Manifest path
+    :return: Raw manifest entries
+    """
+    with open(manifest_path, mode='r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if isinstance(data, dict):
+        data = data.get('projects')
+
+    if not isinstance(data, list):
+        raise ValueError('JSON manifest must be a list of projects '
+                         'or an object with "projects" list')
+
+    return data
+
+
+def _read_csv(manifest_path: str
+              ) -> List[dict]:
+    """
+    :param manifest_path: Manifest path
+    :return: Raw manifest entries
+    """
+    with open(manifest_path, mode='r', encoding='utf-8', newline='') as f:
+        return [
+            # Empty cells mean default values
+            {key: value for key, value in row.items() if value != ''}
+            for row in csv.DictReader(f)
+        ]
+
+
+def _read_toml(manifest_path: str
+               ) -> List[dict]:
+    """
+    :param manifest_path: Manifest path
+    :return: Raw manifest entries
+    """
+    try:
+        from tomllib import loads
+    except ImportError:
+        # python < 3.11
+        try:
+            from toml import loads  # type: ignore
+        except ImportError:
+            raise ValueError('TOML manifests require python 3.11+ '
+                             'or the "toml" package')
+
+    with open(manifest_path, mode='r', encoding='utf-8') as f:
+        data = loads(f.read())
+
+    projects = data.get('projects')
+
+    if not isinstance(projects, list):
+        raise ValueError('TOML manifest must have [[projects]] tables')
+
+    return projects
+
+
+READERS: Dict[str, Callable[[str], List[dict]]] = {
+    '.json': _read_json,
+    '.csv': _read_csv,
+    '.toml': _read_toml,
+}
+
+
+def _parse_entry(entry: Any
+                 ) -> dict:
+    """
+    :param entry: Raw manifest entry
+    :return: Project params (``dir`` and ``Config`` params)
+    """
+    if not isinstance(entry, dict):
+        raise ValueError('project must be a mapping')
+
+    if None in entry:
+        # Row has more CSV cells than the header
+        raise ValueError('more values than params')
+
+    empty = sorted(key for key, value in entry.items() if value is None)
+    if empty:
+        raise ValueError(f'empty params: {", ".join(empty)}')
+
+    unknown = set(entry) - set(FIELDS) - {'dir'}
+    if unknown:
+        raise ValueError(f'unknown params: {", ".join(sorted(unknown))}')
+
+    missing = [field for field in REQUIRED_FIELDS if field not in entry]
+    if missing:
+        raise ValueError(f'missing params: {", ".join(missing)}')
+
+    params = {
+        key: FIELDS[key](value)
+        for key, value in entry.items()
+        if key != 'dir'
+    }
+    params['dir'] = str(entry.get('dir') or params['name'])
+
+    return params
+
+
+def load_manifest(manifest_path: str
+                  ) -> List[dict]:
+    """
+    Load batch manifest
+
+    :param manifest_path: Manifest path (.json, .csv or .toml)
+    :return: Projects params (``dir`` and ``Config`` params)
+    """
+    extension = path.splitext(manifest_path)[1].lower()
+
+    if extension not in READERS:
+        raise ValueError(f'Unsupported manifest format: {extension!r}')
+
+    projects = []
+
+    for index, entry in enumerate(READERS[extension](manifest_path)):
+        try:
+            projects.append(_parse_entry(entry))
+        except ValueError as e:
+            raise ValueError(f'Project #{index}: {e}') from e
+
+    return projects
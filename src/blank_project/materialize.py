@@ -0,0 +1,261 @@
+"""
+Static file materialization strategies.
+
+* ``copy`` - ``shutil.copyfile``
+* ``hardlink`` - hard link to the template file
+* ``reflink`` - copy-on-write clone (``FICLONE`` ioctl, btrfs/xfs)
+* ``copy_file_range`` - in-kernel copy (``os.copy_file_range``)
+* ``sendfile`` - in-kernel copy (``os.sendfile``)
+* ``symlink`` - symbolic link to the template file
+
+Unsupported strategies fall back along :data:`FALLBACKS` down to ``copy``.
+Strategy failed with an "unsupported" error isn't tried again for the same
+target filesystem.
+
+.. warning::
+
+    ``hardlink`` and ``symlink`` outputs share content with the installed
+    template files, editing them in place edits the templates.
+"""
+import errno
+import os
+import sys
+from typing import Callable
+from typing import Dict
+from typing import Set
+from typing import Tuple
+
+
+COPY = 'copy'
+HARDLINK = 'hardlink'
+REFLINK = 'reflink'
+COPY_FILE_RANGE = 'copy_file_range'
+SENDFILE = 'sendfile'
+SYMLINK = 'symlink'
+
+# linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+# Errors meaning that the strategy can't work for the filesystem
+UNSUPPORTED_ERRNOS = frozenset((
+    errno.EXDEV,
+    errno.EPERM,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.EOPNOTSUPP,
+    errno.ENOTSUP,
+    errno.EMLINK,
+    errno.ENOTTY,
+))
+
+FALLBACKS: Dict[str, Tuple[str, ...]] = {
+    COPY: (COPY,),
+    HARDLINK: (HARDLINK, COPY),
+    REFLINK: (REFLINK, COPY_FILE_RANGE, SENDFILE, COPY),
+    COPY_FILE_RANGE: (COPY_FILE_RANGE, SENDFILE, COPY),
+    SENDFILE: (SENDFILE, COPY),
+    SYMLINK: (SYMLINK, COPY),
+}
+
+STRATEGIES = tuple(FALLBACKS)
+
+# (strategy, target device) pairs known to be unsupported
+_unsupported: Set[Tuple[str, int]] = set()
+
+
+def _unsupported_error(strategy: str
+                       ) -> OSError:
+    """
+    :param strategy: Strategy name
+    :return: Error for the strategy not available on the platform
+    """
+    return OSError(errno.ENOSYS, f'{strategy} is not available')
+
+
+def _replace_with(dst: str,
+                  create: Callable[[str], None]
+                  ) -> None:
+    """
+    Create the file next to the destination and move it into place
+
+    :param dst: Destination path
+    :param create: Function creating the file at the given path
+    """
+    tmp = f'{dst}.{os.urandom(6).hex()}.tmp'
+    create(tmp)
+    try:
+        os.replace(tmp, dst)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def _copy(src: str,
+          dst: str
+          ) -> None:
+    import shutil
+
+    shutil.copyfile(src, dst)
+
+
+def _hardlink(src: str,
+              dst: str
+              ) -> None:
+    _replace_with(dst, lambda tmp: os.link(src, tmp))
+
+
+def _symlink(src: str,
+             dst: str
+             ) -> None:
+    _replace_with(dst, lambda tmp: os.symlink(os.path.abspath(src), tmp))
+
+
+def _copy_fds(src: str,
+              dst: str,
+              copy: Callable[[int, int, int], None]
+              ) -> None:
+    """
+    Copy with the file descriptors based function
+
+    :param src: Source path
+    :param dst: Destination path
+    :param copy: Function copying ``size`` bytes from the source fd to
+                 the destination fd
+    """
+    with open(src, mode='rb') as fsrc:
+        size = os.fstat(fsrc.fileno()).st_size
+        with open(dst, mode='wb') as fdst:
+            try:
+                copy(fsrc.fileno(), fdst.fileno(), size)
+            except OSError:
+                fdst.close()
+                os.remove(dst)
+                raise
+
+
+def _reflink(src: str,
+             dst: str
+             ) -> None:
+    if not sys.platform.startswith('linux'):
+        raise _unsupported_error(REFLINK)
+
+    import fcntl
+
+    def clone(src_fd: int, dst_fd: int, size: int) -> None:
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+
+    _copy_fds(src, dst, clone)
+
+
+def _copy_file_range(src: str,
+                     dst: str
+                     ) -> None:
+    if not hasattr(os, 'copy_file_range'):
+        raise _unsupported_error(COPY_FILE_RANGE)
+
+    def copy(src_fd: int, dst_fd: int, size: int) -> None:
+        while size > 0:
+            copied = os.copy_file_range(src_fd, dst_fd, size)
+            if copied == 0:
+                break
+            size -= copied
+
+    _copy_fds(src, dst, copy)
+
+
+def _sendfile(src: str,
+              dst: str
+              ) -> None:
+    if not sys.platform.startswith('linux'):
+        # Only linux supports regular files as sendfile destination
+        raise _unsupported_error(SENDFILE)
+
+    def copy(src_fd: int, dst_fd: int, size: int) -> None:
+        offset = 0
+        while offset < size:
+            sent = os.sendfile(dst_fd, src_fd, offset, size - offset)
+            if sent == 0:
+                break
+            offset += sent
+
+    _copy_fds(src, dst, copy)
+
+
+def _unlink_shared(dst: str
+                   ) -> None:
+    """
+    Remove the destination if it's a link to another file
+
+    Otherwise copying would write through it into the linked (template)
+    file.
+
+    :param dst: Destination path
+    """
+    try:
+        stat = os.lstat(dst)
+    except FileNotFoundError:
+        return
+
+    if os.path.islink(dst) or stat.st_nlink > 1:
+        os.remove(dst)
+
+
+HANDLERS: Dict[str, Callable[[str, str], None]] = {
+    COPY: _copy,
+    HARDLINK: _hardlink,
+    REFLINK: _reflink,
+    COPY_FILE_RANGE: _copy_file_range,
+    SENDFILE: _sendfile,
+    SYMLINK: _symlink,
+}
+
+
+def check_strategy(strategy: str
+                   ) -> str:
+    """
+    :param strategy: Strategy name
+    :return: Strategy name
+    """
+    if strategy not in FALLBACKS:
+        raise ValueError(f'Unknown materialization strategy: {strategy!r}, '
+                         f'expected one of {", ".join(STRATEGIES)}')
+    return strategy
+
+
+def materialize_file(src: str,
+                     dst: str,
+                     strategy: str = COPY
+                     ) -> str:
+    """
+    Materialize the static file
+
+    :param src: Source (template) path
+    :param dst: Destination path
+    :param strategy: Preferred strategy
+    :return: Actually used strategy
+    """
+    fallbacks = FALLBACKS[check_strategy(strategy)]
+
+    _unlink_shared(dst)
+
+    if len(fallbacks) == 1:
+        HANDLERS[strategy](src, dst)
+        return strategy
+
+    device = os.stat(os.path.dirname(os.path.abspath(dst))).st_dev
+
+    for candidate in fallbacks[:-1]:
+        if (candidate, device) in _unsupported:
+            continue
+
+        try:
+            HANDLERS[candidate](src, dst)
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_ERRNOS:
+                raise
+            _unsupported.add((candidate, device))
+        else:
+            return candidate
+
+    HANDLERS[fallbacks[-1]](src, dst)
+    return fallbacks[-1]
@@ -0,0 +1,85 @@
+"""
+Matrix builds.
+
+Matrix is a cartesian product of config param values (axes)::
+
+    axes = {'name': ['foo', 'bar'], 'author': ['author'],
+            'python2': [False, True], 'docs': [False, True]}
+
+Most templates read only a few config fields, so projects of the matrix
+share most of the rendered outputs: every template is rendered once per
+distinct combination of the values it reads and the output is written to
+all the projects with this combination.
+"""
+import itertools
+from typing import Any
+from typing import Dict
+from typing import FrozenSet
+from typing import Hashable
+from typing import Iterator
+from typing import Mapping
+from typing import NamedTuple
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+
+class MatrixStats(NamedTuple):
+    """
+    Matrix build stats
+
+    :param projects: Number of projects
+    :param renders: Number of template renders without output sharing
+    :param unique: Number of template renders done
+    """
+    projects: int
+    renders: int
+    unique: int
+
+    @property
+    def saved(self
+              ) -> int:
+        """
+        :return: Number of template renders saved
+        """
+        return self.renders - self.unique
+
+
+def iterate_matrix(axes: Mapping[str, Sequence[Any]]
+                   ) -> Iterator[Dict[str, Any]]:
+    """
+    :param axes: Config param values by param name
+    :return: Config params of every combination (last axis varies
+             fastest)
+    """
+    names = list(axes)
+    for values in itertools.product(*(axes[name] for name in names)):
+        yield dict(zip(names, values))
+
+
+def get_matrix_dir(params: Mapping[str, Any],
+                   axes: Mapping[str, Sequence[Any]]
+                   ) -> str:
+    """
+    :param params: Config params of the combination
+    :param axes: Matrix axes
+    :return: Project directory name made of the values of the axes
+             having more than one value (e.g. ``name=foo,docs=False``)
+    """
+    varying = [f'{name}={params[name]}' for name, values in axes.items()
+               if len(values) > 1]
+    return ','.join(varying) or str(params['name'])
+
+
+def get_render_key(template: str,
+                   fields: Optional[FrozenSet[str]],
+                   context: Mapping[str, Any]
+                   ) -> Tuple[str, Tuple[Hashable, ...]]:
+    """
+    :param template: Template path
+    :param fields: Context fields read by the template (None - all)
+    :param context: Render context
+    :return: Key equal for the contexts rendering the same output
+    """
+    names = sorted(context if fields is None else fields & set(context))
+    return template, tuple((name, context[name]) for name in names)
@@ -0,0 +1,377 @@
+"""
+Partial evaluation of templates.
+
+In a batch most config fields usually have the same value for every
+project and only a few (e.g. ``name`` and ``author``) differ. A template
+using the differing fields only as plain ``{{ name }}`` outputs is
+rendered once with the batch constant values and a placeholder for every
+differing field. The output is split at the placeholders into a flat
+list of chunks and slots::
+
+    ['[', 'name', ']\\nauthor = ', 'author', '\\n']
+
+so a project costs only the slot fill, all the ``{% if %}`` branches are
+already resolved. Templates using a differing field in any other way
+(conditions, filters, loops, ...) are rendered as usual.
+
+Plain templates (only text and ``{{ field }}`` outputs) are split into
+chunks and slots straight from their syntax tree, they never need
+jinja2 to render.
+"""
+import functools
+import re
+import threading
+from functools import lru_cache
+from os import path
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import FrozenSet
+from typing import Iterable
+from typing import Mapping
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+from blank_project.analysis import get_parse_environment
+
+
+if TYPE_CHECKING:
+    from jinja2 import Template
+    from jinja2.nodes import Template as TemplateNode
+
+
+# Larger plain templates are rendered by jinja2 (so they can be
+# streamed), plain ones are kept in memory for the process lifetime
+PLAIN_TEMPLATE_MAX_SIZE = 1024 * 1024
+
+# Slot placeholder (%-formatted with the slot field number)
+PLACEHOLDER = '\x00%d\x00'
+PLACEHOLDER_RE = re.compile('\x00([0-9]+)\x00')
+
+
+class PartialTemplate(NamedTuple):
+    """
+    Template specialized for the batch constant values
+
+    :param chunks: Literal chunks (one more than slots)
+    :param slots: Context fields filling the slots between the chunks
+    """
+    chunks: Tuple[str, ...]
+    slots: Tuple[str, ...]
+
+    def render(self,
+               context: Mapping[str, Any]
+               ) -> str:
+        """
+        :param context: Render context
+        :return: Rendered template
+        """
+        parts = [self.chunks[0]]
+        for field, chunk in zip(self.slots, self.chunks[1:]):
+            # Missing field is undefined in jinja2 and renders empty
+            parts.append(str(context[field]) if field in context else '')
+            parts.append(chunk)
+        return ''.join(parts)
+
+
+def can_specialize(ast: 'TemplateNode',
+                   variables: FrozenSet[str]
+                   ) -> bool:
+    """
+    :param ast: Template syntax tree
+    :param variables: Fields differing in the batch
+    :return: Differing fields are used only as plain outputs
+    """
+    from jinja2 import nodes
+
+    # Blocks transforming or moving their output and other templates
+    # may use the fields in any way
+    blocks = ast.find_all((
+        nodes.FilterBlock, nodes.AssignBlock, nodes.Macro, nodes.CallBlock,
+        nodes.Extends, nodes.Include, nodes.Import, nodes.FromImport,
+        nodes.ScopedEvalContextModifier,
+    ))
+    if next(blocks, None) is not None:
+        return False
+
+    outputs = {id(node)
+               for output in ast.find_all(nodes.Output)
+               for node in output.nodes
+               if isinstance(node, nodes.Name)}
+
+    return all(id(node) in outputs and node.ctx == 'load'
+               for node in ast.find_all(nodes.Name)
+               if node.name in variables)
+
+
+def specialize(template: 'Template',
+               ast: 'TemplateNode',
+               constants: Mapping[str, Any],
+               variables: FrozenSet[str]
+               ) -> Optional[PartialTemplate]:
+    """
+    Specialize the template for the batch constant values
+
+    :param template: Template
+    :param ast: Template syntax tree
+    :param constants: Context fields equal for the whole batch
+    :param variables: Fields differing in the batch
+    :return: Specialized template (None if it can't be specialized)
+    """
+    if not can_specialize(ast, variables):
+        return None
+
+    fields = sorted(variables)
+    context = dict(constants)
+    context.update((field, PLACEHOLDER % i) for i, field in enumerate(fields))
+
+    parts = PLACEHOLDER_RE.split(template.render(context))
+    return PartialTemplate(
+        chunks=tuple(parts[::2]),
+        slots=tuple(fields[int(i)] for i in parts[1::2]),
+    )
+
+
+def compile_plain(ast: 'TemplateNode'
+                  ) -> Optional[PartialTemplate]:
+    """
+    :param ast: Template syntax tree
+    :return: Template split into chunks and slots (None if the template
+             has anything but text and plain ``{{ field }}`` outputs)
+    """
+    from jinja2 import nodes
+
+    environment = get_parse_environment()
+    chunks = ['']
+    slots = []
+
+    for output in ast.body:
+        if not isinstance(output, nodes.Output):
+            return None
+
+        for node in output.nodes:
+            if isinstance(node, nodes.TemplateData):
+                chunks[-1] += node.data
+            elif (isinstance(node, nodes.Name)
+                  and node.ctx == 'load'
+                  # Globals (e.g. range) are rendered when not in context
+                  and node.name not in environment.globals):
+                slots.append(node.name)
+                chunks.append('')
+            else:
+                return None
+
+    return PartialTemplate(chunks=tuple(chunks), slots=tuple(slots))
+
+
+@lru_cache(maxsize=None)
+def get_plain_template(directory: str,
+                       name: str
+                       ) -> Optional[PartialTemplate]:
+    """
+    Plain template (analyzed once per process)
+
+    :param directory: Template directory
+    :param name: Template name
+    :return: Template split into chunks and slots (None if it isn't
+             plain, see :func:`compile_plain`, or is larger than
+             ``PLAIN_TEMPLATE_MAX_SIZE``)
+    """
+    template_path = path.join(directory, name)
+    if path.getsize(template_path) > PLAIN_TEMPLATE_MAX_SIZE:
+        return None
+
+    with open(template_path, mode='r', encoding='utf-8') as f:
+        return compile_plain(get_parse_environment().parse(f.read()))
+
+
+def get_variable_fields(contexts: Iterable[Mapping[str, Any]]
+                        ) -> Tuple[Dict[str, Any], FrozenSet[str]]:
+    """
+    :param contexts: Render contexts of the batch
+    :return: Fields equal for the whole batch with their values and
+             fields differing in the batch
+    """
+    constants: Optional[Dict[str, Any]] = None
+    variables = set()
+
+    for context in contexts:
+        if constants is None:
+            constants = dict(context)
+            continue
+
+        variables.update(set(context) ^ set(constants))
+        for field, value in list(constants.items()):
+            if field not in context or context[field] != value:
+                variables.add(field)
+                del constants[field]
+
+    return constants or {}, frozenset(variables)
+
+
+class PartialTemplates:
+    """
+    Templates specialized for a batch, can be shared between builders
+
+    Templates are specialized on first use. Projects whose config
+    differs from the batch constant values and templates which can't be
+    specialized are rendered as usual.
+
+    :param directory: Template directory
+    :param constants: Context fields equal for the whole batch
+    :param variables: Fields differing in the batch
+    """
+    # Counters summed over copies of the templates (see add_counts)
+    counters = ('filled', 'rendered')
+
+    def __init__(self,
+                 directory: str,
+                 constants: Mapping[str, Any],
+                 variables: FrozenSet[str]
+                 ) -> None:
+        self.directory = directory
+        self.constants = dict(constants)
+        self.variables = variables
+
+        self.filled = 0
+        self.rendered = 0
+
+        self._templates: Dict[str, Optional[PartialTemplate]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_contexts(cls,
+                      directory: str,
+                      contexts: Iterable[Mapping[str, Any]]
+                      ) -> 'PartialTemplates':
+        """
+        :param directory: Template directory
+        :param contexts: Render contexts of the batch
+        :return: Templates specialized for the batch
+        """
+        return cls(directory, *get_variable_fields(contexts))
+
+    def __getstate__(self
+                     ) -> dict:
+        # Specialized templates and the lock stay in the process
+        state = self.__dict__.copy()
+        state['_templates'] = {}
+        del state['_lock']
+        return state
+
+    def __setstate__(self,
+                     state: dict
+                     ) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self
+              ) -> Dict[str, int]:
+        """
+        :return: Specialization counters
+        """
+        return {
+            'filled': self.filled,
+            'rendered': self.rendered,
+            'specialized': sum(template is not None
+                               for template in self._templates.values()),
+        }
+
+    def add_counts(self,
+                   counts: Mapping[str, int]
+                   ) -> None:
+        """
+        Add the counters of a copy (e.g. used by a worker process)
+
+        :param counts: Counter values by name (see ``counters``)
+        """
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def _matches(self,
+                 context: Mapping[str, Any]
+                 ) -> bool:
+        """
+        :param context: Render context
+        :return: Context has the batch constant values (of the same
+                 types) and no other fields
+        """
+        for field, value in self.constants.items():
+            if field not in context:
+                return False
+            current = context[field]
+            if type(current) is not type(value) or current != value:
+                return False
+
+        return all(field in self.constants or field in self.variables
+                   for field in context)
+
+    def get(self,
+            name: str,
+            get_template: Callable[[], 'Template']
+            ) -> Optional[PartialTemplate]:
+        """
+        :param name: Template name
+        :param get_template: Template loader
+        :return: Specialized template (None if it can't be specialized)
+        """
+        with self._lock:
+            if name in self._templates:
+                return self._templates[name]
+
+        with open(path.join(self.directory, name), mode='r',
+                  encoding='utf-8') as f:
+            source = f.read()
+
+        partial = None
+        # Placeholders must be the only NUL characters of the output
+        if '\x00' not in source:
+            partial = specialize(get_template(),
+                                 get_parse_environment().parse(source),
+                                 self.constants,
+                                 self.variables)
+
+        with self._lock:
+            return self._templates.setdefault(name, partial)
+
+    def prepare(self,
+                names: Iterable[str],
+                get_template: Callable[[str], 'Template']
+                ) -> None:
+        """
+        Specialize the templates up front, e.g. before forking workers
+        which then inherit them
+
+        :param names: Template names
+        :param get_template: Template loader taking the template name
+        """
+        for name in names:
+            self.get(name, functools.partial(get_template, name))
+
+    def render(self,
+               name: str,
+               context: Mapping[str, Any],
+               get_template: Callable[[], 'Template']
+               ) -> str:
+        """
+        Render the template filling its specialization if possible
+
+        :param name: Template name
+        :param context: Render context
+        :param get_template: Template loader
+        :return: Rendered template
+        """
+        if self._matches(context):
+            partial = self.get(name, get_template)
+            if partial is not None:
+                with self._lock:
+                    self.filled += 1
+                return partial.render(context)
+
+        with self._lock:
+            self.rendered += 1
+        return get_template().render(context)
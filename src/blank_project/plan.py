@@ -0,0 +1,236 @@
+"""
+Build planning.
+
+Build plan is a list of actions computed from the template index and the
+skip rules only, the project directory is never touched::
+
+    [Action('mkdir', ''), Action('mkdir', 'docs'), ...,
+     Action('package', 'src/project'),
+     Action('copy', '.coveragerc', source='.coveragerc', size=42),
+     Action('render', '.flake8', source='.flake8_template', size=43),
+     Action('skip', 'docs/Makefile', source='docs/Makefile', size=580,
+            reason='docs disabled'),
+     ...]
+
+Actions are plain tuples, ``action._asdict()`` is JSON serializable.
+"""
+from os import path
+from typing import AbstractSet
+from typing import Iterable
+from typing import List
+from typing import Mapping
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+from blank_project.index import TemplateFile
+from blank_project.index import TemplateIndex
+from blank_project.rules import SkipMatcher
+from blank_project.rules import SkipRule
+
+
+MKDIR = 'mkdir'
+PACKAGE = 'package'
+COPY = 'copy'
+RENDER = 'render'
+SKIP = 'skip'
+
+# Actions writing the project files
+FILE_ACTIONS = frozenset((COPY, RENDER))
+
+# Skip reason of the files not affected by a config change
+NOT_AFFECTED = 'not affected'
+
+
+class Action(NamedTuple):
+    """
+    Build plan action
+
+    :param kind: Action kind (mkdir, package, copy, render or skip)
+    :param target: Path relative to the project directory
+    :param source: Template path (file actions only)
+    :param size: Template size (file actions only)
+    :param reason: Why the file is skipped (skip actions only)
+    """
+    kind: str
+    target: str
+    source: Optional[str] = None
+    size: Optional[int] = None
+    reason: Optional[str] = None
+
+    @property
+    def template_file(self
+                      ) -> TemplateFile:
+        """
+        :return: Template project file of the file action
+        """
+        assert self.source is not None and self.size is not None
+        return TemplateFile(path=self.source,
+                            target=self.target,
+                            is_template=self.kind == RENDER,
+                            size=self.size)
+
+
+class DirectoryPlan(NamedTuple):
+    """
+    Project directories to create
+
+    :param directories: Directories relative to the project directory,
+                        parents go before children ('' is the project
+                        directory itself)
+    :param files: Number of files going into these directories
+    """
+    directories: Tuple[str, ...]
+    files: int
+
+    @property
+    def checks_saved(self
+                     ) -> int:
+        """
+        :return: Number of per-file directory existence checks avoided
+        """
+        return max(self.files - len(self.directories), 0)
+
+
+def plan_directories(files: Iterable[TemplateFile]
+                     ) -> DirectoryPlan:
+    """
+    Unique project directories for the files
+
+    :param files: Template project files
+    :return: Directory plan
+    """
+    directories = {''}
+    count = 0
+
+    for template_file in files:
+        count += 1
+        dirname = path.dirname(template_file.target)
+
+        # Parents are added too, so every directory is created by its own
+        # mkdir call
+        while dirname not in directories:
+            directories.add(dirname)
+            dirname = path.dirname(dirname)
+
+    return DirectoryPlan(directories=tuple(sorted(directories)),
+                         files=count)
+
+
+def _skip_reason(template_file: TemplateFile,
+                 matchers: List[Tuple[SkipMatcher, str]]
+                 ) -> str:
+    """
+    :param template_file: Skipped template project file
+    :param matchers: Single rule matchers with their reasons
+    :return: Reason of the first matching rule
+    """
+    for matcher, reason in matchers:
+        if matcher.match(template_file.target):
+            return reason
+    return ''  # pragma: no cover
+
+
+def plan_build(files: TemplateIndex,
+               skip: Mapping[SkipRule, str],
+               package: str
+               ) -> List[Action]:
+    """
+    Plan the project build
+
+    Directories go first (parents before children), then the project
+    package, then files in the index order.
+
+    :param files: Template project index
+    :param skip: Skip rules with their reasons
+    :param package: Project package directory
+    :return: Build plan
+    """
+    kept = list(SkipMatcher(skip).filter(files))
+    kept_paths = {template_file.path for template_file in kept}
+    matchers = [(SkipMatcher([rule]), reason)
+                for rule, reason in skip.items()]
+
+    actions = [Action(MKDIR, dirname)
+               for dirname in plan_directories(kept).directories]
+    actions.append(Action(PACKAGE, package))
+
+    for template_file in files:
+        if template_file.path in kept_paths:
+            kind = RENDER if template_file.is_template else COPY
+            reason = None
+        else:
+            kind = SKIP
+            reason = _skip_reason(template_file, matchers)
+
+        actions.append(Action(kind, template_file.target,
+                              source=template_file.path,
+                              size=template_file.size,
+                              reason=reason))
+
+    return actions
+
+
+def get_directory_plan(actions: Iterable[Action]
+                       ) -> DirectoryPlan:
+    """
+    :param actions: Build plan
+    :return: Directory plan of the build plan
+    """
+    directories = []
+    count = 0
+
+    for action in actions:
+        if action.kind == MKDIR:
+            directories.append(action.target)
+        elif action.kind in FILE_ACTIONS:
+            count += 1
+
+    return DirectoryPlan(directories=tuple(directories), files=count)
+
+
+def plan_update(actions: Iterable[Action],
+                previous: Iterable[Action],
+                affected: AbstractSet[str]
+                ) -> List[Action]:
+    """
+    Narrow the build plan down to the files changed since the previous
+    build of the project
+
+    A file is written again if the previous build didn't write it or if
+    its template is affected by the config change, other files become
+    ``not affected`` skip actions. Only directories of the written files
+    are created, the package only if it was moved.
+
+    :param actions: Build plan
+    :param previous: Build plan of the previous build
+    :param affected: Templates affected by the config change
+    :return: Update plan
+    """
+    written = set()
+    packages = set()
+    for action in previous:
+        if action.kind in FILE_ACTIONS:
+            written.add(action.target)
+        elif action.kind == PACKAGE:
+            packages.add(action.target)
+
+    files = []
+    for action in actions:
+        if action.kind in FILE_ACTIONS:
+            if action.target in written and action.source not in affected:
+                action = action._replace(kind=SKIP, reason=NOT_AFFECTED)
+            files.append(action)
+        elif action.kind == SKIP:
+            files.append(action)
+
+    kept = [action.template_file for action in files
+            if action.kind in FILE_ACTIONS]
+
+    update = [Action(MKDIR, dirname)
+              for dirname in plan_directories(kept).directories]
+    update.extend(action for action in actions
+                  if action.kind == PACKAGE and action.target not in packages)
+    update.extend(files)
+
+    return update
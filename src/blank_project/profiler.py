@@ -0,0 +1,274 @@
+"""
+Build profiler.
+
+Builder reports an event for every build step when it is given a
+profiler::
+
+    profiler = Profiler()
+    Builder(base_dir, config, profiler=profiler).build()
+    print(profiler.format_table())
+
+Event kinds are ``plan`` (index filtering), ``mkdir``, ``package``,
+``render``, ``copy`` and ``build`` (the whole build). Wall time, CPU time
+of the building thread and bytes written are recorded for each event.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import TextIO
+
+from blank_project.materialize import COPY
+from blank_project.sinks import ENCODING
+from blank_project.sinks import Sink
+
+
+try:
+    from time import thread_time
+except ImportError:  # pragma: no cover
+    # python 3.6
+    from time import process_time as thread_time
+
+
+class ProfileEvent(NamedTuple):
+    """
+    Build step measurement
+
+    :param kind: Step kind
+    :param target: Project path the step works on
+    :param wall: Wall time in seconds
+    :param cpu: CPU time in seconds
+    :param size: Bytes written
+    """
+    kind: str
+    target: str
+    wall: float
+    cpu: float
+    size: int
+
+
+class Profiler:
+    """
+    Build events collector, can be shared between builders and threads
+    """
+    def __init__(self
+                 ) -> None:
+        self.events: List[ProfileEvent] = []
+
+        # Bytes written by the thread, measure() takes the difference
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def __getstate__(self
+                     ) -> dict:
+        # Thread counters and the lock stay in the process
+        state = self.__dict__.copy()
+        del state['_local']
+        del state['_lock']
+        return state
+
+    def __setstate__(self,
+                     state: dict
+                     ) -> None:
+        self.__dict__.update(state)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def add_events(self,
+                   events: Iterable[ProfileEvent]
+                   ) -> None:
+        """
+        :param events: Events recorded elsewhere (e.g. by a worker
+                       process)
+        """
+        with self._lock:
+            self.events.extend(events)
+
+    def get_written(self
+                    ) -> int:
+        """
+        :return: Bytes written by the current thread so far
+        """
+        return getattr(self._local, 'written', 0)
+
+    def add_written(self,
+                    size: int
+                    ) -> None:
+        """
+        :param size: Bytes written by the current thread
+        """
+        self._local.written = self.get_written() + size
+
+    @contextmanager
+    def measure(self,
+                kind: str,
+                target: str = ''
+                ) -> Iterator[None]:
+        """
+        Measure the build step, bytes written by the thread during the
+        step are counted
+
+        :param kind: Step kind
+        :param target: Project path the step works on
+        """
+        written = self.get_written()
+        wall = perf_counter()
+        cpu = thread_time()
+
+        try:
+            yield
+        finally:
+            cpu = thread_time() - cpu
+            wall = perf_counter() - wall
+
+            with self._lock:
+                self.events.append(ProfileEvent(
+                    kind=kind,
+                    target=target,
+                    wall=wall,
+                    cpu=cpu,
+                    size=self.get_written() - written,
+                ))
+
+    def wrap(self,
+             sink: Sink
+             ) -> Sink:
+        """
+        :param sink: Output sink
+        :return: Sink counting bytes written into the wrapped one
+        """
+        return ProfilingSink(sink, self)
+
+    def summary(self
+                ) -> Dict[str, Dict[str, Any]]:
+        """
+        :return: Totals by event kind
+        """
+        totals: Dict[str, Dict[str, Any]] = {}
+
+        for event in self.events:
+            total = totals.setdefault(event.kind, {
+                'count': 0, 'wall': 0.0, 'cpu': 0.0, 'size': 0,
+            })
+            total['count'] += 1
+            total['wall'] += event.wall
+            total['cpu'] += event.cpu
+            total['size'] += event.size
+
+        return totals
+
+    def to_json(self
+                ) -> Dict[str, Any]:
+        """
+        :return: JSON serializable profile
+        """
+        return {
+            'events': [event._asdict() for event in self.events],
+            'summary': self.summary(),
+        }
+
+    def format_table(self
+                     ) -> str:
+        """
+        :return: Profile as a text table, slowest steps first
+        """
+        def row(kind: str, target: str, wall: float, cpu: float,
+                size: int) -> str:
+            return (f'{kind:<8} {wall * 1000:>9.3f} {cpu * 1000:>9.3f} '
+                    f'{size:>9}  {target}')
+
+        lines = [f'{"step":<8} {"wall ms":>9} {"cpu ms":>9} {"bytes":>9}  '
+                 f'target']
+        lines.extend(
+            row(*event)
+            for event in sorted(self.events, key=lambda e: -e.wall)
+        )
+        lines.append('')
+        lines.extend(
+            row(kind, f'total ({total["count"]})', total['wall'],
+                total['cpu'], total['size'])
+            for kind, total in self.summary().items()
+        )
+        return '\n'.join(lines)
+
+
+class _CountingFile:
+    """
+    Text stream proxy counting written bytes
+    """
+    def __init__(self,
+                 f: TextIO,
+                 profiler: Profiler
+                 ) -> None:
+        self._f = f
+        self._profiler = profiler
+        self._size = 0
+
+    def write(self,
+              text: str
+              ) -> int:
+        self._size += len(text.encode(ENCODING))
+        return self._f.write(text)
+
+    def writelines(self,
+                   lines: Iterable[str]
+                   ) -> None:
+        for line in lines:
+            self.write(line)
+
+    def close(self
+              ) -> None:
+        self._f.close()
+        self._profiler.add_written(self._size)
+
+    def __enter__(self
+                  ) -> '_CountingFile':
+        return self
+
+    def __exit__(self,
+                 *exc_info: Any
+                 ) -> None:
+        self.close()
+
+
+class ProfilingSink(Sink):
+    """
+    Sink counting bytes written into the wrapped sink
+
+    :param sink: Wrapped sink
+    :param profiler: Profiler
+    """
+    def __init__(self,
+                 sink: Sink,
+                 profiler: Profiler
+                 ) -> None:
+        self.sink = sink
+        self.profiler = profiler
+
+    def makedirs(self,
+                 dir_path: str,
+                 exist_ok: bool = True
+                 ) -> None:
+        self.sink.makedirs(dir_path, exist_ok)
+
+    def open(self,
+             file_path: str,
+             buffering: int = -1
+             ) -> TextIO:
+        return _CountingFile(  # type: ignore
+            self.sink.open(file_path, buffering), self.profiler
+        )
+
+    def copy(self,
+             source: str,
+             file_path: str,
+             strategy: str = COPY
+             ) -> None:
+        self.sink.copy(source, file_path, strategy)
+        self.profiler.add_written(os.stat(source).st_size)
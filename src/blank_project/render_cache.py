@@ -0,0 +1,221 @@
+"""
+Rendered templates cache.
+
+Rendered output is keyed by the source digests of the template and the
+templates it includes or imports and the values of the context variables
+they actually reference, so projects differing only in e.g. ``name`` share
+the rendered ``.flake8``. Templates referencing other templates only known
+at render time are never cached.
+
+Cache keeps an in-memory LRU and optionally a content-addressed on-disk
+store shared between processes and runs.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from os import path
+from typing import Callable
+from typing import Dict
+from typing import Mapping
+from typing import Optional
+
+from blank_project.dependencies import get_template_digests
+from blank_project.dependencies import get_template_fields
+
+
+class RenderCache:
+    """
+    Rendered templates cache
+
+    :param maxsize: Max number of rendered outputs kept in memory
+    :param directory: On-disk store directory (disabled if None)
+    """
+    # Counters summed over copies of the cache (see add_counts)
+    counters = ('hits', 'disk_hits', 'misses')
+
+    def __init__(self,
+                 maxsize: int = 256,
+                 directory: Optional[str] = None
+                 ) -> None:
+        self.maxsize = maxsize
+        self.directory = directory
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._entries: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self
+                     ) -> dict:
+        # In-memory entries and the lock stay in the process
+        state = self.__dict__.copy()
+        state['_entries'] = OrderedDict()
+        del state['_lock']
+        return state
+
+    def __setstate__(self,
+                     state: dict
+                     ) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self
+              ) -> Dict[str, int]:
+        """
+        :return: Cache counters
+        """
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'size': len(self._entries),
+        }
+
+    def add_counts(self,
+                   counts: Mapping[str, int]
+                   ) -> None:
+        """
+        Add the counters of a copy (e.g. used by a worker process)
+
+        :param counts: Counter values by name (see ``counters``)
+        """
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    @staticmethod
+    def get_key(directory: str,
+                name: str,
+                context: Mapping
+                ) -> Optional[str]:
+        """
+        :param directory: Template directory
+        :param name: Template name
+        :param context: Render context
+        :return: Cache key (None if the template references templates
+                 only known at render time)
+        """
+        fields = get_template_fields(directory, name)
+        digests = get_template_digests(directory, name)
+        if fields is None or digests is None:
+            return None
+
+        relevant = {
+            field: context[field]
+            for field in fields
+            if field in context
+        }
+        payload = json.dumps([name, digests, relevant],
+                             sort_keys=True, default=repr)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _disk_path(self,
+                   key: str
+                   ) -> str:
+        """
+        :param key: Cache key
+        :return: On-disk store path
+        """
+        assert self.directory is not None
+        return path.join(self.directory, key[:2], key[2:])
+
+    def _read_disk(self,
+                   key: str
+                   ) -> Optional[str]:
+        """
+        :param key: Cache key
+        :return: Stored output or None
+        """
+        try:
+            with open(self._disk_path(key), mode='r', encoding='utf-8',
+                      newline='') as f:
+                return f.read()
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def _write_disk(self,
+                    key: str,
+                    value: str
+                    ) -> None:
+        """
+        Atomically store the output, errors are ignored
+
+        :param key: Cache key
+        :param value: Rendered output
+        """
+        import tempfile
+
+        target = self._disk_path(key)
+        try:
+            os.makedirs(path.dirname(target), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix='.tmp-',
+                                       dir=path.dirname(target))
+            with os.fdopen(fd, mode='w', encoding='utf-8', newline='') as f:
+                f.write(value)
+            os.replace(tmp, target)
+        except OSError:
+            pass
+
+    def _remember(self,
+                  key: str,
+                  value: str
+                  ) -> None:
+        """
+        :param key: Cache key
+        :param value: Rendered output
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def render(self,
+               directory: str,
+               name: str,
+               context: Mapping,
+               render: Callable[[], str]
+               ) -> str:
+        """
+        Cached render
+
+        :param directory: Template directory
+        :param name: Template name
+        :param context: Render context
+        :param render: Render function called on cache miss
+        :return: Rendered output
+        """
+        key = self.get_key(directory, name, context)
+        if key is None:
+            return render()
+
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+        if self.directory is not None:
+            value = self._read_disk(key)
+            if value is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                self._remember(key, value)
+                return value
+
+        value = render()
+
+        with self._lock:
+            self.misses += 1
+        self._remember(key, value)
+
+        if self.directory is not None:
+            self._write_disk(key, value)
+
+        return value
@@ -0,0 +1,204 @@
+"""
+Skip rules for template project files.
+
+Rules are matched against project (output) paths, i.e. template paths
+without the template postfix, '/' separated::
+
+    matcher = SkipMatcher([directory('docs'), exact('.flake8')])
+    files = matcher.filter(index)
+"""
+import re
+from bisect import bisect_left
+from fnmatch import translate
+from typing import FrozenSet
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Pattern
+from typing import Sequence
+from typing import Tuple
+from typing import Union
+
+from blank_project.index import TemplateFile
+from blank_project.index import TemplateIndex
+
+
+EXACT = 'exact'
+DIRECTORY = 'directory'
+GLOB = 'glob'
+REGEX = 'regex'
+
+KINDS = (EXACT, DIRECTORY, GLOB, REGEX)
+
+
+class SkipRule(NamedTuple):
+    """
+    Skip rule
+
+    :param kind: Rule kind (exact, directory, glob or regex)
+    :param pattern: Rule pattern
+    """
+    kind: str
+    pattern: str
+
+
+def exact(file_path: str
+          ) -> SkipRule:
+    """
+    :param file_path: Project file path
+    :return: Rule skipping exactly this file
+    """
+    return SkipRule(EXACT, file_path)
+
+
+def directory(dir_path: str
+              ) -> SkipRule:
+    """
+    :param dir_path: Project directory path
+    :return: Rule skipping the whole directory
+    """
+    return SkipRule(DIRECTORY, dir_path.rstrip('/') + '/')
+
+
+def glob(pattern: str
+         ) -> SkipRule:
+    """
+    :param pattern: Shell-style pattern (fnmatch, '*' also matches '/')
+    :return: Rule skipping files matching the pattern
+    """
+    return SkipRule(GLOB, pattern)
+
+
+def regex(pattern: str
+          ) -> SkipRule:
+    """
+    :param pattern: Regular expression matched at the path start
+    :return: Rule skipping files matching the expression
+    """
+    return SkipRule(REGEX, pattern)
+
+
+class SkipMatcher:
+    """
+    Compiled set of skip rules
+
+    Exact rules are a set lookup, directory rules prune whole subtrees of
+    the sorted index and glob and regex rules are compiled into a single
+    alternation.
+
+    Plain strings are treated as regex rules.
+
+    :param rules: Skip rules
+    """
+    def __init__(self,
+                 rules: Iterable[Union[SkipRule, str]] = ()
+                 ) -> None:
+        exact_paths = set()
+        directories = set()
+        patterns = []
+
+        for rule in rules:
+            if isinstance(rule, str):
+                rule = regex(rule)
+
+            if rule.kind == EXACT:
+                exact_paths.add(rule.pattern)
+            elif rule.kind == DIRECTORY:
+                directories.add(rule.pattern)
+            elif rule.kind == GLOB:
+                patterns.append(translate(rule.pattern))
+            elif rule.kind == REGEX:
+                patterns.append(f'(?:{rule.pattern})')
+            else:
+                raise ValueError(f'Unknown skip rule kind: {rule.kind!r}')
+
+        self.exact: FrozenSet[str] = frozenset(exact_paths)
+        self.directories: Tuple[str, ...] = self._collapse(directories)
+        self.pattern: Optional[Pattern] = (
+            re.compile('|'.join(patterns)) if patterns else None
+        )
+
+    @staticmethod
+    def _collapse(directories: Iterable[str]
+                  ) -> Tuple[str, ...]:
+        """
+        :param directories: Directory prefixes
+        :return: Sorted prefixes without nested ones
+        """
+        collapsed: List[str] = []
+        for prefix in sorted(directories):
+            if not collapsed or not prefix.startswith(collapsed[-1]):
+                collapsed.append(prefix)
+        return tuple(collapsed)
+
+    def __bool__(self
+                 ) -> bool:
+        return bool(self.exact or self.directories or self.pattern)
+
+    def match(self,
+              file_path: str
+              ) -> bool:
+        """
+        :param file_path: Project file path
+        :return: Need skip the file or not
+        """
+        if file_path in self.exact:
+            return True
+
+        if self.directories and file_path.startswith(self.directories):
+            return True
+
+        return bool(self.pattern and self.pattern.match(file_path))
+
+    def _pruned_ranges(self,
+                       paths: Sequence[str]
+                       ) -> List[Tuple[int, int]]:
+        """
+        :param paths: Sorted template paths
+        :return: Index ranges covered by the directory rules
+        """
+        ranges = []
+        for prefix in self.directories:
+            # Every path with the prefix sorts between 'prefix' and the
+            # prefix with '/' replaced by the next character
+            start = bisect_left(paths, prefix)
+            stop = bisect_left(paths, prefix[:-1] + '0', start)
+            if start < stop:
+                ranges.append((start, stop))
+        return ranges
+
+    def filter(self,
+               files: TemplateIndex
+               ) -> Iterator[TemplateFile]:
+        """
+        Filter the template index
+
+        Directories are the same for template and project paths, so
+        skipped directories are cut out of the sorted index without
+        looking at their files.
+
+        :param files: Template project index
+        :return: Iterator over not skipped files
+        """
+        if not self:
+            yield from files
+            return
+
+        entries = files.files
+        ranges = self._pruned_ranges(files.paths)
+        ranges.append((len(entries), len(entries)))
+
+        exact_paths = self.exact
+        match = self.pattern.match if self.pattern is not None else None
+        position = 0
+
+        for start, stop in ranges:
+            for template_file in entries[position:start]:
+                if template_file.target in exact_paths:
+                    continue
+                if match is not None and match(template_file.target):
+                    continue
+                yield template_file
+            position = max(position, stop)
@@ -0,0 +1,435 @@
+"""
+Build output sinks.
+
+Builder writes the project through a sink, paths given to the sink are
+'/' separated and relative to the project root:
+
+* :class:`FileSystemSink` - project directory on disk (default)
+* :class:`MemorySink` - dict of file contents, nothing touches the disk
+* :class:`TarSink`, :class:`ZipSink` - entries of an open archive,
+  written as the files are produced
+"""
+import io
+import os
+import time
+from abc import ABC
+from abc import abstractmethod
+from contextlib import contextmanager
+from os import makedirs
+from os import path
+from typing import TYPE_CHECKING
+from typing import BinaryIO
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Set
+from typing import TextIO
+
+from blank_project.materialize import COPY
+from blank_project.materialize import materialize_file
+
+
+if TYPE_CHECKING:
+    import tarfile
+    import zipfile
+
+
+ENCODING = 'utf-8'
+
+DIR_MODE = 0o755
+FILE_MODE = 0o644
+
+ZIP = 'zip'
+
+# Archive formats by file name suffix (tar stream modes)
+ARCHIVE_FORMATS = {
+    '.zip': ZIP,
+    '.tar': 'w|',
+    '.tar.gz': 'w|gz',
+    '.tgz': 'w|gz',
+    '.tar.bz2': 'w|bz2',
+    '.tar.xz': 'w|xz',
+}
+
+
+class Sink(ABC):
+    """
+    Build output sink
+    """
+    @abstractmethod
+    def makedirs(self,
+                 dir_path: str,
+                 exist_ok: bool = True
+                 ) -> None:
+        """
+        Create the directory with its parents
+
+        :param dir_path: Directory path ('' is the project root)
+        :param exist_ok: Ignore existing directory
+        :raises FileExistsError: If the directory exists and not exist_ok
+        """
+
+    @abstractmethod
+    def open(self,
+             file_path: str,
+             buffering: int = -1
+             ) -> TextIO:
+        """
+        Open the file for writing text
+
+        :param file_path: File path
+        :param buffering: Write buffer size (see :func:`open`)
+        :return: Text stream, the file is complete once it is closed
+        """
+
+    @abstractmethod
+    def copy(self,
+             source: str,
+             file_path: str,
+             strategy: str = COPY
+             ) -> None:
+        """
+        Write the file with the content of the source file
+
+        :param source: Source file path on disk
+        :param file_path: File path
+        :param strategy: Materialization strategy (filesystem sink only)
+        """
+
+
+class FileSystemSink(Sink):
+    """
+    Project directory on disk
+
+    :param base_dir: Project directory
+    """
+    def __init__(self,
+                 base_dir: str
+                 ) -> None:
+        self.base_dir = base_dir
+
+    def makedirs(self,
+                 dir_path: str,
+                 exist_ok: bool = True
+                 ) -> None:
+        makedirs(path.join(self.base_dir, dir_path), exist_ok=exist_ok)
+
+    def open(self,
+             file_path: str,
+             buffering: int = -1
+             ) -> TextIO:
+        return open(path.join(self.base_dir, file_path), mode='w',
+                    buffering=buffering)
+
+    def copy(self,
+             source: str,
+             file_path: str,
+             strategy: str = COPY
+             ) -> None:
+        materialize_file(source, path.join(self.base_dir, file_path),
+                         strategy)
+
+
+class _Entry(io.StringIO):
+    """
+    Text buffer passed to the callback when closed
+    """
+    def __init__(self,
+                 callback: Callable[[bytes], None]
+                 ) -> None:
+        super().__init__()
+        self._callback = callback
+
+    def close(self
+              ) -> None:
+        if not self.closed:
+            self._callback(self.getvalue().encode(ENCODING))
+        super().close()
+
+
+class _VirtualSink(Sink):
+    """
+    Sink keeping track of created directories itself
+    """
+    def __init__(self
+                 ) -> None:
+        self.directories: Set[str] = set()
+
+    def _add_directory(self,
+                       dir_path: str
+                       ) -> None:
+        """
+        :param dir_path: New directory path
+        """
+        self.directories.add(dir_path)
+
+    def makedirs(self,
+                 dir_path: str,
+                 exist_ok: bool = True
+                 ) -> None:
+        dir_path = dir_path.strip('/')
+
+        if dir_path in self.directories:
+            if not exist_ok:
+                raise FileExistsError(dir_path)
+            return
+
+        missing: List[str] = []
+        while dir_path not in self.directories:
+            missing.append(dir_path)
+            if not dir_path:
+                break
+            dir_path = path.dirname(dir_path)
+
+        for dirname in reversed(missing):
+            self._add_directory(dirname)
+
+
+class _BufferedSink(_VirtualSink):
+    """
+    Sink writing whole files, rendered files are buffered until closed
+    """
+    @abstractmethod
+    def _write(self,
+               file_path: str,
+               content: bytes
+               ) -> None:
+        """
+        :param file_path: File path
+        :param content: File content
+        """
+
+    def open(self,
+             file_path: str,
+             buffering: int = -1
+             ) -> TextIO:
+        return _Entry(lambda content: self._write(file_path, content))
+
+    def copy(self,
+             source: str,
+             file_path: str,
+             strategy: str = COPY
+             ) -> None:
+        with open(source, mode='rb') as f:
+            self._write(file_path, f.read())
+
+
+class MemorySink(_BufferedSink):
+    """
+    In-memory project
+
+    :ivar files: File contents by file path in the build order
+    :ivar directories: Directory paths
+    """
+    def __init__(self
+                 ) -> None:
+        super().__init__()
+        self.files: Dict[str, bytes] = {}
+
+    def _write(self,
+               file_path: str,
+               content: bytes
+               ) -> None:
+        self.files[file_path] = content
+
+
+class TarSink(_BufferedSink):
+    """
+    Entries of the tar archive opened for writing (stream modes like
+    ``w|gz`` are supported)
+
+    Rendered templates are buffered until the file is closed (tar header
+    holds the entry size), static files are streamed from the disk.
+
+    :param archive: Tar archive
+    :param prefix: Project root inside the archive
+    """
+    def __init__(self,
+                 archive: 'tarfile.TarFile',
+                 prefix: str = ''
+                 ) -> None:
+        super().__init__()
+        self.archive = archive
+        self.prefix = prefix.strip('/')
+        self.mtime = int(time.time())
+
+    def _get_name(self,
+                  file_path: str
+                  ) -> str:
+        """
+        :param file_path: Path relative to the project root
+        :return: Archive entry name
+        """
+        return '/'.join(part for part in (self.prefix, file_path) if part)
+
+    def _get_info(self,
+                  file_path: str,
+                  mode: int
+                  ) -> 'tarfile.TarInfo':
+        """
+        :param file_path: Path relative to the project root
+        :param mode: Entry permissions
+        :return: Entry header
+        """
+        import tarfile
+
+        info = tarfile.TarInfo(self._get_name(file_path))
+        info.mtime = self.mtime
+        info.mode = mode
+        return info
+
+    def _add_directory(self,
+                       dir_path: str
+                       ) -> None:
+        super()._add_directory(dir_path)
+
+        if not self._get_name(dir_path):
+            return
+
+        import tarfile
+
+        info = self._get_info(dir_path, DIR_MODE)
+        info.type = tarfile.DIRTYPE
+        self.archive.addfile(info)
+
+    def _write(self,
+               file_path: str,
+               content: bytes
+               ) -> None:
+        info = self._get_info(file_path, FILE_MODE)
+        info.size = len(content)
+        self.archive.addfile(info, io.BytesIO(content))
+
+    def copy(self,
+             source: str,
+             file_path: str,
+             strategy: str = COPY
+             ) -> None:
+        with open(source, mode='rb') as f:
+            stat = os.fstat(f.fileno())
+            info = self._get_info(file_path, stat.st_mode & 0o777)
+            info.size = stat.st_size
+            self.archive.addfile(info, f)
+
+
+class ZipSink(_VirtualSink):
+    """
+    Entries of the zip archive opened for writing (unseekable outputs
+    like stdout are supported)
+
+    Rendered templates and static files are streamed into the entries.
+
+    :param archive: Zip archive
+    :param prefix: Project root inside the archive
+    """
+    def __init__(self,
+                 archive: 'zipfile.ZipFile',
+                 prefix: str = ''
+                 ) -> None:
+        super().__init__()
+        self.archive = archive
+        self.prefix = prefix.strip('/')
+        # Zip timestamps start at 1980
+        self.date_time = max(time.localtime()[:6], (1980, 1, 1, 0, 0, 0))
+
+    def _get_info(self,
+                  file_path: str,
+                  mode: int
+                  ) -> 'zipfile.ZipInfo':
+        """
+        :param file_path: Path relative to the project root
+        :param mode: Entry permissions
+        :return: Entry header
+        """
+        import zipfile
+
+        name = '/'.join(part for part in (self.prefix, file_path) if part)
+        info = zipfile.ZipInfo(name, date_time=self.date_time)
+        info.compress_type = self.archive.compression
+        info.external_attr = mode << 16
+        return info
+
+    def _add_directory(self,
+                       dir_path: str
+                       ) -> None:
+        import zipfile
+
+        super()._add_directory(dir_path)
+
+        info = self._get_info(dir_path, DIR_MODE)
+        if not info.filename:
+            return
+
+        info.filename += '/'
+        info.external_attr |= 0x10  # MS-DOS directory flag
+        info.compress_type = zipfile.ZIP_STORED
+        self.archive.writestr(info, b'')
+
+    def open(self,
+             file_path: str,
+             buffering: int = -1
+             ) -> TextIO:
+        entry = self.archive.open(self._get_info(file_path, FILE_MODE),
+                                  mode='w')
+        return io.TextIOWrapper(entry, encoding=ENCODING)
+
+    def copy(self,
+             source: str,
+             file_path: str,
+             strategy: str = COPY
+             ) -> None:
+        with open(source, mode='rb') as f:
+            info = self._get_info(file_path,
+                                  os.fstat(f.fileno()).st_mode & 0o777)
+            with self.archive.open(info, mode='w') as entry:
+                while True:
+                    chunk = f.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    entry.write(chunk)
+
+
+def get_archive_format(file_name: str
+                       ) -> str:
+    """
+    :param file_name: Archive file name
+    :return: Archive format (see :data:`ARCHIVE_FORMATS`)
+    """
+    for suffix, archive_format in ARCHIVE_FORMATS.items():
+        if file_name.endswith(suffix):
+            return archive_format
+
+    raise ValueError(f'Unknown archive format: {file_name!r} '
+                     f'(expected {", ".join(ARCHIVE_FORMATS)})')
+
+
+@contextmanager
+def open_archive_sink(fileobj: BinaryIO,
+                      archive_format: str,
+                      prefix: str = ''
+                      ) -> Iterator[Sink]:
+    """
+    Archive sink over the binary output, the archive is finished on exit
+
+    Archive is written sequentially, so the output may be unseekable
+    (e.g. stdout).
+
+    :param fileobj: Binary output
+    :param archive_format: Archive format (see :data:`ARCHIVE_FORMATS`)
+    :param prefix: Project root inside the archive
+    :return: Archive sink
+    """
+    if archive_format == ZIP:
+        import zipfile
+
+        with zipfile.ZipFile(fileobj, mode='w',
+                             compression=zipfile.ZIP_DEFLATED) as archive:
+            yield ZipSink(archive, prefix)
+    else:
+        import tarfile
+
+        # Stream mode is only known at runtime
+        with tarfile.open(fileobj=fileobj,  # type: ignore
+                          mode=archive_format) as archive:
+            yield TarSink(archive, prefix)
@@ -0,0 +1,10 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+
+# Bundle and bytecode caches of the tests never touch the user cache
+_cache_dir = tempfile.mkdtemp(prefix='blank-project-tests-')
+os.environ['BLANK_PROJECT_CACHE_DIR'] = _cache_dir
+atexit.register(shutil.rmtree, _cache_dir, ignore_errors=True)
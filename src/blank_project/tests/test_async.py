@@ -0,0 +1,82 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from filecmp import dircmp
+from unittest import mock
+
+from freezegun import freeze_time
+
+from blank_project import Builder
+from blank_project import Config
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class AsyncBuildTest(unittest.TestCase):
+    def assertSameTree(self, left, right):
+        stack = [dircmp(left, right)]
+
+        while stack:
+            current = stack.pop()
+            self.assertEqual(current.left_only, [])
+            self.assertEqual(current.right_only, [])
+            self.assertEqual(current.diff_files, [])
+            stack.extend(current.subdirs.values())
+
+    @freeze_time('1970-01-01')
+    def test_same_as_build(self):
+        configs = [
+            dict(name='project', author='author'),
+            dict(name='project', author='author', docs=False, python2=True),
+        ]
+
+        for config in configs:
+            for concurrency in (1, 4):
+                with tempfile.TemporaryDirectory() as tmpdir:
+                    sync_dir = os.path.join(tmpdir, 'sync')
+                    async_dir = os.path.join(tmpdir, 'async')
+
+                    Builder(sync_dir, Config(**config)).build()
+                    run(Builder(async_dir, Config(**config)).abuild(
+                        concurrency=concurrency
+                    ))
+
+                    self.assertSameTree(sync_dir, async_dir)
+
+    def test_executor(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                run(Builder(tmpdir, Config(name='project', author='author'))
+                    .abuild(executor=executor))
+
+                # Executor provided by the caller isn't shut down
+                self.assertEqual(executor.submit(lambda: 1).result(), 1)
+
+            self.assertTrue(os.path.exists(os.path.join(tmpdir, 'setup.py')))
+
+    def test_error(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            blocker = os.path.join(tmpdir, 'blocker')
+            with open(blocker, mode='w'):
+                pass
+
+            with self.assertRaises(OSError):
+                run(Builder(os.path.join(blocker, 'project'),
+                            Config(name='project', author='author')).abuild())
+
+    def test_file_error(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            builder = Builder(tmpdir, Config(name='project', author='author'))
+
+            with mock.patch.object(Builder, '_handle',
+                                   side_effect=PermissionError):
+                with self.assertRaises(PermissionError):
+                    run(builder.abuild())
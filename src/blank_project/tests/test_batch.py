@@ -0,0 +1,124 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+from concurrent.futures.process import BrokenProcessPool
+from filecmp import dircmp
+from unittest import mock
+
+from freezegun import freeze_time
+
+from blank_project import Builder
+from blank_project import Config
+
+
+class BuildManyTest(unittest.TestCase):
+    def assertSameTree(self, left, right):
+        comparison = dircmp(left, right)
+        stack = [comparison]
+
+        while stack:
+            current = stack.pop()
+            self.assertEqual(current.left_only, [])
+            self.assertEqual(current.right_only, [])
+            self.assertEqual(current.diff_files, [])
+            stack.extend(current.subdirs.values())
+
+    @freeze_time('1970-01-01')
+    def test_same_as_build(self):
+        configs = [
+            dict(name='foo', author='author'),
+            dict(name='bar', author='author', python2=True, docs=False),
+            dict(name='baz', author='author', line_length=120, coverage=-1),
+        ]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            results = Builder.build_many(
+                (os.path.join(tmpdir, 'many', config['name']),
+                 Config(**config))
+                for config in configs
+            )
+
+            self.assertEqual([result.name for result in results],
+                             ['foo', 'bar', 'baz'])
+            self.assertTrue(all(result.ok for result in results))
+
+            for config in configs:
+                single = os.path.join(tmpdir, 'single', config['name'])
+                Builder(single, Config(**config)).build()
+
+                self.assertSameTree(
+                    single, os.path.join(tmpdir, 'many', config['name'])
+                )
+
+    def test_jobs(self):
+        # Real clock: freezegun doesn't survive forking the workers, the
+        # configs (with their year) are shared by both builds
+        configs = [
+            Config(name=f'project{i}', author='author', python2=bool(i % 2),
+                   docs=bool(i % 3))
+            for i in range(8)
+        ]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for jobs in (1, 3):
+                results = Builder.build_many(
+                    [(os.path.join(tmpdir, str(jobs), config.name), config)
+                     for config in configs],
+                    jobs=jobs,
+                )
+
+                self.assertEqual([result.name for result in results],
+                                 [config.name for config in configs])
+                self.assertTrue(all(result.ok for result in results))
+
+            self.assertSameTree(os.path.join(tmpdir, '1'),
+                                os.path.join(tmpdir, '3'))
+
+    def test_failure_doesnt_abort(self):
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                self._test_failure_doesnt_abort(jobs)
+
+    def _test_failure_doesnt_abort(self, jobs):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            blocker = os.path.join(tmpdir, 'blocker')
+            with open(blocker, mode='w'):
+                pass
+
+            results = Builder.build_many([
+                (os.path.join(tmpdir, 'foo'),
+                 Config(name='foo', author='author')),
+                (os.path.join(blocker, 'bar'),
+                 Config(name='bar', author='author')),
+                (os.path.join(tmpdir, 'baz'),
+                 Config(name='baz', author='author')),
+            ], jobs=jobs)
+
+            self.assertEqual([result.ok for result in results],
+                             [True, False, True])
+            self.assertIsInstance(results[1].error, OSError)
+            self.assertTrue(all(result.duration >= 0 for result in results))
+            self.assertTrue(os.path.exists(
+                os.path.join(tmpdir, 'baz', 'setup.py')
+            ))
+
+    def test_worker_died(self):
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            self.skipTest('fork is not available')  # pragma: no cover
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            # Forked workers inherit the patch
+            with mock.patch.object(Builder, 'execute',
+                                   side_effect=lambda plan: os._exit(1)):
+                results = Builder.build_many([
+                    (os.path.join(tmpdir, name),
+                     Config(name=name, author='author'))
+                    for name in ('foo', 'bar')
+                ], jobs=2)
+
+            self.assertEqual([result.name for result in results],
+                             ['foo', 'bar'])
+            for result in results:
+                self.assertIsInstance(result.error, BrokenProcessPool)
+                self.assertEqual(result.duration, 0.0)
@@ -1,11 +1,14 @@
 import os
+import pickle
 import tempfile
 import unittest
 from filecmp import cmp
 from filecmp import cmpfiles
 from os import makedirs
+from unittest import mock
 
 from freezegun import freeze_time
+from jinja2 import Template
 
 from blank_project import Builder
 from blank_project import Config
@@ -109,6 +112,40 @@ class BuilderTest(unittest.TestCase):
 
                     self.raise_file_cmp_error(left, right)
 
+    @freeze_time('1970-01-01')
+    def test_stream(self):
+        configs = [
+            dict(name='project', author='author'),
+            dict(name='project', author='author', python2=True, docs=False,
+                 coverage=-1, line_length=120),
+        ]
+
+        for config in configs:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                rendered = os.path.join(tmpdir, 'rendered')
+                streamed = os.path.join(tmpdir, 'streamed')
+
+                Builder(rendered, Config(**config)).build()
+                with mock.patch.object(Template, 'generate', autospec=True,
+                                       side_effect=Template.generate
+                                       ) as generate:
+                    Builder(streamed, Config(**config), stream=True).build()
+
+                # Plain templates are streamed too
+                self.assertIn('README.md_template',
+                              {call[0][0].name
+                               for call in generate.call_args_list})
+
+                for root, _, files in os.walk(rendered):
+                    for name in files:
+                        left = os.path.join(root, name)
+                        right = os.path.join(
+                            streamed, os.path.relpath(left, rendered)
+                        )
+
+                        if not cmp(left, right):  # pragma: no cover
+                            self.raise_file_cmp_error(left, right)
+
     def _build_and_compare_file(self, config, build_file, sample_file):
         with tempfile.TemporaryDirectory() as tmpdir:
             Builder(tmpdir, Config(**config)).build()
@@ -700,3 +737,62 @@ class BuilderTest(unittest.TestCase):
                     'mypy.ini',
                     'docs',)
         )
+
+
+class ConfigTest(unittest.TestCase):
+    def test_immutable(self):
+        config = Config(name='project', author='author')
+
+        with self.assertRaises(AttributeError):
+            config.name = 'other'
+        with self.assertRaises(AttributeError):
+            config.extra = True
+        with self.assertRaises(AttributeError):
+            del config.name
+
+    def test_hash(self):
+        config = Config(name='project', author='author', coverage=80)
+
+        self.assertEqual(config, Config(name='project', author='author',
+                                        coverage=80))
+        self.assertEqual(hash(config), hash(Config(name='project',
+                                                   author='author',
+                                                   coverage=80)))
+        self.assertNotEqual(config, Config(name='project', author='author'))
+        self.assertNotEqual(config, config.get_context())
+        self.assertEqual(len({config, eval(repr(config))}), 1)
+        self.assertEqual(pickle.loads(pickle.dumps(config)), config)
+
+    def test_context(self):
+        config = Config(name='project', author='author', coverage=-1)
+        context = config.get_context()
+
+        self.assertIs(config.get_context(), context)
+        self.assertFalse(context['coverage'])
+        self.assertEqual(context['coverage_fail'], -1)
+        with self.assertRaises(TypeError):
+            context['name'] = 'other'
+
+    @freeze_time('2001-01-01')
+    def test_year(self):
+        config = Config(name='project', author='author')
+
+        with freeze_time('2002-01-01'):
+            self.assertEqual(pickle.loads(pickle.dumps(config)).year, 2001)
+
+    def test_validation(self):
+        invalid = (
+            dict(name=''),
+            dict(author=None),
+            dict(line_length=0),
+            dict(line_length='79'),
+            dict(coverage=True),
+            dict(coverage=101),
+            dict(docs='yes'),
+        )
+
+        for params in invalid:
+            with self.subTest(**params):
+                with self.assertRaises(ValueError):
+                    Config(**dict(dict(name='project', author='author'),
+                                  **params))
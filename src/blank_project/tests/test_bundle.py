@@ -0,0 +1,252 @@
+import gc
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from jinja2 import Environment
+from jinja2 import FileSystemLoader
+from jinja2 import ModuleLoader
+
+import blank_project
+from blank_project import TEMPLATE_PROJECT_DIR
+from blank_project import Config
+from blank_project import compile_templates
+from blank_project.bundle import MANIFEST_NAME
+from blank_project.bundle import compile_bundle
+from blank_project.bundle import get_bundle_loader
+from blank_project.bundle import get_bundle_root
+from blank_project.bundle import get_cache_dir
+from blank_project.bundle import is_bundle_fresh
+
+
+def is_template(name):
+    return name.endswith('_template')
+
+
+class BundleTest(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.template_dir = os.path.join(self._tmpdir.name, 'template')
+        self.bundle_root = os.path.join(self._tmpdir.name, 'bundle')
+        shutil.copytree(TEMPLATE_PROJECT_DIR, self.template_dir)
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+        # ModuleLoader removes its sys.modules entry when collected, do it
+        # now rather than while other tests iterate sys.modules (freezegun)
+        gc.collect()
+
+    def _write_template(self, name, content):
+        with open(os.path.join(self.template_dir, name), mode='w') as f:
+            f.write(content)
+
+    def test_compile(self):
+        self.assertFalse(is_bundle_fresh(self.template_dir, self.bundle_root,
+                                         is_template))
+
+        modules_dir = compile_bundle(self.template_dir, self.bundle_root,
+                                     is_template)
+
+        self.assertTrue(os.path.exists(
+            os.path.join(self.bundle_root, MANIFEST_NAME)
+        ))
+        self.assertEqual(
+            sorted(os.listdir(modules_dir)),
+            sorted(
+                ModuleLoader.get_module_filename(name)
+                for name in FileSystemLoader(
+                    self.template_dir
+                ).list_templates()
+                if is_template(name)
+            )
+        )
+        self.assertTrue(is_bundle_fresh(self.template_dir, self.bundle_root,
+                                        is_template))
+
+    def test_same_render(self):
+        context = Config(name='project', author='author').get_context()
+        source_env = Environment(loader=FileSystemLoader(self.template_dir))
+        bundle_env = Environment(loader=get_bundle_loader(
+            self.template_dir, self.bundle_root, is_template
+        ))
+
+        for name in source_env.list_templates(filter_func=is_template):
+            self.assertEqual(
+                source_env.get_template(name).render(context),
+                bundle_env.get_template(name).render(context),
+            )
+
+    def test_mtime_changed(self):
+        compile_bundle(self.template_dir, self.bundle_root, is_template)
+
+        template_path = os.path.join(self.template_dir, '.flake8_template')
+        stat = os.stat(template_path)
+        os.utime(template_path, ns=(stat.st_atime_ns,
+                                    stat.st_mtime_ns + 10 ** 9))
+
+        self.assertTrue(is_bundle_fresh(self.template_dir, self.bundle_root,
+                                        is_template))
+
+    def test_content_changed(self):
+        first = compile_bundle(self.template_dir, self.bundle_root,
+                               is_template)
+
+        self._write_template('.flake8_template',
+                             '[flake8]\nmax-line-length={{ line_length }}0\n')
+
+        self.assertFalse(is_bundle_fresh(self.template_dir, self.bundle_root,
+                                         is_template))
+
+        loader = get_bundle_loader(self.template_dir, self.bundle_root,
+                                   is_template)
+
+        self.assertNotEqual(loader.module.__path__, [first])
+        self.assertTrue(is_bundle_fresh(self.template_dir, self.bundle_root,
+                                        is_template))
+        self.assertEqual(
+            Environment(loader=loader).get_template(
+                '.flake8_template'
+            ).render(line_length=79),
+            '[flake8]\nmax-line-length=790',
+        )
+
+    def test_template_added(self):
+        compile_bundle(self.template_dir, self.bundle_root, is_template)
+
+        self._write_template('new_template', '{{ name }}')
+
+        self.assertFalse(is_bundle_fresh(self.template_dir, self.bundle_root,
+                                         is_template))
+
+    def test_invalid_manifest(self):
+        os.makedirs(self.bundle_root)
+        with open(os.path.join(self.bundle_root, MANIFEST_NAME),
+                  mode='w') as f:
+            json.dump(['templates'], f)
+
+        self.assertFalse(is_bundle_fresh(self.template_dir, self.bundle_root,
+                                         is_template))
+
+    def test_modules_removed(self):
+        modules_dir = compile_bundle(self.template_dir, self.bundle_root,
+                                     is_template)
+        shutil.rmtree(modules_dir)
+
+        self.assertFalse(is_bundle_fresh(self.template_dir, self.bundle_root,
+                                         is_template))
+
+    def test_compiled_again(self):
+        first = compile_bundle(self.template_dir, self.bundle_root,
+                               is_template)
+
+        with mock.patch.object(Environment, 'compile_templates',
+                               side_effect=AssertionError):
+            self.assertEqual(
+                compile_bundle(self.template_dir, self.bundle_root,
+                               is_template),
+                first,
+            )
+
+    def _list_temporary(self):
+        return [name for name in os.listdir(self.bundle_root)
+                if name.startswith('.tmp-')]
+
+    def test_compiled_concurrently(self):
+        def rename(src, dst):
+            # Other process renames the same bundle first
+            os.mkdir(dst)
+            raise OSError(dst)
+
+        with mock.patch.object(os, 'rename', side_effect=rename):
+            modules_dir = compile_bundle(self.template_dir, self.bundle_root,
+                                         is_template)
+
+        self.assertTrue(os.path.isdir(modules_dir))
+        self.assertFalse(self._list_temporary())
+
+    def test_rename_failed(self):
+        with mock.patch.object(os, 'rename', side_effect=OSError):
+            with self.assertRaises(OSError):
+                compile_bundle(self.template_dir, self.bundle_root,
+                               is_template)
+
+        self.assertEqual(os.listdir(self.bundle_root), [])
+
+    def test_manifest_write_failed(self):
+        with mock.patch.object(json, 'dump', side_effect=ValueError):
+            with self.assertRaises(ValueError):
+                compile_bundle(self.template_dir, self.bundle_root,
+                               is_template)
+
+        self.assertFalse(self._list_temporary())
+        self.assertFalse(os.path.exists(
+            os.path.join(self.bundle_root, MANIFEST_NAME)
+        ))
+
+    def test_manifest_replace_failed(self):
+        def replace(src, dst):
+            os.remove(src)
+            raise OSError(dst)
+
+        with mock.patch.object(os, 'replace', side_effect=replace):
+            with self.assertRaises(OSError):
+                compile_bundle(self.template_dir, self.bundle_root,
+                               is_template)
+
+        self.assertFalse(self._list_temporary())
+
+
+class CacheDirTest(unittest.TestCase):
+    def test_cache_dir(self):
+        with mock.patch.dict(os.environ, {
+                'BLANK_PROJECT_CACHE_DIR': '/cache',
+                'XDG_CACHE_HOME': '/xdg',
+        }):
+            self.assertEqual(get_cache_dir(), '/cache')
+
+    def test_xdg_cache_home(self):
+        with mock.patch.dict(os.environ, {'XDG_CACHE_HOME': '/xdg'}):
+            del os.environ['BLANK_PROJECT_CACHE_DIR']
+
+            self.assertEqual(get_cache_dir(), '/xdg/blank-project')
+
+    def test_home(self):
+        with mock.patch.dict(os.environ, {'HOME': '/home/user'}):
+            del os.environ['BLANK_PROJECT_CACHE_DIR']
+            os.environ.pop('XDG_CACHE_HOME', None)
+
+            self.assertEqual(get_cache_dir(),
+                             '/home/user/.cache/blank-project')
+
+
+class TemplatesBundleTest(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        patch = mock.patch.dict(os.environ, {
+            'BLANK_PROJECT_CACHE_DIR': self._tmpdir.name,
+        })
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+        gc.collect()
+
+    def test_compile_templates(self):
+        modules_dir = compile_templates()
+
+        self.assertEqual(os.path.dirname(modules_dir),
+                         get_bundle_root(TEMPLATE_PROJECT_DIR))
+        self.assertTrue(modules_dir.startswith(self._tmpdir.name))
+        self.assertTrue(os.listdir(modules_dir))
+
+    def test_unwritable_cache(self):
+        with mock.patch.object(blank_project, 'get_bundle_loader',
+                               side_effect=OSError):
+            loader = blank_project._create_loader('bundle')
+
+        self.assertIsInstance(loader, FileSystemLoader)
+        self.assertEqual(loader.searchpath, [TEMPLATE_PROJECT_DIR])
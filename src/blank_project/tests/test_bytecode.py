@@ -0,0 +1,186 @@
+import gc
+import multiprocessing
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from freezegun import freeze_time
+from jinja2 import Environment
+from jinja2 import FileSystemLoader
+
+import blank_project
+from blank_project import TEMPLATE_PROJECT_DIR
+from blank_project import Builder
+from blank_project import Config
+from blank_project import get_environment
+from blank_project import get_template_cache
+from blank_project.bytecode import AtomicBytecodeCache
+from blank_project.bytecode import get_bytecode_cache_dir
+
+
+def is_template(name):
+    return name.endswith('_template')
+
+
+def load_templates(directory):
+    environment = Environment(loader=FileSystemLoader(TEMPLATE_PROJECT_DIR),
+                              bytecode_cache=AtomicBytecodeCache(directory))
+    for name in environment.list_templates(filter_func=is_template):
+        environment.get_template(name)
+
+
+def read_tree(base_dir):
+    files = {}
+    for root, _, names in os.walk(base_dir):
+        for name in names:
+            full_path = os.path.join(root, name)
+            with open(full_path, mode='rb') as f:
+                files[os.path.relpath(full_path, base_dir)] = f.read()
+    return files
+
+
+class BytecodeCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self._tmpdir.name, 'bytecode')
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def create_environment(self):
+        return Environment(loader=FileSystemLoader(TEMPLATE_PROJECT_DIR),
+                           bytecode_cache=AtomicBytecodeCache(self.cache_dir))
+
+    def test_cache(self):
+        load_templates(self.cache_dir)
+
+        entries = os.listdir(self.cache_dir)
+        self.assertTrue(entries)
+        self.assertTrue(all(entry.endswith('.cache') for entry in entries))
+
+        environment = self.create_environment()
+        with mock.patch.object(Environment, 'compile',
+                               side_effect=AssertionError):
+            template = environment.get_template('.flake8_template')
+
+        self.assertEqual(template.render(line_length=79),
+                         '[flake8]\nmax-line-length=79\n')
+
+    def test_broken_entry(self):
+        load_templates(self.cache_dir)
+
+        for entry in os.listdir(self.cache_dir):
+            with open(os.path.join(self.cache_dir, entry), mode='wb') as f:
+                f.write(b'broken')
+
+        template = self.create_environment().get_template('.flake8_template')
+
+        self.assertEqual(template.render(line_length=79),
+                         '[flake8]\nmax-line-length=79\n')
+
+    def test_unwritable(self):
+        environment = self.create_environment()
+        os.rmdir(self.cache_dir)
+
+        template = environment.get_template('.flake8_template')
+
+        self.assertEqual(template.render(line_length=79),
+                         '[flake8]\nmax-line-length=79\n')
+
+    def test_replace_failed(self):
+        environment = self.create_environment()
+
+        with mock.patch.object(os, 'replace', side_effect=OSError):
+            template = environment.get_template('.flake8_template')
+
+        self.assertEqual(template.render(line_length=79),
+                         '[flake8]\nmax-line-length=79\n')
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_concurrent_processes(self):
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            self.skipTest('fork is not available')  # pragma: no cover
+
+        context = multiprocessing.get_context('fork')
+        processes = [context.Process(target=load_templates,
+                                     args=(self.cache_dir,))
+                     for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        self.assertEqual([process.exitcode for process in processes],
+                         [0] * 4)
+        self.assertFalse([entry for entry in os.listdir(self.cache_dir)
+                          if not entry.endswith('.cache')])
+
+        environment = self.create_environment()
+        with mock.patch.object(Environment, 'compile',
+                               side_effect=AssertionError):
+            for name in environment.list_templates(filter_func=is_template):
+                environment.get_template(name)
+
+
+class TemplateCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        patches = [
+            mock.patch.dict(os.environ, {
+                'BLANK_PROJECT_CACHE_DIR': self._tmpdir.name,
+            }),
+            mock.patch.object(blank_project, '_environments', {}),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+        # Drop the bundle ModuleLoader now (see BundleTest.tearDown)
+        gc.collect()
+
+    def test_get_template_cache(self):
+        self.assertEqual(get_template_cache(), 'bundle')
+        self.assertEqual(get_template_cache('none'), 'none')
+
+        with mock.patch.dict(os.environ, {'BLANK_PROJECT_NO_BUNDLE': '1'}):
+            self.assertEqual(get_template_cache(), 'bytecode')
+
+        with mock.patch.dict(os.environ,
+                             {'BLANK_PROJECT_TEMPLATE_CACHE': 'none'}):
+            self.assertEqual(get_template_cache(), 'none')
+
+        with self.assertRaises(ValueError):
+            get_template_cache('unknown')
+
+    def test_environments(self):
+        self.assertIsNone(get_environment('none').bytecode_cache)
+        self.assertIsInstance(get_environment('bytecode').bytecode_cache,
+                              AtomicBytecodeCache)
+        self.assertIs(get_environment('bytecode'),
+                      get_environment('bytecode'))
+        self.assertEqual(get_bytecode_cache_dir(),
+                         os.path.join(self._tmpdir.name, 'bytecode'))
+
+    def test_cache_dir_unusable(self):
+        with mock.patch('blank_project.bytecode.AtomicBytecodeCache',
+                        side_effect=OSError):
+            environment = get_environment('bytecode')
+
+        self.assertIsNone(environment.bytecode_cache)
+
+    @freeze_time('1970-01-01')
+    def test_same_build(self):
+        config = Config(name='project', author='author')
+        trees = []
+
+        for template_cache in ('bundle', 'bytecode', 'none'):
+            with tempfile.TemporaryDirectory() as tmpdir:
+                Builder(tmpdir, config, template_cache=template_cache).build()
+                trees.append(read_tree(tmpdir))
+
+        self.assertEqual(trees[0], trees[1])
+        self.assertEqual(trees[0], trees[2])
+        self.assertTrue(os.listdir(get_bytecode_cache_dir()))
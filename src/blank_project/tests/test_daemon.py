@@ -0,0 +1,224 @@
+import os
+import signal
+import socket
+import tempfile
+import threading
+import unittest
+from filecmp import dircmp
+from unittest import mock
+
+from freezegun import freeze_time
+
+from blank_project import Builder
+from blank_project import Config
+from blank_project.daemon import PING
+from blank_project.daemon import SHUTDOWN
+from blank_project.daemon import SOCKET_NAME
+from blank_project.daemon import WRITTEN
+from blank_project.daemon import Server
+from blank_project.daemon import build
+from blank_project.daemon import get_socket_path
+from blank_project.daemon import request
+from blank_project.daemon import serve
+
+
+class DaemonTest(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.tmpdir = self._tmpdir.name
+        self.socket_path = os.path.join(self.tmpdir, 'daemon.sock')
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def start_server(self):
+        server = Server(self.socket_path)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+
+        def stop():
+            server.shutdown()
+            thread.join()
+            server.server_close()
+
+        self.addCleanup(stop)
+        return server
+
+    def assertSameTree(self, left, right):
+        comparison = dircmp(left, right)
+        stack = [comparison]
+
+        while stack:
+            current = stack.pop()
+            self.assertEqual(current.left_only, [])
+            self.assertEqual(current.right_only, [])
+            self.assertEqual(current.diff_files, [])
+            stack.extend(current.subdirs.values())
+
+    @freeze_time('1970-01-01')
+    def test_build(self):
+        self.start_server()
+        params = dict(name='project', author='author', docs=False)
+        target = os.path.join(self.tmpdir, 'daemon')
+        expected = os.path.join(self.tmpdir, 'expected')
+
+        response = build(target, params, socket_path=self.socket_path)
+
+        self.assertTrue(response['ok'])
+        self.assertTrue(response['daemon'])
+        self.assertIn([WRITTEN, 'setup.py'], response['files'])
+        self.assertNotIn([WRITTEN, 'docs/Makefile'], response['files'])
+
+        Builder(expected, Config(**params)).build()
+        self.assertSameTree(expected, target)
+
+    def test_incremental(self):
+        self.start_server()
+        params = dict(name='project', author='author')
+        target = os.path.join(self.tmpdir, 'project')
+
+        build(target, params, socket_path=self.socket_path, incremental=True)
+        response = build(target, params, socket_path=self.socket_path,
+                         incremental=True)
+
+        self.assertTrue(response['files'])
+        self.assertTrue(all(status == 'unchanged'
+                            for status, _ in response['files']))
+
+    def test_errors(self):
+        self.start_server()
+
+        response = build(os.path.join(self.tmpdir, 'project'),
+                         dict(name='project'),
+                         socket_path=self.socket_path)
+        self.assertFalse(response['ok'])
+        self.assertIn('author', response['error'])
+
+        for message in [
+                {'command': 'unknown'},
+                {'dir': self.tmpdir,
+                 'config': dict(name='project', author='author'),
+                 'options': {'jobs': 2}},
+                [1],
+        ]:
+            with self.subTest(message=message):
+                response = request(message, self.socket_path)
+
+                self.assertFalse(response['ok'])
+
+    def test_fallback(self):
+        response = build(os.path.join(self.tmpdir, 'project'),
+                         dict(name='project', author='author'),
+                         socket_path=self.socket_path)
+
+        self.assertTrue(response['ok'])
+        self.assertFalse(response['daemon'])
+        self.assertTrue(os.path.exists(
+            os.path.join(self.tmpdir, 'project', 'setup.py')
+        ))
+
+    def test_already_running(self):
+        self.start_server()
+
+        self.assertTrue(request({'command': PING}, self.socket_path)['ok'])
+        with self.assertRaises(ValueError):
+            Server(self.socket_path)
+
+    def test_stale_socket(self):
+        server = self.start_server()
+        server.socket.close()
+
+        Server(self.socket_path).server_close()
+
+    def test_shutdown(self):
+        server = Server(self.socket_path)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+
+        self.assertTrue(request({'command': SHUTDOWN},
+                                self.socket_path)['ok'])
+        thread.join(timeout=5)
+        server.server_close()
+
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(os.path.exists(self.socket_path))
+
+    def start_closing_server(self, connections):
+        # Server reading the request and closing without a response
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.socket_path)
+        listener.listen(connections)
+
+        def accept():
+            for _ in range(connections):
+                connection, _ = listener.accept()
+                with connection, connection.makefile('rb') as f:
+                    f.readline()
+
+        thread = threading.Thread(target=accept)
+        thread.start()
+
+        def stop():
+            thread.join()
+            listener.close()
+
+        self.addCleanup(stop)
+
+    def test_closed_connection(self):
+        self.start_closing_server(2)
+
+        with self.assertRaises(ConnectionError):
+            request({'command': PING}, self.socket_path)
+
+        response = build(os.path.join(self.tmpdir, 'project'),
+                         dict(name='project', author='author'),
+                         socket_path=self.socket_path)
+
+        self.assertFalse(response['ok'])
+        self.assertTrue(response['daemon'])
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir,
+                                                     'project')))
+
+    def test_socket_path(self):
+        with mock.patch.dict(os.environ, {
+                'BLANK_PROJECT_SOCKET': self.socket_path,
+        }):
+            self.assertEqual(get_socket_path(), self.socket_path)
+
+            del os.environ['BLANK_PROJECT_SOCKET']
+
+            self.assertEqual(
+                get_socket_path(),
+                os.path.join(os.environ['BLANK_PROJECT_CACHE_DIR'],
+                             SOCKET_NAME),
+            )
+
+    def _serve(self, stop):
+        handler = signal.getsignal(signal.SIGTERM)
+        self.addCleanup(signal.signal, signal.SIGTERM, handler)
+
+        ready = threading.Event()
+        serve_forever = Server.serve_forever
+
+        def start(server):
+            ready.set()
+            serve_forever(server)
+
+        def wait_and_stop():
+            ready.wait(timeout=10)
+            stop()
+
+        thread = threading.Thread(target=wait_and_stop)
+        thread.start()
+
+        with mock.patch.object(Server, 'serve_forever', start):
+            serve(self.socket_path)
+        thread.join()
+
+        self.assertFalse(os.path.exists(self.socket_path))
+
+    def test_serve_shutdown(self):
+        self._serve(lambda: request({'command': SHUTDOWN}, self.socket_path))
+
+    def test_serve_terminated(self):
+        self._serve(lambda: os.kill(os.getpid(), signal.SIGTERM))
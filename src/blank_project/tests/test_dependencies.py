@@ -0,0 +1,142 @@
+import os
+import tempfile
+import unittest
+
+from freezegun import freeze_time
+
+from blank_project import Builder
+from blank_project import Config
+from blank_project.dependencies import get_changed_fields
+from blank_project.dependencies import get_dependency_graph
+from blank_project.plan import FILE_ACTIONS
+from blank_project.plan import NOT_AFFECTED
+from blank_project.plan import PACKAGE
+from blank_project.plan import RENDER
+from blank_project.profiler import Profiler
+
+
+def read_tree(base_dir):
+    files = {}
+    for root, _, names in os.walk(base_dir):
+        for name in names:
+            full_path = os.path.join(root, name)
+            with open(full_path, mode='rb') as f:
+                files[os.path.relpath(full_path, base_dir)] = f.read()
+    return files
+
+
+class DependencyGraphTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def write(self, name, content):
+        with open(os.path.join(self.tmpdir.name, name), mode='w') as f:
+            f.write(content)
+
+    def test_graph(self):
+        self.write('a.txt_template', '{{ name }}')
+        self.write('b.txt_template', '{% if docs %}{{ author }}{% endif %}')
+        self.write('c.txt_template', '{% include "part.txt" %}')
+        self.write('d.txt_template', '{% include part %}')
+        self.write('e.txt', '{{ name }}')
+        self.write('part.txt', '{{ line_length }}')
+
+        graph = get_dependency_graph(self.tmpdir.name, '_template')
+
+        self.assertEqual(graph.fields, {
+            'name': {'a.txt_template'},
+            'docs': {'b.txt_template'},
+            'author': {'b.txt_template'},
+            'line_length': {'c.txt_template'},
+        })
+        self.assertEqual(graph.dynamic, {'d.txt_template'})
+        self.assertEqual(graph.affected(['name']),
+                         {'a.txt_template', 'd.txt_template'})
+        self.assertEqual(graph.affected([]), set())
+
+    def test_changed_fields(self):
+        old = Config(name='project', author='author')
+        new = Config(name='project', author='other', coverage=-1)
+
+        self.assertEqual(
+            get_changed_fields(old.get_context(), new.get_context()),
+            {'author', 'coverage', 'coverage_fail'},
+        )
+        self.assertFalse(get_changed_fields(old.get_context(),
+                                            old.get_context()))
+
+
+@freeze_time('2001-01-01')
+class UpdateTest(unittest.TestCase):
+    def check_update(self, old, new):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            updated = os.path.join(tmpdir, 'updated')
+            expected = os.path.join(tmpdir, 'expected')
+
+            Builder(updated, Config(**old)).build()
+            Builder(updated, Config(**new)).update(Config(**old))
+            Builder(expected, Config(**new)).build()
+
+            updated_files = read_tree(updated)
+            expected_files = read_tree(expected)
+
+        # Files the new config doesn't need are left in place
+        self.assertLessEqual(set(expected_files), set(updated_files))
+        for name, content in expected_files.items():
+            self.assertEqual(updated_files[name], content, name)
+
+    def test_update(self):
+        base = dict(name='project', author='author')
+        changes = (
+            dict(line_length=120),
+            dict(author='other'),
+            dict(name='other'),
+            dict(python2=True),
+            dict(docs=False),
+            dict(coverage=-1),
+        )
+
+        for change in changes:
+            with self.subTest(**change):
+                self.check_update(base, dict(base, **change))
+                self.check_update(dict(base, **change), base)
+
+    def test_affected_only(self):
+        old = Config(name='project', author='author')
+        new = Config(name='project', author='author', line_length=120)
+        profiler = Profiler()
+
+        actions = Builder('unused', new).plan_update(old)
+
+        self.assertEqual(
+            {action.target for action in actions if action.kind == RENDER},
+            {'.flake8', '.isort.cfg'},
+        )
+        self.assertFalse([action for action in actions
+                          if action.kind == PACKAGE])
+        self.assertIn(NOT_AFFECTED, {action.reason for action in actions})
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            Builder(tmpdir, old).build()
+            Builder(tmpdir, new, profiler=profiler).update(old)
+
+        self.assertEqual(
+            sorted(event.target for event in profiler.events
+                   if event.kind in ('render', 'copy')),
+            ['.flake8', '.isort.cfg'],
+        )
+
+    def test_same_config(self):
+        config = Config(name='project', author='author')
+
+        actions = Builder('unused', config).plan_update(config)
+
+        self.assertFalse([action for action in actions
+                          if action.kind in FILE_ACTIONS])
+        self.assertEqual(
+            Builder('unused', config).plan_update(
+                config, files=Builder._get_index()
+            ),
+            actions,
+        )
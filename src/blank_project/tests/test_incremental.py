@@ -0,0 +1,163 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from blank_project import Builder
+from blank_project import Config
+from blank_project.incremental import LOCK_NAME
+from blank_project.incremental import UPDATED
+from blank_project.incremental import Lock
+from blank_project.incremental import hash_bytes
+
+
+def mtimes(base_dir):
+    result = {}
+    for root, _, files in os.walk(base_dir):
+        for name in files:
+            full_path = os.path.join(root, name)
+            result[os.path.relpath(full_path, base_dir)] = \
+                os.stat(full_path).st_mtime_ns
+    return result
+
+
+class IncrementalBuildTest(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.base_dir = self._tmpdir.name
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def build(self, **config):
+        builder = Builder(self.base_dir,
+                          Config(name='project', author='author', **config),
+                          incremental=True)
+        builder.build()
+        return builder.report
+
+    def test_first_build(self):
+        report = self.build()
+
+        self.assertEqual(report.updated, [])
+        self.assertEqual(report.unchanged, [])
+        self.assertIn('setup.py', report.new)
+        self.assertIn('docs/Makefile', report.new)
+
+        with open(os.path.join(self.base_dir, LOCK_NAME)) as f:
+            lock = json.load(f)
+
+        self.assertEqual(sorted(lock['files']), sorted(report.new))
+
+    def test_unchanged(self):
+        first = self.build()
+        before = mtimes(self.base_dir)
+
+        report = self.build()
+
+        self.assertEqual(report.new, [])
+        self.assertEqual(report.updated, [])
+        self.assertEqual(sorted(report.unchanged), sorted(first.new))
+
+        after = mtimes(self.base_dir)
+        after.pop(LOCK_NAME)
+        before.pop(LOCK_NAME)
+        self.assertEqual(before, after)
+
+    def test_changed_config(self):
+        self.build()
+
+        report = self.build(line_length=120)
+
+        self.assertEqual(report.new, [])
+        self.assertEqual(sorted(report.updated), ['.flake8', '.isort.cfg'])
+
+        with open(os.path.join(self.base_dir, '.flake8')) as f:
+            self.assertEqual(f.read(), '[flake8]\nmax-line-length=120\n')
+
+    def test_changed_files(self):
+        self.build()
+
+        os.remove(os.path.join(self.base_dir, 'setup.py'))
+        with open(os.path.join(self.base_dir, 'mypy.ini'), mode='a') as f:
+            f.write('\n[mypy-foo.*]\n')
+
+        report = self.build()
+
+        self.assertEqual(report.new, ['setup.py'])
+        self.assertEqual(report.updated, ['mypy.ini'])
+
+        reference = os.path.join(self.base_dir, 'reference')
+        Builder(reference, Config(name='project', author='author')).build()
+
+        for file_path in ('setup.py', 'mypy.ini'):
+            with open(os.path.join(self.base_dir, file_path)) as left:
+                with open(os.path.join(reference, file_path)) as right:
+                    self.assertEqual(left.read(), right.read())
+
+    def test_without_lock(self):
+        Builder(self.base_dir, Config(name='project', author='author')).build()
+
+        report = self.build()
+
+        self.assertEqual(report.new, [])
+        self.assertEqual(report.updated, [])
+        self.assertTrue(os.path.exists(os.path.join(self.base_dir,
+                                                    LOCK_NAME)))
+
+    def test_broken_lock(self):
+        self.build()
+
+        with open(os.path.join(self.base_dir, LOCK_NAME), mode='w') as f:
+            f.write('{')
+
+        report = self.build()
+
+        self.assertEqual(report.new, [])
+        self.assertEqual(report.updated, [])
+
+
+class LockTest(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.base_dir = self._tmpdir.name
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def test_other_version(self):
+        with open(os.path.join(self.base_dir, LOCK_NAME), mode='w') as f:
+            json.dump({'version': 0, 'files': {'setup.py': []}}, f)
+
+        self.assertEqual(Lock(self.base_dir).load().entries, {})
+
+    def test_unreadable_file(self):
+        os.mkdir(os.path.join(self.base_dir, 'setup.py'))
+
+        self.assertEqual(
+            Lock(self.base_dir).compare(
+                'setup.py', os.path.join(self.base_dir, 'setup.py'),
+                hash_bytes(b'')
+            ),
+            UPDATED,
+        )
+
+    def test_save_failed(self):
+        def replace(src, dst):
+            os.remove(src)
+            raise OSError(dst)
+
+        cases = [
+            (json, 'dump', ValueError),
+            (os, 'replace', replace),
+        ]
+
+        for target, name, side_effect in cases:
+            with self.subTest(name=name):
+                with mock.patch.object(target, name,
+                                       side_effect=side_effect):
+                    with self.assertRaises((OSError, ValueError)):
+                        Lock(self.base_dir).save()
+
+                self.assertEqual(os.listdir(self.base_dir), [])
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+from blank_project import TEMPLATE_PROJECT_DIR
+from blank_project import Builder
+from blank_project.index import TemplateFile
+from blank_project.index import TemplateIndex
+from blank_project.index import get_template_index
+from blank_project.index import scan_template_dir
+
+
+class TemplateIndexTest(unittest.TestCase):
+    def test_template_project(self):
+        expected = []
+        for root, _, files in os.walk(TEMPLATE_PROJECT_DIR):
+            for name in files:
+                full_path = os.path.join(root, name)
+                relative = os.path.relpath(full_path, TEMPLATE_PROJECT_DIR)
+                relative = relative.replace(os.sep, '/')
+                is_template = name.endswith('_template')
+                expected.append(TemplateFile(
+                    path=relative,
+                    target=(relative[:-len('_template')] if is_template
+                            else relative),
+                    is_template=is_template,
+                    size=os.path.getsize(full_path),
+                ))
+
+        index = scan_template_dir(TEMPLATE_PROJECT_DIR, '_template')
+
+        self.assertEqual(tuple(index), tuple(sorted(expected)))
+        self.assertEqual(index.paths, tuple(f.path for f in sorted(expected)))
+        self.assertIn(TemplateFile(path='setup.py_template',
+                                   target='setup.py',
+                                   is_template=True,
+                                   size=os.path.getsize(os.path.join(
+                                       TEMPLATE_PROJECT_DIR,
+                                       'setup.py_template'
+                                   ))),
+                      index)
+
+    def test_cached(self):
+        self.assertIs(
+            get_template_index(TEMPLATE_PROJECT_DIR, '_template'),
+            Builder._get_index(),
+        )
+
+    def test_prefix_in_path(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            directory = os.path.join(tmpdir, 'template')
+            nested = os.path.join(directory, 'sub', tmpdir.lstrip(os.sep),
+                                  'template')
+            os.makedirs(nested)
+
+            with open(os.path.join(nested, 'file_template'), mode='w') as f:
+                f.write('content')
+
+            relative = '/'.join(['sub'] + tmpdir.lstrip(os.sep).split(os.sep)
+                                + ['template', 'file_template'])
+
+            index = scan_template_dir(directory, '_template')
+
+            self.assertEqual(tuple(index), (
+                TemplateFile(path=relative,
+                             target=relative[:-len('_template')],
+                             is_template=True,
+                             size=7),
+            ))
+
+    def test_sequence(self):
+        files = [
+            TemplateFile(path='b', target='b', is_template=False, size=1),
+            TemplateFile(path='a_template', target='a', is_template=True,
+                         size=2),
+        ]
+        index = TemplateIndex(files)
+
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index[0], files[1])
+        self.assertEqual(index[-1], files[0])
+        self.assertEqual(index[:1], (files[1],))
+        self.assertEqual(index, TemplateIndex(reversed(files)))
+        self.assertNotEqual(index, TemplateIndex(files[:1]))
+        self.assertNotEqual(index, tuple(index))
+        self.assertEqual(hash(index), hash(TemplateIndex(reversed(files))))
+        self.assertEqual(
+            repr(index),
+            f'TemplateIndex([{files[1]!r}, {files[0]!r}])',
+        )
@@ -0,0 +1,113 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from blank_project.manifest import load_manifest
+
+
+class ManifestTest(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def _write(self, name, content):
+        manifest_path = os.path.join(self._tmpdir.name, name)
+        with open(manifest_path, mode='w') as f:
+            f.write(content)
+        return manifest_path
+
+    def test_json(self):
+        manifest_path = self._write('manifest.json', json.dumps([
+            {'name': 'foo', 'author': 'author'},
+            {'name': 'bar', 'author': 'author', 'dir': 'services/bar',
+             'python2': True, 'coverage': -1, 'docs': 0},
+        ]))
+
+        self.assertEqual(load_manifest(manifest_path), [
+            {'name': 'foo', 'author': 'author', 'dir': 'foo'},
+            {'name': 'bar', 'author': 'author', 'dir': 'services/bar',
+             'python2': True, 'coverage': -1, 'docs': False},
+        ])
+
+    def test_json_object(self):
+        manifest_path = self._write('manifest.json', json.dumps({
+            'projects': [{'name': 'foo', 'author': 'author'}],
+        }))
+
+        self.assertEqual(load_manifest(manifest_path), [
+            {'name': 'foo', 'author': 'author', 'dir': 'foo'},
+        ])
+
+    def test_csv(self):
+        manifest_path = self._write(
+            'manifest.csv',
+            'dir,name,author,line_length,docs\n'
+            'a,foo,author,120,false\n'
+            ',bar,author,,yes\n'
+        )
+
+        self.assertEqual(load_manifest(manifest_path), [
+            {'name': 'foo', 'author': 'author', 'dir': 'a',
+             'line_length': 120, 'docs': False},
+            {'name': 'bar', 'author': 'author', 'dir': 'bar', 'docs': True},
+        ])
+
+    def test_toml(self):
+        manifest_path = self._write(
+            'manifest.toml',
+            '[[projects]]\n'
+            'name = "foo"\n'
+            'author = "author"\n'
+            'mypy = false\n'
+        )
+
+        expected = [
+            {'name': 'foo', 'author': 'author', 'dir': 'foo', 'mypy': False},
+        ]
+
+        self.assertEqual(load_manifest(manifest_path), expected)
+
+        # toml package is used before python 3.11
+        with mock.patch.dict(sys.modules, {'tomllib': None}):
+            self.assertEqual(load_manifest(manifest_path), expected)
+
+    def test_toml_errors(self):
+        manifest_path = self._write('manifest.toml', 'projects = 1\n')
+
+        with self.assertRaises(ValueError):
+            load_manifest(manifest_path)
+
+        with mock.patch.dict(sys.modules, {'tomllib': None, 'toml': None}):
+            with self.assertRaises(ValueError):
+                load_manifest(self._write('manifest.toml', ''))
+
+    def test_errors(self):
+        cases = [
+            ('manifest.yaml', ''),
+            ('manifest.json', '{}'),
+            ('manifest.json', '[{"name": "foo"}]'),
+            ('manifest.json', '[{"name": "foo", "author": "a", "x": 1}]'),
+            ('manifest.json', '[{"name": "foo", "author": "a", "docs": 2.5}]'),
+            ('manifest.json', '[["foo", "a"]]'),
+            ('manifest.json', '[{"name": "foo", "author": "a", "docs": "x"}]'),
+            ('manifest.json',
+             '[{"name": "foo", "author": "a", "line_length": true}]'),
+            ('manifest.json',
+             '[{"name": "foo", "author": "a", "line_length": null}]'),
+            ('manifest.json',
+             '[{"name": "foo", "author": "a", "line_length": [79]}]'),
+            ('manifest.json', '[{"name": null, "author": "a"}]'),
+            ('manifest.csv', 'name,author,line_length\nfoo,a,long\n'),
+            ('manifest.csv', 'name,author\nfoo,a,79\n'),
+            ('manifest.csv', 'name,author,line_length\nfoo\n'),
+        ]
+
+        for name, content in cases:
+            with self.subTest(name=name, content=content):
+                with self.assertRaises(ValueError):
+                    load_manifest(self._write(name, content))
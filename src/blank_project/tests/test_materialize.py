@@ -0,0 +1,163 @@
+import errno
+import os
+import tempfile
+import unittest
+from filecmp import cmp
+from unittest import mock
+
+import blank_project.materialize as module
+from blank_project import TEMPLATE_PROJECT_DIR
+from blank_project import Builder
+from blank_project import Config
+from blank_project.materialize import COPY
+from blank_project.materialize import COPY_FILE_RANGE
+from blank_project.materialize import HARDLINK
+from blank_project.materialize import REFLINK
+from blank_project.materialize import SENDFILE
+from blank_project.materialize import STRATEGIES
+from blank_project.materialize import SYMLINK
+from blank_project.materialize import materialize_file
+
+
+class MaterializeTest(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self._tmpdir.name, 'src')
+        with open(self.src, mode='wb') as f:
+            f.write(os.urandom(200000))
+
+    def tearDown(self):
+        module._unsupported.clear()
+        self._tmpdir.cleanup()
+
+    def test_strategies(self):
+        for strategy in STRATEGIES:
+            with self.subTest(strategy=strategy):
+                dst = os.path.join(self._tmpdir.name, strategy)
+
+                used = materialize_file(self.src, dst, strategy)
+
+                self.assertIn(used, module.FALLBACKS[strategy])
+                self.assertTrue(cmp(self.src, dst, shallow=False))
+
+                # Overwriting
+                materialize_file(self.src, dst, strategy)
+                self.assertTrue(cmp(self.src, dst, shallow=False))
+
+    def test_copy_over_link(self):
+        for strategy in (HARDLINK, SYMLINK):
+            with self.subTest(strategy=strategy):
+                dst = os.path.join(self._tmpdir.name, strategy)
+
+                if materialize_file(self.src, dst, strategy) != strategy:
+                    continue  # pragma: no cover
+
+                with open(self.src, mode='rb') as f:
+                    content = f.read()
+
+                other = os.path.join(self._tmpdir.name, 'other')
+                with open(other, mode='wb') as f:
+                    f.write(b'other')
+
+                materialize_file(other, dst, COPY)
+
+                with open(self.src, mode='rb') as f:
+                    self.assertEqual(f.read(), content)
+
+                self.assertTrue(cmp(other, dst, shallow=False))
+
+    def test_fallback(self):
+        dst = os.path.join(self._tmpdir.name, 'dst')
+        error = OSError(errno.EXDEV, 'Invalid cross-device link')
+
+        with mock.patch.object(module.os, 'link',
+                               side_effect=error) as link:
+            self.assertEqual(materialize_file(self.src, dst, HARDLINK), COPY)
+            self.assertEqual(materialize_file(self.src, dst, HARDLINK), COPY)
+
+            # Unsupported strategy isn't tried again on the same device
+            self.assertEqual(link.call_count, 1)
+
+        self.assertTrue(cmp(self.src, dst, shallow=False))
+
+    def test_unavailable(self):
+        dst = os.path.join(self._tmpdir.name, 'dst')
+
+        with mock.patch.object(module.sys, 'platform', 'darwin'), \
+                mock.patch.dict(module.os.__dict__):
+            module.os.__dict__.pop('copy_file_range', None)
+
+            self.assertEqual(materialize_file(self.src, dst, REFLINK), COPY)
+
+        self.assertTrue(cmp(self.src, dst, shallow=False))
+
+    def test_source_truncated(self):
+        # Copy stops at the end of the source shorter than its size
+        cases = [
+            (COPY_FILE_RANGE, 'copy_file_range'),
+            (SENDFILE, 'sendfile'),
+        ]
+
+        for strategy, function in cases:
+            with self.subTest(strategy=strategy):
+                dst = os.path.join(self._tmpdir.name, strategy)
+
+                # os.copy_file_range is missing before python 3.8
+                with mock.patch.object(module.os, function, return_value=0,
+                                       create=True):
+                    self.assertEqual(materialize_file(self.src, dst,
+                                                      strategy),
+                                     strategy)
+
+                self.assertEqual(os.path.getsize(dst), 0)
+
+    def test_copy_file_range_chunks(self):
+        dst = os.path.join(self._tmpdir.name, 'dst')
+
+        def copy_file_range(src_fd, dst_fd, count):
+            return os.write(dst_fd, os.read(src_fd, min(count, 65536)))
+
+        with mock.patch.object(module.os, 'copy_file_range',
+                               side_effect=copy_file_range,
+                               create=True) as function:
+            self.assertEqual(materialize_file(self.src, dst, COPY_FILE_RANGE),
+                             COPY_FILE_RANGE)
+
+        self.assertEqual(function.call_count, 4)
+        self.assertTrue(cmp(self.src, dst, shallow=False))
+
+    def test_error(self):
+        dst = os.path.join(self._tmpdir.name, 'dst')
+        error = OSError(errno.EACCES, 'Permission denied')
+
+        with mock.patch.object(module.os, 'replace', side_effect=error):
+            with self.assertRaises(OSError):
+                materialize_file(self.src, dst, HARDLINK)
+
+        # Failed strategy doesn't leave the temporary link behind
+        self.assertEqual(sorted(os.listdir(self._tmpdir.name)), ['src'])
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            materialize_file(self.src,
+                             os.path.join(self._tmpdir.name, 'dst'),
+                             'teleport')
+
+        with self.assertRaises(ValueError):
+            Builder(self._tmpdir.name, Config(name='project', author='author'),
+                    materialize='teleport')
+
+    def test_builder(self):
+        for strategy in STRATEGIES:
+            with self.subTest(strategy=strategy):
+                base_dir = os.path.join(self._tmpdir.name, 'project', strategy)
+
+                Builder(base_dir, Config(name='project', author='author'),
+                        materialize=strategy).build()
+
+                for file_path in ('.pylintrc', 'docs/Makefile'):
+                    self.assertTrue(cmp(
+                        os.path.join(TEMPLATE_PROJECT_DIR, file_path),
+                        os.path.join(base_dir, file_path),
+                        shallow=False,
+                    ))
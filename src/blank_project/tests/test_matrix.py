@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+
+from freezegun import freeze_time
+
+from blank_project import Builder
+from blank_project import Config
+from blank_project.matrix import MatrixStats
+from blank_project.matrix import get_matrix_dir
+from blank_project.matrix import get_render_key
+from blank_project.matrix import iterate_matrix
+
+
+AXES = {
+    'name': ['foo', 'bar'],
+    'author': ['author'],
+    'python2': [False, True],
+    'docs': [False, True],
+    'coverage': [-1, 80],
+}
+
+
+def read_tree(base_dir):
+    files = {}
+    for root, _, names in os.walk(base_dir):
+        for name in names:
+            full_path = os.path.join(root, name)
+            with open(full_path, mode='rb') as f:
+                files[os.path.relpath(full_path, base_dir)] = f.read()
+    return files
+
+
+class MatrixTest(unittest.TestCase):
+    def test_iterate_matrix(self):
+        self.assertEqual(
+            list(iterate_matrix({'name': ['foo'], 'docs': [False, True]})),
+            [{'name': 'foo', 'docs': False}, {'name': 'foo', 'docs': True}],
+        )
+        self.assertEqual(len(list(iterate_matrix(AXES))), 16)
+
+    def test_get_matrix_dir(self):
+        params = {'name': 'foo', 'author': 'author', 'docs': True}
+
+        self.assertEqual(
+            get_matrix_dir(params, {'name': ['foo', 'bar'],
+                                    'author': ['author'],
+                                    'docs': [False, True]}),
+            'name=foo,docs=True',
+        )
+        self.assertEqual(get_matrix_dir(params, {'name': ['foo']}), 'foo')
+
+    def test_get_render_key(self):
+        foo = Config(name='foo', author='author').get_context()
+        bar = Config(name='bar', author='author').get_context()
+
+        self.assertEqual(get_render_key('t', frozenset({'author'}), foo),
+                         get_render_key('t', frozenset({'author'}), bar))
+        self.assertNotEqual(get_render_key('t', None, foo),
+                            get_render_key('t', None, bar))
+
+    @freeze_time('1970-01-01')
+    def test_build_matrix(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            matrix_dir = os.path.join(tmpdir, 'matrix')
+            stats = Builder.build_matrix(matrix_dir, AXES)
+
+            self.assertEqual(len(os.listdir(matrix_dir)), 16)
+
+            for i, params in enumerate(iterate_matrix(AXES)):
+                single = os.path.join(tmpdir, f'single{i}')
+                Builder(single, Config(**params)).build()
+
+                with self.subTest(**params):
+                    self.assertEqual(
+                        read_tree(os.path.join(
+                            matrix_dir, get_matrix_dir(params, AXES)
+                        )),
+                        read_tree(single),
+                    )
+
+        self.assertEqual(stats.projects, 16)
+        self.assertGreater(stats.saved, 0)
+        self.assertEqual(stats.renders, stats.unique + stats.saved)
+
+    def test_dir_format(self):
+        axes = {'name': ['foo'], 'author': ['author'],
+                'line_length': [79, 120]}
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            stats = Builder.build_matrix(tmpdir, axes,
+                                         dir_format='{name}/{line_length}',
+                                         incremental=True)
+
+            self.assertEqual(sorted(os.listdir(os.path.join(tmpdir, 'foo'))),
+                             ['120', '79'])
+            with open(os.path.join(tmpdir, 'foo', '120', '.flake8')) as f:
+                self.assertIn('max-line-length=120', f.read())
+
+        # Only templates reading line_length are rendered twice
+        templates = sum(1 for action in Builder(
+            'unused', Config(name='foo', author='author')
+        ).plan() if action.kind == 'render')
+        self.assertEqual(stats, MatrixStats(projects=2,
+                                            renders=templates * 2,
+                                            unique=templates + 2))
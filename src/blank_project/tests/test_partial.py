@@ -0,0 +1,330 @@
+import multiprocessing
+import os
+import pickle
+import tempfile
+import unittest
+from typing import Any
+from typing import Dict
+from typing import Tuple
+from unittest import mock
+
+from freezegun import freeze_time
+from jinja2 import Environment
+from jinja2 import FileSystemLoader
+
+import blank_project.partial as module
+from blank_project import TEMPLATE_PROJECT_DIR
+from blank_project import Builder
+from blank_project import Config
+from blank_project import get_environment
+from blank_project.analysis import get_parse_environment
+from blank_project.partial import PartialTemplate
+from blank_project.partial import PartialTemplates
+from blank_project.partial import can_specialize
+from blank_project.partial import compile_plain
+from blank_project.partial import get_plain_template
+from blank_project.partial import get_variable_fields
+from blank_project.partial import specialize
+
+
+def read_tree(base_dir):
+    files = {}
+    for root, _, names in os.walk(base_dir):
+        for name in names:
+            full_path = os.path.join(root, name)
+            with open(full_path, mode='rb') as f:
+                files[os.path.relpath(full_path, base_dir)] = f.read()
+    return files
+
+
+class SpecializeTest(unittest.TestCase):
+    def check(self, source, variables):
+        return can_specialize(get_parse_environment().parse(source),
+                              frozenset(variables))
+
+    def test_can_specialize(self):
+        self.assertTrue(self.check('{{ name }}{% if docs %}x{% endif %}',
+                                   ['name']))
+        self.assertTrue(self.check('{% for i in range(3) %}{{ name }}'
+                                   '{% endfor %}', ['name']))
+        self.assertFalse(self.check('{% if name %}x{% endif %}', ['name']))
+        self.assertFalse(self.check('{{ name|upper }}', ['name']))
+        self.assertFalse(self.check('{{ name ~ "x" }}', ['name']))
+        self.assertFalse(self.check('{% set name = "x" %}{{ name }}',
+                                    ['name']))
+        self.assertFalse(self.check('{% filter upper %}{{ name }}'
+                                    '{% endfilter %}', ['name']))
+        self.assertFalse(self.check('{% include "x" %}', []))
+
+    def test_specialize(self):
+        source = ('[{{ name }}]\n'
+                  '{% if docs %}docs = {{ name }}/docs\n{% endif %}'
+                  'line_length = {{ line_length }}\n')
+        template = Environment().from_string(source)
+
+        partial = specialize(template, get_parse_environment().parse(source),
+                             {'docs': True, 'line_length': 79},
+                             frozenset({'name'}))
+
+        self.assertEqual(partial, PartialTemplate(
+            chunks=('[', ']\ndocs = ', '/docs\nline_length = 79'),
+            slots=('name', 'name'),
+        ))
+        context = {'name': 'foo', 'docs': True, 'line_length': 79}
+        self.assertEqual(partial.render(context), template.render(context))
+        self.assertEqual(partial.render({}),
+                         template.render(docs=True, line_length=79))
+
+    def test_get_variable_fields(self):
+        self.assertEqual(
+            get_variable_fields([{'a': 1, 'b': 2}, {'a': 1, 'b': 3},
+                                 {'a': 1, 'b': 2, 'c': 4}]),
+            ({'a': 1}, frozenset({'b', 'c'})),
+        )
+        self.assertEqual(get_variable_fields([]), ({}, frozenset()))
+
+
+class PlainTemplateTest(unittest.TestCase):
+    SOURCES = (
+        '',
+        'text only\n',
+        '# {{ name }}\n',
+        '{{ name }}-{{ author }}\n\n',
+        '  {{- name -}}  \n{{ line_length }}',
+        '{# comment #}{{ name }}{% raw %}{{ author }}{% endraw %}',
+        '{{ missing }}|{{ python2 }}|{{ value }}',
+    )
+    CONTEXTS: Tuple[Dict[str, Any], ...] = (
+        {},
+        {'name': 'foo', 'author': 'bar', 'line_length': 79,
+         'python2': True, 'value': None},
+        {'name': 'ёлка <&>', 'author': '', 'line_length': 0},
+    )
+
+    def test_compile_plain(self):
+        environment = Environment()
+
+        for source in self.SOURCES:
+            plain = compile_plain(get_parse_environment().parse(source))
+            self.assertIsNotNone(plain, source)
+
+            for context in self.CONTEXTS:
+                with self.subTest(source=source, context=context):
+                    self.assertEqual(
+                        plain.render(context),
+                        environment.from_string(source).render(context),
+                    )
+
+    def test_not_plain(self):
+        sources = (
+            '{% if docs %}docs{% endif %}',
+            '{{ name|upper }}',
+            '{{ name.upper() }}',
+            '{{ "x" }}',
+            '{{ range }}',
+            '{% set name = "x" %}{{ name }}',
+        )
+
+        for source in sources:
+            with self.subTest(source=source):
+                self.assertIsNone(
+                    compile_plain(get_parse_environment().parse(source))
+                )
+
+    def test_large_template(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, 'large'), mode='w') as f:
+                f.write('# {{ name }}\n')
+
+            with mock.patch.object(module, 'PLAIN_TEMPLATE_MAX_SIZE', 8):
+                self.assertIsNone(get_plain_template(tmpdir, 'large'))
+
+    @freeze_time('1970-01-01')
+    def test_project_templates(self):
+        environment = get_environment()
+        configs = (
+            Config(name='project', author='author'),
+            Config(name='other', author='someone', line_length=120,
+                   python2=True, docs=False, coverage=-1),
+        )
+        plain = 0
+
+        for template_file in Builder._get_index():
+            if not template_file.is_template:
+                continue
+
+            template = get_plain_template(TEMPLATE_PROJECT_DIR,
+                                          template_file.path)
+            if template is None:
+                continue
+
+            plain += 1
+            for config in configs:
+                with self.subTest(name=template_file.path,
+                                  config=config.name):
+                    self.assertEqual(
+                        template.render(config.get_context()),
+                        environment.get_template(
+                            template_file.path
+                        ).render(config.get_context()),
+                    )
+
+        self.assertGreater(plain, 0)
+
+
+@freeze_time('1970-01-01')
+class PartialTemplatesTest(unittest.TestCase):
+    def get_configs(self, **params):
+        return [Config(name=f'project{i}', author=f'author{i}', **params)
+                for i in range(3)]
+
+    def test_project_templates(self):
+        environment = get_environment()
+        templates = [template_file.path
+                     for template_file in Builder._get_index()
+                     if template_file.is_template]
+
+        for params in ({}, {'python2': True, 'docs': False, 'coverage': -1},
+                       {'mypy': False, 'line_length': 120}):
+            configs = self.get_configs(**params)
+            partial = PartialTemplates.from_contexts(
+                TEMPLATE_PROJECT_DIR,
+                [config.get_context() for config in configs],
+            )
+
+            for name in templates:
+                for config in configs:
+                    with self.subTest(name=name, **params):
+                        template = environment.get_template(name)
+                        self.assertEqual(
+                            partial.render(name, config.get_context(),
+                                           lambda: template),
+                            template.render(config.get_context()),
+                        )
+
+            self.assertEqual(partial.stats['rendered'], 0)
+
+    def test_build_many(self):
+        configs = self.get_configs(docs=False)
+        partial = PartialTemplates.from_contexts(
+            TEMPLATE_PROJECT_DIR, [config.get_context() for config in configs]
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            projects = [(os.path.join(tmpdir, config.name), config)
+                        for config in configs]
+            Builder.build_many(projects, partial=partial)
+            trees = [read_tree(base_dir) for base_dir, _ in projects]
+
+            for base_dir, config in projects:
+                Builder(base_dir, config).build()
+
+            self.assertEqual(trees,
+                             [read_tree(base_dir) for base_dir, _ in projects])
+
+        self.assertGreater(partial.stats['filled'], 0)
+
+    def test_fallback(self):
+        partial = PartialTemplates.from_contexts(
+            TEMPLATE_PROJECT_DIR,
+            [config.get_context() for config in self.get_configs()],
+        )
+        other = Config(name='other', author='author', docs=False)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            Builder(tmpdir, other, partial=partial).build()
+
+            with open(os.path.join(tmpdir, 'requirements', 'dev.txt')) as f:
+                self.assertNotIn('sphinx', f.read())
+
+        self.assertEqual(partial.stats['filled'], 0)
+        self.assertGreater(partial.stats['rendered'], 0)
+
+    def test_not_specialized(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            sources = {
+                'filter_template': '{{ name|upper }}',
+                'nul_template': '\x00{{ name }}',
+            }
+            for name, source in sources.items():
+                with open(os.path.join(tmpdir, name), mode='w') as f:
+                    f.write(source)
+
+            environment = Environment(loader=FileSystemLoader(tmpdir))
+            partial = PartialTemplates(tmpdir, {'docs': True},
+                                       frozenset({'name'}))
+
+            for context in ({'docs': True, 'name': 'foo'}, {'name': 'foo'}):
+                for name in sources:
+                    with self.subTest(name=name, context=context):
+                        template = environment.get_template(name)
+                        self.assertEqual(
+                            partial.render(name, context, lambda: template),
+                            template.render(context),
+                        )
+
+        self.assertEqual(partial.stats,
+                         {'filled': 0, 'rendered': 4, 'specialized': 0})
+
+    def test_pickle(self):
+        partial = PartialTemplates.from_contexts(
+            TEMPLATE_PROJECT_DIR,
+            [config.get_context() for config in self.get_configs()],
+        )
+        template = get_environment().get_template('README.md_template')
+        partial.get('README.md_template', lambda: template)
+
+        restored = pickle.loads(pickle.dumps(partial))
+
+        self.assertEqual(restored.variables, {'name', 'author'})
+        self.assertEqual(restored.stats['specialized'], 0)
+
+
+class PartialJobsTest(unittest.TestCase):
+    # No freezegun here, it doesn't survive forking the workers
+    def setUp(self):
+        configs = [Config(name=f'project{i}', author=f'author{i}')
+                   for i in range(4)]
+        self.partial = PartialTemplates.from_contexts(
+            TEMPLATE_PROJECT_DIR, [config.get_context() for config in configs]
+        )
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.projects = [(os.path.join(self._tmpdir.name, config.name), config)
+                         for config in configs]
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def test_build_many(self):
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            self.skipTest('fork is not available')  # pragma: no cover
+
+        Builder.build_many(self.projects, jobs=2, partial=self.partial)
+        stats = self.partial.stats
+
+        # Workers inherit the templates specialized in this process
+        with mock.patch.object(module, 'specialize',
+                               side_effect=AssertionError):
+            results = Builder.build_many(self.projects, jobs=2,
+                                         partial=self.partial)
+
+        self.assertTrue(all(result.ok for result in results))
+        self.assertGreater(stats['filled'], 0)
+        self.assertEqual(self.partial.stats, {
+            'filled': 2 * stats['filled'],
+            'rendered': 0,
+            'specialized': stats['specialized'],
+        })
+
+    def test_worker_counts(self):
+        base_dir, config = self.projects[0]
+        batch = (Builder._get_index(), {'partial': self.partial})
+
+        result, counts, _ = Builder._build_in_worker(base_dir, config, -1,
+                                                     batch)
+
+        self.assertTrue(result.ok)
+        self.assertEqual(counts, {'partial': {
+            'filled': self.partial.filled, 'rendered': 0,
+        }})
+        self.assertGreater(self.partial.filled, 0)
@@ -0,0 +1,138 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import blank_project.sinks
+from blank_project import Builder
+from blank_project import Config
+from blank_project.index import TemplateFile
+from blank_project.plan import MKDIR
+from blank_project.plan import PACKAGE
+from blank_project.plan import RENDER
+from blank_project.plan import SKIP
+from blank_project.plan import Action
+from blank_project.plan import plan_directories
+
+
+def template_file(target):
+    return TemplateFile(path=target, target=target, is_template=False,
+                        size=0)
+
+
+class DirectoryPlanTest(unittest.TestCase):
+    def test_plan_directories(self):
+        plan = plan_directories([
+            template_file('setup.py'),
+            template_file('docs/source/conf.py'),
+            template_file('docs/source/index.rst'),
+            template_file('docs/Makefile'),
+            template_file('a/b/c/d.txt'),
+        ])
+
+        self.assertEqual(plan.directories, (
+            '', 'a', 'a/b', 'a/b/c', 'docs', 'docs/source',
+        ))
+        self.assertEqual(plan.files, 5)
+        self.assertEqual(plan.checks_saved, 0)
+
+    def test_builder(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            builder = Builder(tmpdir, Config(name='project', author='author'))
+
+            with mock.patch.object(blank_project.sinks, 'makedirs',
+                                   wraps=os.makedirs) as makedirs:
+                builder.build()
+
+            plan = builder.directory_plan
+
+            self.assertEqual(plan.directories, (
+                '', 'docs', 'docs/source', 'requirements',
+            ))
+            self.assertEqual(plan.files, 16)
+            self.assertEqual(plan.checks_saved, 12)
+
+            # One call per directory and one for the project package
+            self.assertEqual(makedirs.call_count,
+                             len(plan.directories) + 1)
+
+            for dirname in plan.directories:
+                self.assertTrue(os.path.isdir(os.path.join(tmpdir, dirname)))
+
+    def test_rebuild_keeps_package(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config = Config(name='project', author='author')
+            Builder(tmpdir, config).build()
+
+            init_path = os.path.join(tmpdir, 'src', 'project', '__init__.py')
+            with open(init_path, mode='w') as f:
+                f.write('VERSION = 1\n')
+
+            Builder(tmpdir, config).build()
+
+            with open(init_path, mode='r') as f:
+                self.assertEqual(f.read(), 'VERSION = 1\n')
+
+
+class BuildPlanTest(unittest.TestCase):
+    def test_no_io(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            base_dir = os.path.join(tmpdir, 'project')
+            builder = Builder(base_dir, Config(name='project',
+                                               author='author'))
+
+            actions = builder.plan()
+
+            self.assertFalse(os.path.exists(base_dir))
+
+        self.assertEqual([action.target for action in actions[:5]],
+                         ['', 'docs', 'docs/source', 'requirements',
+                          'src/project'])
+        self.assertEqual([action.kind for action in actions[:5]],
+                         [MKDIR, MKDIR, MKDIR, MKDIR, PACKAGE])
+        flake8 = next(action for action in actions
+                      if action.target == '.flake8')
+        self.assertEqual(flake8, Action(RENDER, '.flake8',
+                                        source='.flake8_template',
+                                        size=flake8.size))
+        self.assertNotIn(SKIP, [action.kind for action in actions])
+
+    def test_skip_reasons(self):
+        builder = Builder('project', Config(name='project', author='author',
+                                            docs=False, mypy=False))
+
+        skipped = {action.target: action.reason
+                   for action in builder.plan()
+                   if action.kind == SKIP}
+
+        self.assertEqual(skipped['mypy.ini'], 'mypy disabled')
+        self.assertTrue(skipped)
+        self.assertTrue(all(
+            reason == 'docs disabled'
+            for target, reason in skipped.items()
+            if target.startswith('docs/')
+        ))
+        self.assertEqual(len(skipped), 1 + len([
+            target for target in skipped if target.startswith('docs/')
+        ]))
+
+    def test_serializable(self):
+        actions = Builder('project', Config(name='project', author='author',
+                                            docs=False)).plan()
+
+        data = json.loads(json.dumps([action._asdict()
+                                      for action in actions]))
+
+        self.assertEqual([Action(**action) for action in data], actions)
+
+    def test_execute(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            builder = Builder(tmpdir, Config(name='project', author='author',
+                                             pylint=False))
+            actions = builder.plan()
+            builder.execute(actions)
+
+            for action in actions:
+                exists = os.path.exists(os.path.join(tmpdir, action.target))
+                self.assertEqual(exists, action.kind != SKIP, action)
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+import pickle
+import tempfile
+import unittest
+
+from blank_project import Builder
+from blank_project import Config
+from blank_project.profiler import Profiler
+from blank_project.sinks import MemorySink
+
+
+class ProfilerTest(unittest.TestCase):
+    def test_events(self):
+        profiler = Profiler()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            builder = Builder(tmpdir, Config(name='project', author='author'),
+                              profiler=profiler)
+            builder.build()
+
+            files = {event.target: event for event in profiler.events
+                     if event.kind in ('render', 'copy')}
+
+            self.assertEqual(set(files), {
+                action.target
+                for action in Builder(tmpdir, builder.config).plan()
+                if action.kind in ('render', 'copy')
+            })
+
+            for target, event in files.items():
+                self.assertEqual(
+                    event.size,
+                    os.path.getsize(os.path.join(tmpdir, target)),
+                    target,
+                )
+
+        sizes = {}
+        for event in profiler.events:
+            sizes[event.kind] = sizes.get(event.kind, 0) + event.size
+
+        # Package __init__.py is empty, the build counts all the steps
+        self.assertEqual(sizes['package'], 0)
+        self.assertEqual(sizes['build'], sizes['render'] + sizes['copy'])
+
+        kinds = [event.kind for event in profiler.events]
+        self.assertEqual(kinds[0], 'plan')
+        self.assertEqual(kinds[-1], 'build')
+        self.assertEqual(kinds.count('mkdir'),
+                         len(builder.directory_plan.directories))
+        self.assertEqual(kinds.count('package'), 1)
+        self.assertTrue(all(event.wall >= 0 and event.cpu >= 0
+                            for event in profiler.events))
+
+    def test_abuild(self):
+        profiler = Profiler()
+        loop = asyncio.new_event_loop()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            try:
+                loop.run_until_complete(Builder(
+                    tmpdir, Config(name='project', author='author'),
+                    profiler=profiler,
+                ).abuild())
+            finally:
+                loop.close()
+
+        summary = profiler.summary()
+
+        self.assertEqual(profiler.events[-1].kind, 'build')
+        self.assertEqual(summary['build']['count'], 1)
+        # Files are written in the executor threads
+        self.assertEqual(summary['build']['size'],
+                         summary['render']['size'] + summary['copy']['size'])
+
+    def test_summary(self):
+        profiler = Profiler()
+        sink = MemorySink()
+
+        Builder('unused', Config(name='project', author='author'),
+                sink=sink, stream=True, profiler=profiler).build()
+
+        summary = json.loads(json.dumps(profiler.to_json()))['summary']
+
+        self.assertEqual(
+            summary['render']['size'] + summary['copy']['size'],
+            sum(len(content) for content in sink.files.values()),
+        )
+        self.assertEqual(summary['build']['count'], 1)
+        self.assertIn('total (1)', profiler.format_table())
+
+    def test_pickle(self):
+        profiler = Profiler()
+        Builder('unused', Config(name='project', author='author'),
+                sink=MemorySink(), profiler=profiler).build()
+
+        restored = pickle.loads(pickle.dumps(profiler))
+
+        self.assertEqual(restored.events, profiler.events)
+        Builder('unused', Config(name='project', author='author'),
+                sink=MemorySink(), profiler=restored).build()
+        self.assertEqual(len(restored.events), len(profiler.events) * 2)
+
+    def test_build_many(self):
+        profiler = Profiler()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            results = Builder.build_many([
+                (os.path.join(tmpdir, name),
+                 Config(name=name, author='author'))
+                for name in ('foo', 'bar')
+            ], jobs=2, profiler=profiler)
+
+        self.assertTrue(all(result.ok for result in results))
+        # Events recorded by the worker processes
+        self.assertEqual(profiler.summary()['build']['count'], 2)
+        self.assertEqual(
+            sorted(event.target for event in profiler.events
+                   if event.kind == 'render' and event.target == 'setup.py'),
+            ['setup.py', 'setup.py'],
+        )
+        self.assertGreater(profiler.summary()['copy']['size'], 0)
+
+    def test_worker_events(self):
+        profiler = Profiler()
+        batch = (Builder._get_index(), {'profiler': profiler})
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            result, counts, events = Builder._build_in_worker(
+                tmpdir, Config(name='project', author='author'), -1, batch
+            )
+
+        self.assertTrue(result.ok)
+        self.assertEqual(counts, {})
+        self.assertEqual([event.kind for event in events
+                          if event.kind == 'build'], ['build'])
+        # Events are sent to the caller, the worker copy keeps nothing
+        self.assertEqual(profiler.events, [])
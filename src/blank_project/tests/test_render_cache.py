@@ -0,0 +1,214 @@
+import multiprocessing
+import os
+import pickle
+import tempfile
+import unittest
+from filecmp import cmp
+
+from freezegun import freeze_time
+
+from blank_project import TEMPLATE_PROJECT_DIR
+from blank_project import Builder
+from blank_project import Config
+from blank_project.analysis import analyze_template
+from blank_project.render_cache import RenderCache
+
+
+class AnalysisTest(unittest.TestCase):
+    def test_variables(self):
+        self.assertEqual(
+            analyze_template(TEMPLATE_PROJECT_DIR,
+                             '.flake8_template').variables,
+            {'line_length'},
+        )
+        self.assertEqual(
+            analyze_template(TEMPLATE_PROJECT_DIR,
+                             'docs/source/conf.py_template').variables,
+            {'name', 'author', 'year'},
+        )
+
+
+class RenderCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def _build(self, name, cache, prefix='', **config):
+        base_dir = os.path.join(self._tmpdir.name, prefix, name)
+        Builder(base_dir, Config(name=name, author='author', **config),
+                render_cache=cache).build()
+        return base_dir
+
+    def _compare(self, left, right):
+        for root, _, files in os.walk(left):
+            for name in files:
+                left_file = os.path.join(root, name)
+                right_file = os.path.join(right,
+                                          os.path.relpath(left_file, left))
+                self.assertTrue(cmp(left_file, right_file, shallow=False),
+                                left_file)
+
+    @freeze_time('1970-01-01')
+    def test_same_output(self):
+        cache = RenderCache()
+
+        for name in ('foo', 'bar'):
+            for python2 in (False, True):
+                cached = self._build(name, cache, f'cached{python2}',
+                                     python2=python2)
+                plain = self._build(name, None, f'plain{python2}',
+                                    python2=python2)
+
+                self._compare(cached, plain)
+
+    def test_counters(self):
+        cache = RenderCache()
+
+        self._build('foo', cache)
+        templates = cache.misses
+        self.assertEqual(cache.hits, 0)
+
+        self._build('bar', cache)
+
+        # tox.ini and requirements/dev.txt don't depend on the name (plain
+        # templates like .flake8 are filled in without the cache)
+        self.assertEqual(cache.misses, templates * 2 - 2)
+        self.assertEqual(cache.hits, 2)
+
+        self._build('baz', cache, line_length=120)
+
+        self.assertEqual(cache.hits, 4)
+
+    def test_disk(self):
+        directory = os.path.join(self._tmpdir.name, 'cache')
+
+        first = RenderCache(directory=directory)
+        self._build('foo', first)
+
+        second = RenderCache(directory=directory)
+        self._build('foo', second)
+
+        self.assertEqual(second.misses, 0)
+        self.assertEqual(second.disk_hits, first.misses)
+
+    def test_unwritable_disk(self):
+        directory = os.path.join(self._tmpdir.name, 'cache')
+        with open(directory, mode='w'):
+            pass
+
+        cache = RenderCache(directory=directory)
+        for _ in range(2):
+            self.assertEqual(
+                cache.render(TEMPLATE_PROJECT_DIR, '.flake8_template',
+                             {'line_length': 79}, lambda: '79'),
+                '79',
+            )
+
+        self.assertEqual(cache.stats, {'hits': 1, 'disk_hits': 0,
+                                       'misses': 1, 'size': 1})
+
+    def test_lru(self):
+        cache = RenderCache(maxsize=1)
+
+        for line_length in (79, 120, 79):
+            cache.render(TEMPLATE_PROJECT_DIR, '.flake8_template',
+                         {'line_length': line_length}, str)
+
+        self.assertEqual(cache.stats, {'hits': 0, 'disk_hits': 0,
+                                       'misses': 3, 'size': 1})
+
+    def _write(self, name, content):
+        with open(os.path.join(self._tmpdir.name, name), mode='w') as f:
+            f.write(content)
+
+    def test_included_templates(self):
+        self._write('main', '{{ name }}{% include "part" %}')
+        self._write('part', '{{ author }}')
+        context = {'name': 'foo', 'author': 'author', 'docs': True}
+
+        key = RenderCache.get_key(self._tmpdir.name, 'main', context)
+
+        self.assertIsNotNone(key)
+        self.assertEqual(
+            RenderCache.get_key(self._tmpdir.name, 'main',
+                                dict(context, docs=False)),
+            key,
+        )
+        self.assertNotEqual(
+            RenderCache.get_key(self._tmpdir.name, 'main',
+                                dict(context, author='other')),
+            key,
+        )
+
+        analyze_template.cache_clear()
+        self._write('part', '{{ author }}!')
+
+        self.assertNotEqual(
+            RenderCache.get_key(self._tmpdir.name, 'main', context),
+            key,
+        )
+
+    def test_dynamic_templates(self):
+        self._write('main', '{% include part %}')
+        cache = RenderCache()
+
+        for part in ('foo', 'bar'):
+            self.assertEqual(
+                cache.render(self._tmpdir.name, 'main', {'part': part},
+                             lambda: part),
+                part,
+            )
+
+        self.assertIsNone(
+            RenderCache.get_key(self._tmpdir.name, 'main', {'part': 'foo'})
+        )
+        self.assertEqual(cache.stats, {'hits': 0, 'disk_hits': 0,
+                                       'misses': 0, 'size': 0})
+
+    def test_build_many(self):
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            self.skipTest('fork is not available')  # pragma: no cover
+
+        cache = RenderCache()
+        projects = [
+            (os.path.join(self._tmpdir.name, name),
+             Config(name=name, author='author'))
+            for name in ('foo', 'bar', 'baz', 'qux')
+        ]
+
+        results = Builder.build_many(projects, jobs=2, render_cache=cache)
+
+        self.assertTrue(all(result.ok for result in results))
+        # Every worker keeps its cache between the projects
+        self.assertGreater(cache.hits, 0)
+        self.assertEqual(cache.stats['size'], 0)
+
+    def test_worker_counts(self):
+        cache = RenderCache()
+        batch = (Builder._get_index(), {'render_cache': cache})
+        totals = {'hits': 0, 'disk_hits': 0, 'misses': 0}
+
+        for name in ('foo', 'bar'):
+            _, counts, _ = Builder._build_in_worker(
+                os.path.join(self._tmpdir.name, name),
+                Config(name=name, author='author'),
+                -1, batch,
+            )
+            for counter, value in counts['render_cache'].items():
+                totals[counter] += value
+
+        self.assertEqual(totals, {'hits': cache.hits, 'disk_hits': 0,
+                                  'misses': cache.misses})
+        self.assertGreater(totals['hits'], 0)
+
+    def test_pickle(self):
+        cache = RenderCache(directory=self._tmpdir.name)
+        self._build('foo', cache)
+
+        restored = pickle.loads(pickle.dumps(cache))
+
+        self.assertEqual(restored.directory, cache.directory)
+        self.assertEqual(restored.stats['size'], 0)
+        self._build('bar', restored)
@@ -0,0 +1,108 @@
+import unittest
+
+from blank_project.index import TemplateFile
+from blank_project.index import TemplateIndex
+from blank_project.rules import SkipMatcher
+from blank_project.rules import SkipRule
+from blank_project.rules import directory
+from blank_project.rules import exact
+from blank_project.rules import glob
+from blank_project.rules import regex
+
+
+def make_index(*paths):
+    return TemplateIndex([
+        TemplateFile(path=file_path,
+                     target=(file_path[:-len('_template')]
+                             if file_path.endswith('_template')
+                             else file_path),
+                     is_template=file_path.endswith('_template'),
+                     size=0)
+        for file_path in paths
+    ])
+
+
+INDEX = make_index(
+    '.coveragerc',
+    '.flake8_template',
+    'docs.txt',
+    'docs/Makefile',
+    'docs/source/conf.py_template',
+    'docs2/file',
+    'requirements/base.txt',
+    'requirements/dev.txt_template',
+    'setup.py_template',
+    'xflake8',
+)
+
+
+class SkipMatcherTest(unittest.TestCase):
+    def assertFiltered(self, rules, expected):
+        matcher = SkipMatcher(rules)
+        targets = [f.target for f in matcher.filter(INDEX)]
+
+        self.assertEqual(targets, expected)
+        self.assertEqual(
+            [f.target for f in INDEX if not matcher.match(f.target)],
+            expected,
+        )
+
+    def test_no_rules(self):
+        self.assertFalse(SkipMatcher())
+        self.assertFiltered([], [f.target for f in INDEX])
+
+    def test_exact(self):
+        self.assertFiltered([exact('.flake8'), exact('setup.py')], [
+            '.coveragerc',
+            'docs.txt',
+            'docs/Makefile',
+            'docs/source/conf.py',
+            'docs2/file',
+            'requirements/base.txt',
+            'requirements/dev.txt',
+            'xflake8',
+        ])
+
+    def test_directory(self):
+        self.assertFiltered([
+            directory('docs'),
+            directory('missing'),
+            directory('requirements/'),
+        ], [
+            '.coveragerc',
+            '.flake8',
+            'docs.txt',
+            'docs2/file',
+            'setup.py',
+            'xflake8',
+        ])
+
+    def test_nested_directory(self):
+        matcher = SkipMatcher([directory('docs/source'), directory('docs')])
+
+        self.assertEqual(matcher.directories, ('docs/',))
+
+    def test_glob(self):
+        self.assertFiltered([glob('*.txt')], [
+            '.coveragerc',
+            '.flake8',
+            'docs/Makefile',
+            'docs/source/conf.py',
+            'docs2/file',
+            'setup.py',
+            'xflake8',
+        ])
+
+    def test_regex(self):
+        self.assertFiltered([regex(r'docs\d?/'), '.coveragerc'], [
+            '.flake8',
+            'docs.txt',
+            'requirements/base.txt',
+            'requirements/dev.txt',
+            'setup.py',
+            'xflake8',
+        ])
+
+    def test_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            SkipMatcher([SkipRule('unknown', 'docs')])
@@ -0,0 +1,147 @@
+import io
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+from freezegun import freeze_time
+
+from blank_project import Builder
+from blank_project import Config
+from blank_project.sinks import MemorySink
+from blank_project.sinks import TarSink
+from blank_project.sinks import ZipSink
+from blank_project.sinks import get_archive_format
+from blank_project.sinks import open_archive_sink
+
+
+def read_tree(base_dir):
+    files = {}
+    for root, _, names in os.walk(base_dir):
+        for name in names:
+            full_path = os.path.join(root, name)
+            with open(full_path, mode='rb') as f:
+                files[os.path.relpath(full_path, base_dir)] = f.read()
+    return files
+
+
+@freeze_time('1970-01-01')
+class SinkTest(unittest.TestCase):
+    def setUp(self):
+        self.config = Config(name='project', author='author', mypy=False)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            Builder(tmpdir, self.config).build()
+            self.expected = read_tree(tmpdir)
+
+    def test_memory(self):
+        sink = MemorySink()
+        Builder('unused', self.config, sink=sink).build()
+
+        self.assertEqual(sink.files, self.expected)
+        self.assertIn('src/project', sink.directories)
+        self.assertIn('docs/source', sink.directories)
+        self.assertFalse(os.path.exists('unused'))
+
+    def test_memory_stream(self):
+        sink = MemorySink()
+        Builder('unused', self.config, stream=True, sink=sink).build()
+
+        self.assertEqual(sink.files, self.expected)
+
+    def test_tar(self):
+        output = io.BytesIO()
+        with tarfile.open(fileobj=output, mode='w|gz') as archive:
+            Builder('unused', self.config,
+                    sink=TarSink(archive, prefix='project')).build()
+
+        output.seek(0)
+        with tarfile.open(fileobj=output, mode='r:gz') as archive:
+            files = {
+                os.path.relpath(member.name, 'project'):
+                    archive.extractfile(member).read()
+                for member in archive.getmembers()
+                if member.isfile()
+            }
+            self.assertTrue(archive.getmember('project/docs').isdir())
+
+        self.assertEqual(files, self.expected)
+
+    def test_zip(self):
+        output = io.BytesIO()
+        with zipfile.ZipFile(output, mode='w',
+                             compression=zipfile.ZIP_DEFLATED) as archive:
+            Builder('unused', self.config, sink=ZipSink(archive)).build()
+
+        with zipfile.ZipFile(output) as archive:
+            files = {
+                name: archive.read(name)
+                for name in archive.namelist()
+                if not name.endswith('/')
+            }
+            self.assertIn('src/project/', archive.namelist())
+
+        self.assertEqual(files, self.expected)
+
+    def test_makedirs(self):
+        sink = MemorySink()
+        sink.makedirs('a/b')
+
+        self.assertEqual(sink.directories, {'', 'a', 'a/b'})
+
+        sink.makedirs('a')
+        with self.assertRaises(FileExistsError):
+            sink.makedirs('a', exist_ok=False)
+
+    def test_close_twice(self):
+        sink = MemorySink()
+
+        f = sink.open('file')
+        f.write('content')
+        f.close()
+        f.close()
+
+        self.assertEqual(sink.files, {'file': b'content'})
+
+    def test_incremental(self):
+        with self.assertRaises(ValueError):
+            Builder('unused', self.config, incremental=True,
+                    sink=MemorySink())
+
+    def test_archive_formats(self):
+        self.assertEqual(get_archive_format('out.zip'), 'zip')
+        self.assertEqual(get_archive_format('out.tar.gz'), 'w|gz')
+        self.assertEqual(get_archive_format('out.tar'), 'w|')
+        with self.assertRaises(ValueError):
+            get_archive_format('out.rar')
+
+    def test_tar_without_prefix(self):
+        output = io.BytesIO()
+        with open_archive_sink(output, 'w|') as sink:
+            Builder('unused', self.config, sink=sink).build()
+
+        output.seek(0)
+        with tarfile.open(fileobj=output) as archive:
+            names = archive.getnames()
+
+        self.assertIn('setup.py', names)
+        self.assertIn('docs', names)
+        self.assertNotIn('', names)
+
+    def test_open_archive_sink(self):
+        for archive_format in ('zip', 'w|', 'w|bz2'):
+            output = io.BytesIO()
+            with open_archive_sink(output, archive_format,
+                                   prefix='project') as sink:
+                Builder('unused', self.config, sink=sink).build()
+
+            output.seek(0)
+            if archive_format == 'zip':
+                with zipfile.ZipFile(output) as archive:
+                    content = archive.read('project/setup.py')
+            else:
+                with tarfile.open(fileobj=output) as archive:
+                    content = archive.extractfile('project/setup.py').read()
+
+            self.assertEqual(content, self.expected['setup.py'])
@@ -0,0 +1,102 @@
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+import blank_project
+from blank_project import env
+from blank_project import get_environment
+
+
+# ``import blank_project`` time budget relative to ``import jinja2``
+# (the package takes about 2/3 of it), measured on the same machine
+IMPORT_BUDGET_RATIO = float(
+    os.environ.get('BLANK_PROJECT_IMPORT_BUDGET_RATIO', 1.0)
+)
+
+# Modules which are imported only when they are needed
+DEFERRED_MODULES = (
+    'jinja2',
+    'asyncio',
+    'multiprocessing',
+    'concurrent.futures',
+    'tempfile',
+)
+
+
+def import_times(statement):
+    """
+    :param statement: Python statement
+    :return: Cumulative import times (microseconds) by module name
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [os.path.dirname(os.path.dirname(blank_project.__file__))]
+        + sys.path
+    )
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        stderr=subprocess.PIPE, env=env, check=True,
+        universal_newlines=True,
+    )
+
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue  # pragma: no cover
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+@unittest.skipIf(sys.version_info < (3, 7), '-X importtime needs python 3.7')
+class StartupTest(unittest.TestCase):
+    def test_deferred_imports(self):
+        times = import_times('import blank_project')
+
+        self.assertIn('blank_project', times)
+        for name in DEFERRED_MODULES:
+            self.assertNotIn(name, times)
+
+    def test_import_budget(self):
+        # Best of several runs, the first ones may warm up the disk cache
+        package = min(import_times('import blank_project')['blank_project']
+                      for _ in range(3))
+        jinja2 = min(import_times('import jinja2')['jinja2']
+                     for _ in range(3))
+
+        self.assertLess(package, jinja2 * IMPORT_BUDGET_RATIO)
+
+    def test_environment_on_demand(self):
+        times = import_times(
+            'import blank_project; blank_project.get_environment()'
+        )
+
+        self.assertIn('jinja2', times)
+
+
+class EnvironmentTest(unittest.TestCase):
+    def test_module_env(self):
+        with mock.patch.object(blank_project, '_environments', {}):
+            self.assertIsInstance(env.get_template('.flake8_template'),
+                                  env.template_class)
+            self.assertIs(env.loader, get_environment().loader)
+            self.assertEqual(repr(env), f'<lazy {get_environment()!r}>')
+
+    def test_created_once(self):
+        environment = object()
+
+        class Lock:
+            def __enter__(self):
+                # Other thread has created the environment meanwhile
+                blank_project._environments['none'] = environment
+
+            def __exit__(self, *exc_info):
+                pass
+
+        with mock.patch.object(blank_project, '_environments', {}), \
+                mock.patch.object(blank_project, '_environments_lock',
+                                  Lock()):
+            self.assertIs(get_environment('none'), environment)
@@ -0,0 +1,121 @@
+import gc
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import blank_project
+from blank_project import TEMPLATE_PROJECT_DIR
+from blank_project import Builder
+from blank_project import Config
+from blank_project.analysis import analyze_template
+from blank_project.partial import PartialTemplates
+from blank_project.partial import get_plain_template
+from blank_project.profiler import Profiler
+from blank_project.render_cache import RenderCache
+
+
+# Number of concurrent builds
+BUILDS = 200
+
+
+def read_tree(base_dir):
+    files = {}
+    for root, _, names in os.walk(base_dir):
+        for name in names:
+            full_path = os.path.join(root, name)
+            with open(full_path, mode='rb') as f:
+                files[os.path.relpath(full_path, base_dir)] = f.read()
+    return files
+
+
+def get_config(i):
+    return Config(name=f'project{i % 7}', author=f'author{i % 3}',
+                  line_length=79 + i % 2, python2=bool(i % 5 == 0),
+                  docs=bool(i % 4), coverage=-1 if i % 6 == 0 else 80)
+
+
+class ThreadsTest(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.base_dir = self._tmpdir.name
+
+        # Threads race to create the environment and fill the caches
+        patch = mock.patch.object(blank_project, '_environments', {})
+        patch.start()
+        self.addCleanup(patch.stop)
+        analyze_template.cache_clear()
+        get_plain_template.cache_clear()
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+        # Drop the bundle ModuleLoader now (see BundleTest.tearDown)
+        gc.collect()
+
+    def get_expected(self):
+        expected = {}
+        for i in range(BUILDS):
+            base_dir = os.path.join(self.base_dir, 'expected', str(i))
+            Builder(base_dir, get_config(i)).build()
+            expected[i] = read_tree(base_dir)
+        return expected
+
+    def test_concurrent_builds(self):
+        configs = [get_config(i) for i in range(BUILDS)]
+        render_cache = RenderCache()
+        partial = PartialTemplates.from_contexts(
+            TEMPLATE_PROJECT_DIR, [config.get_context() for config in configs]
+        )
+        profiler = Profiler()
+        barrier = threading.Barrier(16)
+        errors = []
+
+        def build(indexes):
+            try:
+                barrier.wait()
+                for i in indexes:
+                    Builder(os.path.join(self.base_dir, 'threads', str(i)),
+                            configs[i],
+                            render_cache=render_cache if i % 2 else None,
+                            partial=partial if i % 3 else None,
+                            profiler=profiler).build()
+            except Exception as e:  # pragma: no cover
+                errors.append(e)
+
+        threads = [threading.Thread(target=build,
+                                    args=(range(j, BUILDS, 16),))
+                   for j in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        expected = self.get_expected()
+        for i in range(BUILDS):
+            with self.subTest(i=i):
+                self.assertEqual(
+                    read_tree(os.path.join(self.base_dir, 'threads', str(i))),
+                    expected[i],
+                )
+
+        self.assertEqual(sum(event.kind == 'build'
+                             for event in profiler.events), BUILDS)
+
+    def test_build_many(self):
+        projects = [(os.path.join(self.base_dir, 'threads', str(i)),
+                     get_config(i))
+                    for i in range(BUILDS)]
+
+        results = Builder.build_many(projects, jobs=16, threads=True,
+                                     render_cache=RenderCache())
+
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual([result.base_dir for result in results],
+                         [base_dir for base_dir, _ in projects])
+
+        expected = self.get_expected()
+        for i, (base_dir, _) in enumerate(projects):
+            with self.subTest(i=i):
+                self.assertEqual(read_tree(base_dir), expected[i])